@@ -0,0 +1,94 @@
+"""
+Benchmark read paths of a BigQuery table: rows/sec and peak memory.
+
+Paths:
+    - rest_dataframe:       `to_dataframe()` through the paginated REST API
+    - rest_arrow:           Arrow record batches through the REST API
+    - storage_dataframe:    `to_dataframe()` through the Storage Read API
+    - storage_arrow:        Arrow record batches through the Storage Read API
+                            (the path of `bigquery_helper` dimension maps with
+                            `GEEKBENCH_REPORT_BQ_STORAGE_READ=true`)
+
+Each path runs in its own process so that the peak RSS is not shared.
+The Storage Read API paths need `pip install .[bqstorage]`.
+
+Usage:
+    python scripts/benchmark_bq_read_paths.py [--table system_names] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# Add src to path to allow imports from utils
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), "src")
+sys.path.append(src_path)
+
+from utils.core.warehouse_backend import BigQueryBackend
+
+PATH_LIST = ["rest_dataframe", "rest_arrow", "storage_dataframe", "storage_arrow"]
+
+
+def run_path(path: str, table_name: str) -> dict:
+    backend = BigQueryBackend(use_storage_read=path.startswith("storage_"))
+    query = f"SELECT * FROM {backend.table_ref(table_name)}"
+
+    start_time = time.time()
+    if path.endswith("_dataframe"):
+        rows = len(backend.query_df(query))
+    else:
+        rows = sum(record_batch.num_rows for record_batch in backend.query_arrow_batches(query))
+    elapsed_seconds = time.time() - start_time
+
+    return {
+        "rows": rows,
+        "elapsed_seconds": elapsed_seconds,
+        # Kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--table", default="system_names")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--paths", nargs="+", choices=PATH_LIST, default=PATH_LIST)
+    parser.add_argument("--single-path", choices=PATH_LIST, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_path:
+        print(json.dumps(run_path(args.single_path, args.table)))
+        return
+
+    print(f"{'path':<18} {'rows':>10} {'rows/s':>12} {'elapsed s':>10} {'peak RSS MB':>12}")
+    for path in args.paths:
+        result_list = []
+        for _ in range(args.runs):
+            completed = subprocess.run(
+                [sys.executable, __file__, "--table", args.table, "--single-path", path],
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode != 0:
+                print(f"{path:<18} failed: {completed.stderr.strip().splitlines()[-1]}")
+                break
+            result_list.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        if not result_list:
+            continue
+
+        elapsed_seconds = statistics.median(r["elapsed_seconds"] for r in result_list)
+        rows = result_list[-1]["rows"]
+        print(
+            f"{path:<18} {rows:>10} {rows / elapsed_seconds:>12.0f} {elapsed_seconds:>10.2f} "
+            f"{max(r['peak_rss_mb'] for r in result_list):>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
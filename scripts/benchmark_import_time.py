@@ -0,0 +1,152 @@
+"""
+Benchmark the import time of flow and deployment modules with `-X importtime`.
+
+Each module of `src/flows/` and `src/deployments/` is imported in a fresh
+interpreter `--repeat` times and the fastest cumulative import time is kept.
+A module fails if it takes more than `--tolerance` over its saved baseline
+(`import_time_baseline.json`), or more than `--budget-ms` without a baseline,
+or if it loads a dependency that must be imported on first use (see
+`DEFERRED_MODULE_LIST`). The exit code is 1 if any module fails, so it can run in CI.
+
+Usage:
+    python scripts/benchmark_import_time.py [--tolerance 1.0] [--repeat 3] [--top 10]
+    python scripts/benchmark_import_time.py --module flows.sync_cpu_model_result_to_bq_flow
+    python scripts/benchmark_import_time.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), "src")
+
+BASELINE_PATH = os.path.join(current_dir, "fixtures", "import_time_baseline.json")
+
+# Budget of modules without a baseline. Most of it is Prefect (~1.1s) and
+# pandas (~0.3s), which every flow needs, and a loaded machine is much slower.
+DEFAULT_BUDGET_MS = 4000
+
+# Heavy dependencies only needed when a flow actually talks to a service or parses a page
+DEFERRED_MODULE_LIST = [
+    "bs4",
+    "duckdb",
+    "google.api_core.exceptions",
+    "google.auth",
+    "google.cloud.bigquery",
+    "googleapiclient",
+    "pyarrow.dataset",
+    "pygsheets",
+    "requests",
+]
+
+
+@dataclass
+class ImportTime:
+    module: str
+    cumulative_ms: float
+    # Self time of every imported module
+    self_ms_map: dict[str, float] = field(default_factory=dict)
+
+
+def get_module_list() -> list[str]:
+    module_list = []
+    for package in ("flows", "deployments"):
+        for file_name in sorted(os.listdir(os.path.join(src_path, package))):
+            if file_name.endswith(".py") and file_name != "__init__.py":
+                module_list.append(f"{package}.{file_name[:-3]}")
+    return module_list
+
+
+def measure_import_time(module: str) -> ImportTime:
+    """Import `module` in a fresh interpreter and parse its `-X importtime` report."""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = f"{src_path}{os.pathsep}{env.get('PYTHONPATH', '')}"
+    completed_process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=src_path,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed_process.returncode != 0:
+        raise RuntimeError(f"Could not import {module}:\n{completed_process.stderr}")
+
+    import_time = ImportTime(module=module, cumulative_ms=0.0)
+    for line in completed_process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        import_time.self_ms_map[name] = int(self_us) / 1000
+        if name == module:
+            import_time.cumulative_ms = int(cumulative_us) / 1000
+    return import_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Import time budget of modules without a baseline.")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Allowed import time increase over the baseline.")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per module, the fastest is kept.")
+    parser.add_argument("--top", type=int, default=10, help="Modules with the largest self time to show.")
+    parser.add_argument("--module", action="append", help="Module to measure, default all flows and deployments.")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline_map = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r") as f:
+            baseline_map = json.load(f)
+
+    failure_list = []
+    slowest_import_time = None
+    print(f"{'module':<55} {'import ms':>10} {'baseline':>10} {'budget ms':>10}")
+    for module in args.module or get_module_list():
+        import_time = min(
+            (measure_import_time(module) for _ in range(args.repeat)),
+            key=lambda x: x.cumulative_ms,
+        )
+        baseline_ms = baseline_map.get(module)
+        budget_ms = baseline_ms * (1 + args.tolerance) if baseline_ms else args.budget_ms
+        print(
+            f"{module:<55} {import_time.cumulative_ms:>10.0f} "
+            f"{baseline_ms or float('nan'):>10.0f} {budget_ms:>10.0f}"
+        )
+
+        if not args.update_baseline and import_time.cumulative_ms > budget_ms:
+            failure_list.append(f"{module}: {import_time.cumulative_ms:.0f} ms, budget {budget_ms:.0f} ms")
+        loaded_list = [x for x in DEFERRED_MODULE_LIST if x in import_time.self_ms_map]
+        if loaded_list:
+            failure_list.append(f"{module}: imports {', '.join(loaded_list)} at import time")
+        if slowest_import_time is None or import_time.cumulative_ms > slowest_import_time.cumulative_ms:
+            slowest_import_time = import_time
+        baseline_map[module] = round(import_time.cumulative_ms, 1)
+
+    if slowest_import_time is not None:
+        print(f"\nLargest self time of {slowest_import_time.module}:")
+        for name, self_ms in sorted(
+            slowest_import_time.self_ms_map.items(), key=lambda x: x[1], reverse=True
+        )[:args.top]:
+            print(f"  {self_ms:>8.1f} ms  {name}")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline_map, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+
+    if failure_list:
+        print("\nFAILED:")
+        for failure in failure_list:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll modules are within the import time budget.")
+
+
+if __name__ == "__main__":
+    main()
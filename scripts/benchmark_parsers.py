@@ -0,0 +1,300 @@
+"""
+Benchmark parsers of Geekbench Browser pages on the offline fixture corpus.
+
+Fixtures are HTML pages in `scripts/fixtures/geekbench/`, with the records each
+parser must return in `<fixture>.expected.json`:
+    - search_results_page:          `parse_result_page` and `parse_total_pages`
+    - detail_page:                  `parse_detail_page`
+    - latest_results_page:          `parse_latest_results_page`
+    - processor_benchmarks_page:    `parse_benchmarks_page` and `parse_benchmarks_page_cpu_models`
+
+For each parser, records are compared with the expected ones record for record,
+then pages/sec and allocations (tracemalloc peak and allocated blocks of one
+parse) are measured. Pages/sec depends on the machine, so it is divided by the
+speed of a calibration loop (the stdlib `HTMLParser` on a synthetic page) run
+in the same process, interleaved with the parser; the relative speed below `--tolerance` of the
+saved baseline (`parser_baseline.json`) is a regression. The exit code is 1 on
+any mismatch or regression, so it can run in CI on any runner.
+
+Usage:
+    python scripts/benchmark_parsers.py [--min-seconds 1.0] [--tolerance 0.3]
+    python scripts/benchmark_parsers.py --update-baseline
+    python scripts/benchmark_parsers.py --update-expected   # after reviewing a parser change
+    python scripts/benchmark_parsers.py --record            # replace fixtures with live pages
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Any
+
+# Add src to path to allow imports from utils
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), "src")
+sys.path.append(src_path)
+
+from bs4 import BeautifulSoup
+
+from utils.core.geekbench.geekbench_processor_benchmark_scraper import parse_benchmarks_page
+from utils.core.geekbench.geekbench_processor_detail_scraper import parse_detail_page
+from utils.core.geekbench.geekbench_processor_name_scraper import (
+    parse_benchmarks_page_cpu_models,
+    parse_latest_results_page,
+)
+from utils.core.geekbench.geekbench_processor_result_scraper import (
+    parse_result_page,
+    parse_total_pages,
+)
+
+FIXTURE_DIR = os.path.join(current_dir, "fixtures", "geekbench")
+BASELINE_PATH = os.path.join(FIXTURE_DIR, "parser_baseline.json")
+
+# Live pages of each fixture, for `--record`
+RECORD_URL_MAP = {
+    "search_results_page": "https://browser.geekbench.com/search?q=AMD+Ryzen+9+9950X3D",
+    "detail_page": "https://browser.geekbench.com/v6/cpu/12479005",
+    "latest_results_page": "https://browser.geekbench.com/v6/cpu",
+    "processor_benchmarks_page": "https://browser.geekbench.com/processor-benchmarks",
+}
+
+# Timing rounds of each parser, `--min-seconds` is split between them
+TIMING_ROUNDS = 5
+
+# Page of the calibration loop, a results table like the fixtures without any site markup
+CALIBRATION_HTML = (
+    "<html><body><table class='table'><tbody>"
+    + "".join(
+        f"<tr><td class='system'><a href='/v6/cpu/{idx}'>System {idx}</a>"
+        f"<span class='list-col-model'>Processor {idx} @ 3.0 GHz (8 cores)</span></td>"
+        f"<td class='list-col-text'>Oct 19, 2026</td><td class='list-col-text'>Linux</td>"
+        f"<td class='list-col-text-score'>{1000 + idx}</td>"
+        f"<td class='list-col-text-score'>{5000 + idx}</td></tr>"
+        for idx in range(200)
+    )
+    + "</tbody></table></body></html>"
+)
+
+
+@dataclass
+class ParserCase:
+    name: str
+    fixture: str
+    # Parse the raw page and return JSON-friendly records
+    parse: Callable[[bytes], Any]
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, tuple):
+        return [_to_json_value(x) for x in value]
+    if isinstance(value, list):
+        return [_to_json_value(x) for x in value]
+    if isinstance(value, dict):
+        return {key: _to_json_value(x) for key, x in value.items()}
+    return value
+
+
+PARSER_CASE_LIST = [
+    ParserCase(
+        "parse_result_page",
+        "search_results_page",
+        lambda content: parse_result_page(content),
+    ),
+    ParserCase(
+        "parse_total_pages",
+        "search_results_page",
+        lambda content: parse_total_pages(content),
+    ),
+    ParserCase(
+        "parse_detail_page",
+        "detail_page",
+        lambda content: asdict(parse_detail_page(12479005, content)),
+    ),
+    ParserCase(
+        "parse_latest_results_page",
+        "latest_results_page",
+        lambda content: parse_latest_results_page(content),
+    ),
+    ParserCase(
+        "parse_benchmarks_page",
+        "processor_benchmarks_page",
+        # Models are merged through a set, sorted for a stable order
+        lambda content: sorted(
+            (asdict(x) for x in parse_benchmarks_page(BeautifulSoup(content, "html.parser"))),
+            key=lambda x: x["cpu_model"],
+        ),
+    ),
+    ParserCase(
+        "parse_benchmarks_page_cpu_models",
+        "processor_benchmarks_page",
+        lambda content: sorted(parse_benchmarks_page_cpu_models(BeautifulSoup(content, "html.parser"))),
+    ),
+]
+
+
+def read_fixture(fixture: str) -> bytes:
+    with open(os.path.join(FIXTURE_DIR, f"{fixture}.html"), "rb") as f:
+        return f.read()
+
+
+def get_expected_path(parser_case: ParserCase) -> str:
+    return os.path.join(FIXTURE_DIR, f"{parser_case.fixture}.{parser_case.name}.expected.json")
+
+
+def compare_records(expected: Any, actual: Any) -> str | None:
+    """Return a description of the first difference, or None if equal."""
+    if isinstance(expected, list) and isinstance(actual, list):
+        for idx, (expected_record, actual_record) in enumerate(zip(expected, actual)):
+            if expected_record != actual_record:
+                return f"record {idx}: expected {expected_record!r}, got {actual_record!r}"
+        if len(expected) != len(actual):
+            return f"expected {len(expected)} records, got {len(actual)}"
+        return None
+    if expected != actual:
+        return f"expected {expected!r}, got {actual!r}"
+    return None
+
+
+def get_pages_per_sec(parse: Callable[[], Any], min_seconds: float) -> float:
+    pages = 0
+    start_time = time.perf_counter()
+    while True:
+        parse()
+        pages += 1
+        elapsed_seconds = time.perf_counter() - start_time
+        if elapsed_seconds >= min_seconds:
+            break
+    return pages / elapsed_seconds
+
+
+def parse_calibration_page() -> None:
+    html_parser = HTMLParser()
+    html_parser.feed(CALIBRATION_HTML)
+    html_parser.close()
+
+
+def measure(parser_case: ParserCase, content: bytes, min_seconds: float) -> dict:
+    # Allocations of one parse
+    tracemalloc.start()
+    parser_case.parse(content)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated_blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+
+    # Rounds of the parser and the calibration loop are interleaved so that both see
+    # the same machine state, and the best round of each is kept like `timeit`
+    pages_per_sec = 0.0
+    calibration_pages_per_sec = 0.0
+    for _ in range(TIMING_ROUNDS):
+        calibration_pages_per_sec = max(
+            calibration_pages_per_sec,
+            get_pages_per_sec(parse_calibration_page, min_seconds / TIMING_ROUNDS),
+        )
+        pages_per_sec = max(
+            pages_per_sec,
+            get_pages_per_sec(lambda: parser_case.parse(content), min_seconds / TIMING_ROUNDS),
+        )
+
+    return {
+        "pages_per_sec": pages_per_sec,
+        "relative_speed": pages_per_sec / calibration_pages_per_sec,
+        "peak_kb": peak_bytes / 1024,
+        "allocated_blocks": allocated_blocks,
+    }
+
+
+def record_fixtures() -> None:
+    from utils.core.geekbench.geekbench_http import http_get
+
+    for fixture, url in RECORD_URL_MAP.items():
+        response = http_get(url)
+        with open(os.path.join(FIXTURE_DIR, f"{fixture}.html"), "wb") as f:
+            f.write(response.content)
+        print(f"Recorded {url} to {fixture}.html")
+    print("Review the parsed records, then run with --update-expected.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Minimum timing per parser.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.3, help="Allowed relative speed drop from the baseline.",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--update-expected", action="store_true")
+    parser.add_argument("--record", action="store_true")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures()
+        return
+
+    baseline_map = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r") as f:
+            baseline_map = json.load(f)
+
+    failure_list = []
+    result_map = {}
+    print(
+        f"{'parser':<34} {'records':>8} {'pages/s':>9} {'relative':>9} {'baseline':>9} "
+        f"{'change':>8} {'peak KB':>9} {'blocks':>8}"
+    )
+    for parser_case in PARSER_CASE_LIST:
+        content = read_fixture(parser_case.fixture)
+        actual = _to_json_value(parser_case.parse(content))
+
+        expected_path = get_expected_path(parser_case)
+        if args.update_expected:
+            with open(expected_path, "w") as f:
+                json.dump(actual, f, indent=2, ensure_ascii=False)
+                f.write("\n")
+        with open(expected_path, "r") as f:
+            difference = compare_records(json.load(f), actual)
+        if difference:
+            failure_list.append(f"{parser_case.name}: {difference}")
+
+        result = measure(parser_case, content, args.min_seconds)
+        result_map[parser_case.name] = result
+        baseline_relative_speed = baseline_map.get(parser_case.name, {}).get("relative_speed")
+        change = ""
+        if baseline_relative_speed:
+            ratio = result["relative_speed"] / baseline_relative_speed
+            change = f"{ratio - 1:+.0%}"
+            if not args.update_baseline and ratio < 1 - args.tolerance:
+                failure_list.append(
+                    f"{parser_case.name}: relative speed {result['relative_speed']:.4f}, "
+                    f"baseline {baseline_relative_speed:.4f}"
+                )
+        print(
+            f"{parser_case.name:<34} {len(actual) if isinstance(actual, list) else 1:>8} "
+            f"{result['pages_per_sec']:>9.1f} {result['relative_speed']:>9.4f} "
+            f"{baseline_relative_speed or float('nan'):>9.4f} {change:>8} "
+            f"{result['peak_kb']:>9.1f} {result['allocated_blocks']:>8}"
+        )
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(result_map, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+    if failure_list:
+        print("\nFAILED:")
+        for failure in failure_list:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll parsers match the expected records.")
+
+
+if __name__ == "__main__":
+    main()
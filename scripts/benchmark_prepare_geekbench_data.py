@@ -0,0 +1,105 @@
+"""
+Benchmark normalization of detail records before loading to `cpu_model_details`.
+
+Implementations:
+    - rowwise:      `prepare_geekbench_data_rowwise` (per-row dict copies and
+                    one `pd.to_datetime` call per record)
+    - columnar:     `prepare_geekbench_data` (vectorized string ops and one
+                    explicit-format `to_datetime` call per batch)
+
+Records are synthetic, shaped like the output of `e_fetch_geekbench_processor_details`.
+The output of each implementation is compared with the row-wise one.
+
+Usage:
+    python scripts/benchmark_prepare_geekbench_data.py [--records 10000] [--runs 3]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add src to path to allow imports from flows
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), "src")
+sys.path.append(src_path)
+
+from flows.sync_cpu_model_detail_to_bq_flow import (
+    prepare_geekbench_data,
+    prepare_geekbench_data_rowwise,
+)
+
+IMPLEMENTATION_MAP = {
+    "rowwise": prepare_geekbench_data_rowwise,
+    "columnar": prepare_geekbench_data,
+}
+
+WORKLOAD_LIST = [
+    "File Compression", "Navigation", "HTML5 Browser", "PDF Renderer",
+    "Photo Library", "Clang", "Text Processing", "Asset Compression",
+    "Object Detection", "Background Blur", "Horizon Detection", "Object Remover",
+    "HDR", "Photo Filter", "Ray Tracer", "Structure from Motion",
+]
+
+
+def build_records(record_count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    base_date = datetime(2025, 1, 1)
+    record_list = []
+    for i in range(record_count):
+        uploaded = base_date + timedelta(minutes=rng.randrange(0, 500_000))
+        single_core_score = rng.randrange(500, 4_000)
+        record_list.append(
+            {
+                "cpu_result_id": 10_000_000 + i,
+                "title": f"Synthetic System {i % 97}",
+                "upload_date": uploaded.strftime("%B %d %Y %I:%M %p"),
+                "views": f"{rng.randrange(1, 5_000):,}",
+                "cpu_codename": rng.choice(["Raptor Lake", "Zen 4", None]),
+                "single_core_score": f"{single_core_score:,}",
+                "multi_core_score": f"{single_core_score * rng.randrange(4, 16):,}",
+                "system_info": {"Operating System": "Linux", "Model": f"Model {i % 13}"},
+                "cpu_info": {"Name": "Synthetic CPU", "Topology": "1 Processor, 8 Cores"},
+                "memory_info": {"Size": "32.00 GB", "Type": "DDR5"},
+                "single_core_benchmarks": {
+                    workload: {"score": f"{rng.randrange(500, 4_000):,}", "description": "x"}
+                    for workload in WORKLOAD_LIST
+                },
+                "multi_core_benchmarks": {
+                    workload: {"score": f"{rng.randrange(2_000, 40_000):,}", "description": "x"}
+                    for workload in WORKLOAD_LIST
+                },
+                "cpu_model_id": rng.randrange(1, 3_000),
+            }
+        )
+    return record_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    record_list = build_records(args.records)
+    expected = prepare_geekbench_data_rowwise(record_list)
+
+    print(f"{'implementation':<16} {'records':>8} {'median s':>10} {'records/s':>12} {'matches':>8}")
+    for name, prepare_func in IMPLEMENTATION_MAP.items():
+        elapsed_list = []
+        for _ in range(args.runs):
+            start_time = time.perf_counter()
+            result = prepare_func(record_list)
+            elapsed_list.append(time.perf_counter() - start_time)
+        elapsed_seconds = statistics.median(elapsed_list)
+        print(
+            f"{name:<16} {len(record_list):>8} {elapsed_seconds:>10.3f} "
+            f"{len(record_list) / elapsed_seconds:>12.0f} {str(result == expected):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
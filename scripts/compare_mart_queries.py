@@ -0,0 +1,124 @@
+"""
+Compare bytes processed and slot time of score mart queries on BigQuery.
+
+Queries:
+    - stats:        `mart_score_report_from_stats.sql`, the query run in production
+                    by `BigQueryBackend.get_score_report_df()`. It reads
+                    `cpu_model_score_stats`, which is refreshed first as the
+                    report flow does (skip with `--no-refresh-stats`).
+    - single_pass:  `mart_average_score_and_benchmark_score.sql`, the exact
+                    report over `cpu_model_results` (DuckDB runs its `duckdb_sql`)
+    - legacy:       `mart_average_score_and_benchmark_score.legacy_sql`
+                    (two row_number() windows for the trimmed mean)
+
+Each query runs with cache disabled. Results of the other queries are compared
+with the first one column by column. By default the production query is
+compared with the exact one, medians of the stats differ within the error of
+KLL sketches.
+
+Usage:
+    python scripts/compare_mart_queries.py [--runs 3] [--queries single_pass stats legacy]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add src to path to allow imports from utils
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), "src")
+sys.path.append(src_path)
+
+from google.cloud import bigquery
+
+from utils.core.bigquery_helper import get_bq_client, refresh_cpu_model_score_stats
+from utils.core.sql import mart_average_score_and_benchmark_score, mart_score_report_from_stats
+
+QUERY_MAP = {
+    "stats": mart_score_report_from_stats.sql,
+    "single_pass": mart_average_score_and_benchmark_score.sql,
+    "legacy": mart_average_score_and_benchmark_score.legacy_sql,
+}
+
+
+def run_query(client: bigquery.Client, sql: str) -> dict:
+    start_time = time.time()
+    job = client.query(sql, job_config=bigquery.QueryJobConfig(use_query_cache=False))
+    df = job.to_dataframe()
+    return {
+        "elapsed_seconds": time.time() - start_time,
+        "total_bytes_processed": job.total_bytes_processed or 0,
+        "total_bytes_billed": job.total_bytes_billed or 0,
+        "slot_millis": job.slot_millis or 0,
+        "df": df,
+    }
+
+
+def compare_df(base_df, df, key: str = "cpu_model") -> dict[str, int]:
+    """Return the number of rows whose value differs from `base_df`, by column."""
+    merged_df = base_df.merge(df, on=key, how="outer", suffixes=("_base", ""))
+    diff_count_map = {}
+    for column in base_df.columns:
+        if column == key:
+            continue
+        base_series = merged_df[f"{column}_base"].astype(str)
+        series = merged_df[column].astype(str)
+        diff_count_map[column] = int((base_series != series).sum())
+    return diff_count_map
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--queries", nargs="+", choices=list(QUERY_MAP), default=["single_pass", "stats"],
+    )
+    parser.add_argument(
+        "--no-refresh-stats", action="store_true", help="Read `cpu_model_score_stats` as is.",
+    )
+    args = parser.parse_args()
+
+    if "stats" in args.queries and not args.no_refresh_stats:
+        refresh_cpu_model_score_stats()
+
+    client = get_bq_client()
+    result_map = {}
+    for query_name in args.queries:
+        sql = QUERY_MAP[query_name]
+        dry_run_job = client.query(
+            sql, job_config=bigquery.QueryJobConfig(dry_run=True, use_query_cache=False),
+        )
+        run_list = [run_query(client, sql) for _ in range(args.runs)]
+        result_map[query_name] = {
+            "dry_run_bytes": dry_run_job.total_bytes_processed,
+            "bytes_billed": run_list[-1]["total_bytes_billed"],
+            "slot_millis": statistics.median(r["slot_millis"] for r in run_list),
+            "elapsed_seconds": statistics.median(r["elapsed_seconds"] for r in run_list),
+            "rows": len(run_list[-1]["df"]),
+            "df": run_list[-1]["df"],
+        }
+
+    print(
+        f"{'query':<12} {'dry-run MB':>12} {'billed MB':>12} {'slot ms':>10} "
+        f"{'elapsed s':>10} {'rows':>8}"
+    )
+    for query_name, result in result_map.items():
+        print(
+            f"{query_name:<12} {result['dry_run_bytes'] / 1e6:>12.1f} "
+            f"{result['bytes_billed'] / 1e6:>12.1f} {result['slot_millis']:>10.0f} "
+            f"{result['elapsed_seconds']:>10.2f} {result['rows']:>8}"
+        )
+
+    base_query_name = args.queries[0]
+    for query_name in args.queries[1:]:
+        diff_count_map = compare_df(result_map[base_query_name]["df"], result_map[query_name]["df"])
+        diff_summary = ", ".join(
+            f"{column}: {count}" for column, count in diff_count_map.items() if count
+        )
+        print(f"Rows differing from {base_query_name} in {query_name}: {diff_summary or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
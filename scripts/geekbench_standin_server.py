@@ -0,0 +1,387 @@
+"""
+Local stand-in of Geekbench Browser, to load-test the scrapers and flows.
+
+Serves synthetic pages built from the templates of the recorded corpus in
+`scripts/fixtures/geekbench/`:
+    - /search?q=&page=          search results of a CPU model
+    - /v6/cpu?page=             latest results
+    - /v6/cpu/{cpu_result_id}   result detail
+    - /processor-benchmarks     processor benchmarks
+    - /__stats                  requests served by route and status (JSON)
+
+The first entry of each list in a fixture is the template of every entry, so
+pages keep the markup of the recorded ones while the data volume is set by
+options. Content is derived from a hash of the request, so the same URL always
+returns the same page.
+
+Latency, server errors (500) and throttling (429 with `Retry-After` when over
+`--max-rps`) are configurable. Point the scrapers and flows at it with
+`GEEKBENCH_BROWSER_BASE_URL`:
+
+    python scripts/geekbench_standin_server.py --port 8010 --latency-ms 80 --max-rps 50
+    GEEKBENCH_BROWSER_BASE_URL=http://127.0.0.1:8010 python src/flows/sync_cpu_model_result_to_bq_flow.py
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import random
+import re
+import signal
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote_plus, urlparse
+
+from bs4 import BeautifulSoup
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(current_dir, "fixtures", "geekbench")
+
+ENTRIES_PER_PAGE = 25
+
+PLACEHOLDER_PATTERN = re.compile(r"@@(\w+)@@")
+
+PLATFORM_LIST = ["Windows", "Linux", "macOS", "Android"]
+SYSTEM_LIST = [
+    "ASUS System Product Name",
+    "Micro-Star International Co., Ltd. MS-7E12",
+    "Gigabyte Technology Co., Ltd. B650 AORUS ELITE AX",
+    "LENOVO 21K5CTO1WW",
+    "Dell Inc. XPS 15 9530",
+]
+VENDOR_LIST = ["AMD Ryzen 9", "AMD Ryzen 7", "Intel Core i9", "Intel Core i7", "Intel Core Ultra 7"]
+
+
+def render(template: str, value_map: dict) -> str:
+    return PLACEHOLDER_PATTERN.sub(lambda m: str(value_map[m.group(1)]), template)
+
+
+def _placeholder(name: str) -> str:
+    return f"@@{name}@@"
+
+
+def _read_fixture_soup(fixture: str) -> BeautifulSoup:
+    with open(os.path.join(FIXTURE_DIR, f"{fixture}.html"), "r", encoding="utf-8") as f:
+        return BeautifulSoup(f.read(), "html.parser")
+
+
+def _replace_children(element, placeholder: str) -> None:
+    element.clear()
+    element.append(placeholder)
+
+
+def _build_list_page_templates(fixture: str) -> tuple[str, str]:
+    """Return (page, entry) templates of a search or latest results page."""
+    soup = _read_fixture_soup(fixture)
+    entry_list = soup.select("div.list-col")
+    entry = copy.copy(entry_list[0])
+    entry.select_one("a")["href"] = f"/v6/cpu/{_placeholder('cpu_result_id')}"
+    entry.select_one("a").string = _placeholder("system")
+    entry.select_one("span.list-col-model").string = (
+        f"\n{_placeholder('cpu_model')}\n{_placeholder('frequency')}\n({_placeholder('cores')} cores)\n"
+    )
+    uploaded_span, platform_span = entry.select("span.list-col-text")
+    uploaded_span.string = f"\n{_placeholder('uploaded')}\n"
+    platform_span.string = f"\n{_placeholder('platform')}\n"
+    single_core_span, multi_core_span = entry.select("span.list-col-text-score")
+    single_core_span.string = f"\n{_placeholder('single_core_score')}\n"
+    multi_core_span.string = f"\n{_placeholder('multi_core_score')}\n"
+
+    container = entry_list[0].parent
+    _replace_children(container, _placeholder("entries"))
+    pagination = soup.select_one("ul.pagination")
+    if pagination:
+        _replace_children(pagination, _placeholder("pagination"))
+    return str(soup), str(entry)
+
+
+def _build_detail_template() -> str:
+    soup = _read_fixture_soup("detail_page")
+    soup.title.string = f"{_placeholder('system')} - Geekbench"
+    soup.select_one("div.page-header h1").string = _placeholder("system")
+    single_core_div, multi_core_div = soup.select("div.score-container .score")
+    single_core_div.string = _placeholder("single_core_score")
+    multi_core_div.string = _placeholder("multi_core_score")
+    for label, name in [
+        ("Upload Date", "upload_date"),
+        ("Views", "views"),
+        ("Model", "system"),
+        ("Name", "cpu_model"),
+    ]:
+        key_cell = soup.find("td", class_="system-name", string=label)
+        if key_cell:
+            key_cell.find_next_sibling("td").string = _placeholder(name)
+    return str(soup)
+
+
+def _build_benchmarks_templates() -> tuple[str, str]:
+    """Return (page, row) templates of the processor-benchmarks page."""
+    soup = _read_fixture_soup("processor_benchmarks_page")
+    tbody_list = soup.select("table tbody")
+    row = copy.copy(tbody_list[0].select_one("tr"))
+    row.select_one("td.name a")["href"] = f"/processors/{_placeholder('slug')}"
+    row.select_one("td.name a").string = _placeholder("cpu_model")
+    row.select_one("td.name .description").string = (
+        f"{_placeholder('frequency')} ({_placeholder('cores')} cores)"
+    )
+    row.select_one("td.score").string = _placeholder("score")
+    for tbody, name in zip(tbody_list, ["single_core_rows", "multi_core_rows"]):
+        _replace_children(tbody, _placeholder(name))
+    return str(soup), str(row)
+
+
+class RateLimiter:
+    """Token bucket of `max_rps` requests per second, unlimited if None."""
+
+    def __init__(self, max_rps: float | None):
+        self.max_rps = max_rps
+        self._tokens = max_rps or 0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if not self.max_rps:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rps, self._tokens + (now - self._updated_at) * self.max_rps)
+            self._updated_at = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class StandinSite:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.search_page_template, self.search_entry_template = _build_list_page_templates(
+            "search_results_page",
+        )
+        self.latest_page_template, self.latest_entry_template = _build_list_page_templates(
+            "latest_results_page",
+        )
+        self.detail_template = _build_detail_template()
+        self.benchmarks_page_template, self.benchmarks_row_template = _build_benchmarks_templates()
+        self.cpu_model_list = [
+            f"{VENDOR_LIST[i % len(VENDOR_LIST)]} S{1000 + i}" for i in range(args.cpu_models)
+        ]
+        self.latest_cpu_result_id = args.latest_cpu_result_id
+
+    def _rng(self, *key) -> random.Random:
+        seed = hashlib.blake2b(repr((self.args.seed, *key)).encode("utf-8"), digest_size=8).digest()
+        return random.Random(int.from_bytes(seed, "big"))
+
+    def _entry_values(self, rng: random.Random, cpu_result_id: int, cpu_model: str) -> dict:
+        uploaded = datetime(2025, 1, 1) + timedelta(days=rng.randrange(0, 365))
+        single_core_score = rng.randrange(800, 3_500)
+        return {
+            "cpu_result_id": cpu_result_id,
+            "system": rng.choice(SYSTEM_LIST),
+            "cpu_model": cpu_model,
+            "frequency": f"{rng.choice([3200, 3700, 4300, 4700])} MHz",
+            "cores": rng.choice([6, 8, 12, 16, 24]),
+            "uploaded": uploaded.strftime("%b %d, %Y").replace(" 0", " "),
+            "platform": rng.choice(PLATFORM_LIST),
+            "single_core_score": single_core_score,
+            "multi_core_score": single_core_score * rng.randrange(4, 14),
+        }
+
+    def _pagination(self, query: str, total_pages: int) -> str:
+        page_list = sorted({*range(1, min(total_pages, 10) + 1), max(total_pages - 1, 1), total_pages})
+        return "".join(
+            f'<li class="page-item"><a class="page-link" href="/search?page={page}&amp;q={query}">{page}</a></li>'
+            for page in page_list
+        )
+
+    def search_page(self, cpu_model: str, page: int) -> str:
+        total_pages = max(1, -(-self.args.results_per_model // ENTRIES_PER_PAGE))
+        entry_list = []
+        if page <= total_pages:
+            # Result IDs of a model are spread over the latest IDs, newest first
+            model_rng = self._rng("model", cpu_model)
+            first_cpu_result_id = self.latest_cpu_result_id - model_rng.randrange(0, 1_000)
+            stride = model_rng.randrange(20, 60)
+            start = (page - 1) * ENTRIES_PER_PAGE
+            for i in range(start, min(start + ENTRIES_PER_PAGE, self.args.results_per_model)):
+                cpu_result_id = first_cpu_result_id - i * stride
+                entry_list.append(
+                    render(
+                        self.search_entry_template,
+                        self._entry_values(self._rng("result", cpu_result_id), cpu_result_id, cpu_model),
+                    )
+                )
+        return render(
+            self.search_page_template,
+            {
+                "entries": "\n".join(entry_list),
+                "pagination": self._pagination(quote_plus(cpu_model), total_pages),
+            },
+        )
+
+    def latest_results_page(self, page: int) -> str:
+        start_cpu_result_id = self.latest_cpu_result_id - (page - 1) * ENTRIES_PER_PAGE
+        entry_list = []
+        for cpu_result_id in range(start_cpu_result_id, start_cpu_result_id - ENTRIES_PER_PAGE, -1):
+            rng = self._rng("result", cpu_result_id)
+            cpu_model = self.cpu_model_list[rng.randrange(len(self.cpu_model_list))]
+            entry_list.append(
+                render(self.latest_entry_template, self._entry_values(rng, cpu_result_id, cpu_model))
+            )
+        return render(self.latest_page_template, {"entries": "\n".join(entry_list), "pagination": ""})
+
+    def detail_page(self, cpu_result_id: int) -> str:
+        rng = self._rng("result", cpu_result_id)
+        cpu_model = self.cpu_model_list[rng.randrange(len(self.cpu_model_list))]
+        value_map = self._entry_values(rng, cpu_result_id, cpu_model)
+        upload_date = datetime(2025, 1, 1) + timedelta(minutes=rng.randrange(0, 525_600))
+        value_map.update(
+            {
+                "single_core_score": f"{value_map['single_core_score']:,}",
+                "multi_core_score": f"{value_map['multi_core_score']:,}",
+                "upload_date": upload_date.strftime("%B %d %Y %I:%M %p"),
+                "views": f"{rng.randrange(1, 5_000):,}",
+            }
+        )
+        return render(self.detail_template, value_map)
+
+    def benchmarks_page(self) -> str:
+        row_map = {"single_core_rows": [], "multi_core_rows": []}
+        for cpu_model in self.cpu_model_list[: self.args.benchmark_models]:
+            rng = self._rng("benchmark", cpu_model)
+            value_map = {
+                "slug": re.sub(r"[^a-z0-9]+", "-", cpu_model.lower()),
+                "cpu_model": cpu_model,
+                "frequency": f"{rng.choice([3.2, 3.7, 4.3, 4.7])} GHz",
+                "cores": rng.choice([6, 8, 12, 16, 24]),
+            }
+            single_core_score = rng.randrange(800, 3_500)
+            row_map["single_core_rows"].append(
+                render(self.benchmarks_row_template, {**value_map, "score": f"{single_core_score:,}"})
+            )
+            row_map["multi_core_rows"].append(
+                render(
+                    self.benchmarks_row_template,
+                    {**value_map, "score": f"{single_core_score * rng.randrange(4, 14):,}"},
+                )
+            )
+        return render(
+            self.benchmarks_page_template,
+            {name: "\n".join(row_list) for name, row_list in row_map.items()},
+        )
+
+
+class StandinRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Set by `main()`
+    site: StandinSite
+    rate_limiter: RateLimiter
+    stats: Counter
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        if self.site.args.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8", headers=None):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self, path: str, query: dict) -> tuple[str, str | None]:
+        """Return (route, page), page is None if not found."""
+        page = int(query.get("page", ["1"])[0] or 1)
+        if path == "/search":
+            return "search", self.site.search_page(query.get("q", [""])[0], page)
+        if path == "/v6/cpu":
+            return "latest", self.site.latest_results_page(page)
+        if path.startswith("/v6/cpu/") and path.rsplit("/", 1)[-1].isdigit():
+            return "detail", self.site.detail_page(int(path.rsplit("/", 1)[-1]))
+        if path == "/processor-benchmarks":
+            return "benchmarks", self.site.benchmarks_page()
+        return "other", None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/__stats":
+            with self.stats_lock:
+                stats = {f"{route} {status}": count for (route, status), count in sorted(self.stats.items())}
+            self._send(200, json.dumps(stats, indent=2), "application/json")
+            return
+
+        args = self.site.args
+        if args.latency_ms or args.latency_jitter_ms:
+            time.sleep(max(0.0, random.gauss(args.latency_ms, args.latency_jitter_ms)) / 1000)
+
+        route, page = self._route(url.path, parse_qs(url.query))
+        if not self.rate_limiter.allow():
+            status = 429
+            self._send(status, "Too Many Requests", headers={"Retry-After": str(args.retry_after)})
+        elif random.random() < args.error_rate:
+            status = 500
+            self._send(status, "Internal Server Error")
+        elif page is None:
+            status = 404
+            self._send(status, "Not Found")
+        else:
+            status = 200
+            self._send(status, page)
+
+        with self.stats_lock:
+            self.stats[(route, status)] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean latency of each response.")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Standard deviation of latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of responses failing with 500.")
+    parser.add_argument("--max-rps", type=float, default=None, help="Requests/sec above which 429 is returned.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds of a 429 response.")
+    parser.add_argument("--results-per-model", type=int, default=4_000, help="Search results of each CPU model.")
+    parser.add_argument("--cpu-models", type=int, default=2_000, help="CPU models of latest results and details.")
+    parser.add_argument("--benchmark-models", type=int, default=1_000, help="CPU models of the benchmarks page.")
+    parser.add_argument("--latest-cpu-result-id", type=int, default=12_500_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args()
+
+    StandinRequestHandler.site = StandinSite(args)
+    StandinRequestHandler.rate_limiter = RateLimiter(args.max_rps)
+    StandinRequestHandler.stats = Counter()
+
+    server = ThreadingHTTPServer((args.host, args.port), StandinRequestHandler)
+    server.daemon_threads = True
+    # Stop on SIGTERM as on Ctrl+C, to print the summary when run in background
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"Serving Geekbench Browser stand-in on http://{args.host}:{args.port}")
+    start_time = time.time()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    elapsed_seconds = time.time() - start_time
+    total_requests = sum(StandinRequestHandler.stats.values())
+    print(f"\nServed {total_requests} requests in {elapsed_seconds:.1f}s ({total_requests / elapsed_seconds:.1f} req/s)")
+    for (route, status), count in sorted(StandinRequestHandler.stats.items()):
+        print(f"  {route:<12} {status:>4} {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
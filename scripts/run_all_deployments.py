@@ -1,7 +1,13 @@
+"""
+Register every deployment of `src/deployments/`.
 
-import os
-import subprocess
+Scripts run one after another in this process with `runpy`, so Prefect is
+imported once instead of once per script.
+"""
+
+import runpy
 import sys
+import time
 from pathlib import Path
 
 
@@ -14,12 +20,9 @@ def main():
         print(f"Error: Deployments directory not found at {deployments_dir}")
         sys.exit(1)
 
-    # Add src to PYTHONPATH so imports from 'flows' etc. work
+    # Add src to sys.path so imports from 'flows' etc. work
     src_dir = project_root / "src"
-    env = os.environ.copy()
-    # Prepend src to PYTHONPATH
-    current_pythonpath = env.get("PYTHONPATH", "")
-    env["PYTHONPATH"] = f"{src_dir}{os.pathsep}{current_pythonpath}"
+    sys.path.insert(0, str(src_dir))
 
     print(f"Looking for deployment scripts in: {deployments_dir}\n")
     
@@ -33,6 +36,7 @@ def main():
     success_count = 0
     failure_count = 0
     total_count = 0
+    start_time = time.perf_counter()
 
     for script in deployment_scripts:
         # Skip __init__.py if it exists, though typically not run directly
@@ -42,26 +46,25 @@ def main():
         total_count += 1
         print(f"[{total_count}] Running {script.name}...")
         try:
-            # Run the script
-            # We capture output to avoid clutter unless error, or we can let it stream.
+            # Run the script as `__main__` in this process, its output streams as usual.
             # Deployment scripts usually print "Deployment 'xyz' created" or similar.
-            # Let's let it stream to stdout/stderr so user sees progress in real time.
-            subprocess.run(
-                [sys.executable, str(script)],
-                env=env,
-                check=True
-            )
+            runpy.run_path(str(script), run_name="__main__")
             print(f"SUCCESS: {script.name}\n")
             success_count += 1
-        except subprocess.CalledProcessError as e:
-            print(f"FAILURE: {script.name} exited with code {e.returncode}\n")
-            failure_count += 1
+        except SystemExit as e:
+            # sys.exit() of a script must not stop the other deployments
+            if e.code in (None, 0):
+                print(f"SUCCESS: {script.name}\n")
+                success_count += 1
+            else:
+                print(f"FAILURE: {script.name} exited with code {e.code}\n")
+                failure_count += 1
         except Exception as e:
-            print(f"ERROR: Could not run {script.name}: {e}\n")
+            print(f"ERROR: Could not run {script.name}: {e!r}\n")
             failure_count += 1
 
     print("-" * 30)
-    print(f"Finished running {total_count} deployment scripts.")
+    print(f"Finished running {total_count} deployment scripts in {time.perf_counter() - start_time:.1f}s.")
     print(f"Successful: {success_count}")
     print(f"Failed:     {failure_count}")
 
@@ -1,9 +1,8 @@
+from prefect import flow
 from prefect.schedules import Cron
 
-from flows.test_flow import test_flow
-
 if __name__ == "__main__":
-    test_flow.from_source(
+    flow.from_source(
         source="https://github.com/uuboyscy/geekbench_report_automation.git",
         entrypoint="src/flows/test_flow.py:test_flow",
     ).deploy(
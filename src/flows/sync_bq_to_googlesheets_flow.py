@@ -3,13 +3,25 @@
 """
 
 from datetime import datetime, timedelta, timezone
+from typing import Literal
 
 import pandas as pd
 from prefect import flow, task
 
-from utils.core.bigquery_helper import get_score_report_from_df
-from utils.googlesheets_utility import load_dataframe_to_google_sheets_worksheet
+from utils.core.bigquery_helper import (
+    export_tables_to_parquet,
+    get_score_report_from_df,
+    refresh_cpu_model_score_stats,
+)
+from utils.core.local_score_report import (
+    GEEKBENCH_REPORT_PARQUET_MIRROR_DIR,
+    PARQUET_MIRROR_TABLE_COLUMNS,
+    compute_score_report_from_parquet,
+    parquet_mirror_is_fresh,
+)
+from utils.googlesheets_utility import WorksheetPublish, publish_dataframes_to_google_sheets
 from utils.prefect_utility import generate_flow_name
+from utils.profiling_utility import profile_flow
 
 
 @task(log_prints=True)
@@ -17,10 +29,25 @@ def get_update_time_df() -> pd.DataFrame:
     now = datetime.now(timezone(timedelta(hours=8)))
     return pd.DataFrame([{"Last Update": now}])
 
+@task(log_prints=True)
+def t_refresh_cpu_model_score_stats() -> None:
+    refresh_cpu_model_score_stats()
+
 @task(log_prints=True)
 def e_get_score_report_from_df() -> pd.DataFrame:
     return get_score_report_from_df()
 
+@task(log_prints=True)
+def e_refresh_parquet_mirror() -> None:
+    export_tables_to_parquet(
+        table_column_map=PARQUET_MIRROR_TABLE_COLUMNS,
+        output_dir=GEEKBENCH_REPORT_PARQUET_MIRROR_DIR,
+    )
+
+@task(log_prints=True)
+def t_compute_score_report_from_parquet() -> pd.DataFrame:
+    return compute_score_report_from_parquet()
+
 @task(log_prints=True)
 def t_convert_type_to_str(df: pd.DataFrame) -> pd.DataFrame:
     return df.fillna("").astype(str)
@@ -50,38 +77,67 @@ def t_rename_column(df: pd.DataFrame) -> pd.DataFrame:
     )
 
 @task(log_prints=True)
-def l_dataframe_to_google_sheets_worksheet(df: pd.DataFrame, spreadsheet_url: str, worksheet_title: str, start_address: tuple, copy_head: bool) -> None:
-    load_dataframe_to_google_sheets_worksheet(
-        df=df,
+def l_publish_dataframes_to_google_sheets(
+    spreadsheet_url: str,
+    worksheet_publish_list: list[WorksheetPublish],
+    use_snapshot: bool,
+) -> None:
+    publish_dataframes_to_google_sheets(
         spreadsheet_url=spreadsheet_url,
-        worksheet_title=worksheet_title,
-        start_address=start_address,
-        copy_head=copy_head,
+        worksheet_publish_list=worksheet_publish_list,
+        use_snapshot=use_snapshot,
     )
 
 
 @flow(name=generate_flow_name(), log_prints=True)
-def sync_pg_to_googlesheets() -> None:
+@profile_flow
+def sync_pg_to_googlesheets(
+    report_engine: Literal["bigquery", "local"] = "bigquery",
+    refresh_parquet_mirror: bool = False,
+    full_publish: bool = False,
+) -> None:
+    """
+    Publish the score report to Google Sheets.
+
+    With `report_engine="local"`, the report is computed from the Parquet mirror
+    in `GEEKBENCH_REPORT_PARQUET_MIRROR_DIR` instead of BigQuery. The mirror is
+    exported from BigQuery when missing, older than `GEEKBENCH_REPORT_PARQUET_MIRROR_TTL_HOURS`
+    or when `refresh_parquet_mirror` is set.
+
+    Only cells changed since the last publish are written, compared by
+    `Processor name` with a snapshot of the last publish. Set `full_publish`
+    to rewrite every cell, e.g. after the sheet was edited by hand.
+    """
     update_time_df = get_update_time_df()
-    score_report_df = e_get_score_report_from_df()
+    if report_engine == "local":
+        if refresh_parquet_mirror or not parquet_mirror_is_fresh():
+            e_refresh_parquet_mirror()
+        score_report_df = t_compute_score_report_from_parquet()
+    else:
+        t_refresh_cpu_model_score_stats()
+        score_report_df = e_get_score_report_from_df()
 
     score_report_df = t_rename_column(score_report_df)
     score_report_df = t_convert_type_to_str(score_report_df)
 
-    l_dataframe_to_google_sheets_worksheet(
-        df=score_report_df,
-        spreadsheet_url="https://docs.google.com/spreadsheets/d/1z9YaGs9yyJadfDJIoXaODJjOqwwMsHkJaEsLQx3J3Zo",
-        worksheet_title="Score (new)",
-        start_address=(2, 1),
-        copy_head=False,
-    )
-
-    l_dataframe_to_google_sheets_worksheet(
-        df=update_time_df,
+    # Both worksheets are published with one request, the update time once the scores are written
+    l_publish_dataframes_to_google_sheets(
         spreadsheet_url="https://docs.google.com/spreadsheets/d/1z9YaGs9yyJadfDJIoXaODJjOqwwMsHkJaEsLQx3J3Zo",
-        worksheet_title="Data date (new)",
-        start_address=(2, 1),
-        copy_head=False,
+        worksheet_publish_list=[
+            WorksheetPublish(
+                df=score_report_df,
+                worksheet_title="Score (new)",
+                start_address=(2, 1),
+                key_column="Processor name",
+            ),
+            WorksheetPublish(
+                df=update_time_df,
+                worksheet_title="Data date (new)",
+                start_address=(2, 1),
+                publish_last=True,
+            ),
+        ],
+        use_snapshot=not full_publish,
     )
 
 
@@ -18,6 +18,9 @@ Target:
             );
             ```
 
+The hash of the parsed benchmarks is recorded to `scrape_states` after
+loading, and the load is skipped when the benchmarks are unchanged.
+
 Run on Prefect Server.
 """
 
@@ -26,18 +29,34 @@ from dataclasses import asdict
 import pandas as pd
 from prefect import flow, task
 
-from utils.core.bigquery_helper import load_df_to_bq
+from utils.core.bigquery_helper import (
+    get_scrape_state_from_bq,
+    load_df_to_bq,
+    set_scrape_state_to_bq,
+)
 from utils.core.geekbench.geekbench_processor_benchmark_scraper import (
     GeekbenchProcessorBenchmark,
+    get_benchmark_list_hash,
     scrape_page,
 )
 from utils.prefect_utility import generate_flow_name
+from utils.profiling_utility import profile_flow
+
+BENCHMARK_LIST_HASH_STATE_KEY = "processor_benchmarks_page.benchmark_list_hash"
 
 
 @task(log_prints=True)
 def e_scrape_page() -> list[GeekbenchProcessorBenchmark]:
     return scrape_page()
 
+@task(log_prints=True)
+def e_get_loaded_benchmark_list_hash() -> str | None:
+    return get_scrape_state_from_bq(BENCHMARK_LIST_HASH_STATE_KEY)
+
+@task(log_prints=True)
+def t_get_benchmark_list_hash(benchmark_list: list[GeekbenchProcessorBenchmark]) -> str:
+    return get_benchmark_list_hash(benchmark_list)
+
 @task(log_prints=True)
 def t_geekbench_processor_benchmark_to_df(
     benchmark_list: list[GeekbenchProcessorBenchmark],
@@ -52,12 +71,27 @@ def l_load_df_to_bq(df: pd.DataFrame) -> None:
         if_exists="replace",
     )
 
+@task(log_prints=True)
+def l_set_loaded_benchmark_list_hash(benchmark_list_hash: str) -> None:
+    set_scrape_state_to_bq(BENCHMARK_LIST_HASH_STATE_KEY, benchmark_list_hash)
+
 @flow(name=generate_flow_name(), log_prints=True)
-def sync_cpu_model_benchmarks_to_pg() -> None:
-    """Sync CPU model benchmark data to PostgreSQL database."""
+@profile_flow
+def sync_cpu_model_benchmarks_to_pg(force: bool = False) -> None:
+    """
+    Sync CPU model benchmark data to PostgreSQL database.
+
+    :param force:   Load even if the benchmarks are unchanged since the last load.
+    """
     benchmark_list = e_scrape_page()
+    benchmark_list_hash = t_get_benchmark_list_hash(benchmark_list)
+    if not force and benchmark_list_hash == e_get_loaded_benchmark_list_hash():
+        print(f"Benchmarks unchanged ({benchmark_list_hash}), skip loading.")
+        return
+
     df = t_geekbench_processor_benchmark_to_df(benchmark_list)
     l_load_df_to_bq(df)
+    l_set_loaded_benchmark_list_hash(benchmark_list_hash)
 
 
 if __name__ == "__main__":
@@ -79,22 +79,60 @@ CREATE TABLE `geekbench_report.cpu_model_details` (
     >
 );
 ```
+
+With `ingest_mode="long"`, the benchmark STRUCTs are left NULL and each workload
+score is a row of `cpu_model_detail_workload_scores` with a numeric score, so
+per-workload queries scan only the columns they need without casts.
+Workload scores are loaded before the details, as models are selected by
+missing details: if loading the details fails, the next run scrapes the models
+again and skips workload scores of results already loaded.
+
+SQL for creating table `cpu_model_detail_workload_scores` in BigQuery:
+```sql
+CREATE TABLE `geekbench_report.cpu_model_detail_workload_scores` (
+    cpu_result_id INT64,
+    cpu_model_id INT64,
+    core_type STRING,       -- single_core or multi_core
+    workload STRING,        -- e.g. Clang, Ray Tracer
+    score INT64,
+    description STRING
+)
+CLUSTER BY workload, cpu_model_id;
+```
 """
 
 import ast
 import json
+from contextlib import nullcontext
 from dataclasses import asdict
+from datetime import datetime
+from typing import Literal
 
 import pandas as pd
-from google.cloud import bigquery
 from prefect import flow, task
+from prefect.cache_policies import NO_CACHE
 
 from utils.core.bigquery_helper import (
     get_cpu_model_id_and_result_id_for_scraping_details_df,
+    get_cpu_result_id_list_with_workload_scores_from_bq,
     load_df_to_bq,
 )
-from utils.core.geekbench.geekbench_processor_detail_scraper import GeekbenchProcessorDetailScraper
+from utils.core.bigquery_write_stream import BigQueryWriteStream
+from utils.core.geekbench.geekbench_parse_pool import parse_in_pool
+from utils.core.geekbench.geekbench_processor_detail_scraper import (
+    GeekbenchProcessorDetailScraper,
+    parse_detail_page,
+)
+from utils.metrics_utility import publish_metrics, start_metrics_server
 from utils.prefect_utility import generate_flow_name
+from utils.profiling_utility import profile_flow
+
+# Number of detail pages fetched, parsed and appended at a time with the write stream sink
+WRITE_STREAM_CHUNK_SIZE = 50
+
+WORKLOAD_SCORE_TABLE_NAME = "cpu_model_detail_workload_scores"
+
+METRICS_ARTIFACT_KEY = "sync-cpu-model-detail-metrics"
 
 
 def dumps_columns(geekbench_processor_detail_dict: dict) -> dict:
@@ -121,70 +159,118 @@ def e_get_cpu_model_id_and_result_id_for_scraping_details_df() -> pd.DataFrame:
     return df
 
 @task(log_prints=True)
-def e_fetch_geekbench_processor_details(cpu_model_result_id_df: pd.DataFrame) -> list[dict]:
-    geekbench_processor_detail_with_model_id_list = []
+def e_get_cpu_result_id_set_with_workload_scores() -> set[int]:
+    return set(get_cpu_result_id_list_with_workload_scores_from_bq())
+
+def drop_loaded_workload_scores(workload_score_list: list[dict], loaded_cpu_result_id_set: set[int]) -> list[dict]:
+    """Drop workload scores of results loaded by a run that failed to load their details."""
+    return [x for x in workload_score_list if x["cpu_result_id"] not in loaded_cpu_result_id_set]
+
+def fetch_geekbench_processor_detail_pages(cpu_model_result_id_df: pd.DataFrame):
+    """Yield (cpu_result_id, content) of each detail page, downloaded lazily."""
     for idx, row in cpu_model_result_id_df.iterrows():
         cpu_result_id = row["cpu_result_id"]
         cpu_model_id = row["cpu_model_id"]
         print(cpu_model_id, cpu_result_id, idx)
         scraper = GeekbenchProcessorDetailScraper(cpu_result_id)
-        result = scraper.scrape_detail_page()
+        yield scraper.cpu_result_id, scraper.fetch_detail_page()
+
+@task(log_prints=True)
+def e_fetch_geekbench_processor_details(
+    cpu_model_result_id_df: pd.DataFrame,
+    ingest_mode: Literal["struct", "long"] = "struct",
+) -> tuple[list[dict], list[dict]]:
+    """
+    Return details and workload scores of the CPU results.
+
+    Workload scores are only returned with `ingest_mode="long"`, the benchmark
+    STRUCTs of the details are then left empty.
+    """
+    geekbench_processor_detail_with_model_id_list = []
+    workload_score_list = []
+    # Pages are downloaded in this thread and parsed in the parse pool
+    for cpu_model_id, result in zip(
+        cpu_model_result_id_df["cpu_model_id"],
+        parse_in_pool(
+            parse_detail_page,
+            fetch_geekbench_processor_detail_pages(cpu_model_result_id_df),
+        ),
+    ):
         geekbench_processor_detail_dict = asdict(result)
 
         # geekbench_processor_detail_dict = dumps_columns(geekbench_processor_detail_dict)
 
         geekbench_processor_detail_dict["cpu_model_id"] = cpu_model_id
 
+        # Scores are parsed to numbers by the scraper, not a column of cpu_model_details
+        workload_score_dict_list = geekbench_processor_detail_dict.pop("workload_scores")
+        if ingest_mode == "long":
+            geekbench_processor_detail_dict["single_core_benchmarks"] = None
+            geekbench_processor_detail_dict["multi_core_benchmarks"] = None
+            for workload_score_dict in workload_score_dict_list:
+                workload_score_list.append(
+                    {
+                        "cpu_result_id": result.cpu_result_id,
+                        "cpu_model_id": cpu_model_id,
+                        **workload_score_dict,
+                    }
+                )
+
         # print(geekbench_processor_detail_dict)
 
         geekbench_processor_detail_with_model_id_list.append(
             geekbench_processor_detail_dict,
         )
 
-    return geekbench_processor_detail_with_model_id_list
-
-@task(log_prints=True)
-def t_prepare_geekbench_data(geekbench_processor_detail_with_model_id_list: list[dict]) -> list[dict]:
-    processed_list = []
-
-    numeric_columns = [
-        "views",
-        "single_core_score",
-        "multi_core_score",
-        "cpu_result_id",
-        "cpu_model_id",
-    ]
-
-    record_columns = [
-        "system_info",
-        "cpu_info",
-        "memory_info",
-        "single_core_benchmarks",
-        "multi_core_benchmarks",
-    ]
-
-    def parse_to_dict(x):
-        if isinstance(x, dict):
-            return x
-        if x is None:
-            return None
-        if isinstance(x, str):
-            x = x.strip()
-            # Try JSON
-            try:
-                return json.loads(x)
-            except json.JSONDecodeError:
-                pass
-            # Try Python literal (e.g. {'a': 'b'})
-            try:
-                val = ast.literal_eval(x)
-                if isinstance(val, dict):
-                    return val
-            except (ValueError, SyntaxError) as e:
-                print(f"WARNING: Failed to parse string: {x!r}")
-
-        # Fallback
+    return geekbench_processor_detail_with_model_id_list, workload_score_list
+
+NUMERIC_COLUMNS = [
+    "views",
+    "single_core_score",
+    "multi_core_score",
+    "cpu_result_id",
+    "cpu_model_id",
+]
+
+RECORD_COLUMNS = [
+    "system_info",
+    "cpu_info",
+    "memory_info",
+    "single_core_benchmarks",
+    "multi_core_benchmarks",
+]
+
+# Upload Date of detail pages, e.g. "December 14 2025 04:30 AM"
+UPLOAD_DATE_FORMAT = "%B %d %Y %I:%M %p"
+
+def parse_to_dict(x):
+    if isinstance(x, dict):
+        return x
+    if x is None:
         return None
+    if isinstance(x, str):
+        x = x.strip()
+        # Try JSON
+        try:
+            return json.loads(x)
+        except json.JSONDecodeError:
+            pass
+        # Try Python literal (e.g. {'a': 'b'})
+        try:
+            val = ast.literal_eval(x)
+            if isinstance(val, dict):
+                return val
+        except (ValueError, SyntaxError) as e:
+            print(f"WARNING: Failed to parse string: {x!r}")
+
+    # Fallback
+    return None
+
+def prepare_geekbench_data_rowwise(geekbench_processor_detail_with_model_id_list: list[dict]) -> list[dict]:
+    """Row-wise version of `prepare_geekbench_data`, kept as the reference of its benchmark."""
+    processed_list = []
+    numeric_columns = NUMERIC_COLUMNS
+    record_columns = RECORD_COLUMNS
 
     for item in geekbench_processor_detail_with_model_id_list:
         row = item.copy()
@@ -225,12 +311,63 @@ def t_prepare_geekbench_data(geekbench_processor_detail_with_model_id_list: list
 
     return processed_list
 
+def prepare_geekbench_data(geekbench_processor_detail_with_model_id_list: list[dict]) -> list[dict]:
+    """
+    Normalize a batch of details column by column.
+
+    Numerics are cleaned with vectorized string ops, and upload dates are parsed
+    with one `to_datetime` call of `UPLOAD_DATE_FORMAT`. Records are only parsed
+    if they are strings, dicts from the scraper are kept as is.
+    """
+    if not geekbench_processor_detail_with_model_id_list:
+        return []
+
+    df = pd.DataFrame(geekbench_processor_detail_with_model_id_list)
+
+    # 1. Cleaner Numerics
+    for col in NUMERIC_COLUMNS:
+        if col not in df.columns:
+            continue
+        cleaned = df[col].astype("string").str.replace(",", "", regex=False).str.strip()
+        # Only integers, e.g. "1.5" or "N/A" become NULL
+        cleaned = cleaned.where(cleaned.str.fullmatch(r"-?\d+").fillna(False))
+        df[col] = pd.to_numeric(cleaned).astype("Int64")
+
+    # 2. Parse Records
+    for col in RECORD_COLUMNS:
+        if col not in df.columns:
+            continue
+        is_str = df[col].map(lambda x: isinstance(x, str))
+        if is_str.any():
+            df.loc[is_str, col] = df.loc[is_str, col].map(parse_to_dict)
+
+    # 3. Format Date
+    # BQ requires YYYY-MM-DD HH:MM:SS
+    if "upload_date" in df.columns:
+        upload_date = df["upload_date"].astype("string").str.strip().replace("", pd.NA)
+        parsed = pd.to_datetime(upload_date, format=UPLOAD_DATE_FORMAT, errors="coerce")
+        # Fall back to format inference for dates in another format
+        for idx in parsed.index[parsed.isna() & upload_date.notna()]:
+            try:
+                parsed[idx] = pd.to_datetime(upload_date[idx])
+            except Exception as e:
+                print(f"WARNING: Parse date failed: {upload_date[idx]} {e}")
+        df["upload_date"] = parsed.dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+@task(log_prints=True)
+def t_prepare_geekbench_data(geekbench_processor_detail_with_model_id_list: list[dict]) -> list[dict]:
+    return prepare_geekbench_data(geekbench_processor_detail_with_model_id_list)
+
 @task(log_prints=True)
 def l_load_data_to_bq(data: list[dict]) -> None:
     if not data:
         print("No data to load.")
         return
 
+    from google.cloud import bigquery
+
     client = bigquery.Client()
     table_id = "geekbench_report.cpu_model_details" # Using dataset.table format
 
@@ -250,22 +387,96 @@ def l_load_data_to_bq(data: list[dict]) -> None:
             print(f"Errors: {e.errors}")
         raise e
 
+@task(log_prints=True)
+def l_load_workload_scores_to_bq(workload_score_list: list[dict]) -> None:
+    if not workload_score_list:
+        print("No workload scores to load.")
+        return
+
+    load_df_to_bq(
+        df=pd.DataFrame(workload_score_list).astype({"score": "Int64"}),
+        table_name=WORKLOAD_SCORE_TABLE_NAME,
+        if_exists="append",
+    )
+    print(f"Loaded {len(workload_score_list)} rows into {WORKLOAD_SCORE_TABLE_NAME}.")
+
+@task(log_prints=True, cache_policy=NO_CACHE)
+def l_append_data_to_bq_write_stream(data: list[dict], write_stream: BigQueryWriteStream) -> None:
+    if not data:
+        print("No data to append.")
+        return
+
+    row_list = []
+    for item in data:
+        row = item.copy()
+        # Arrow needs datetime objects for DATETIME columns
+        if row.get("upload_date"):
+            row["upload_date"] = datetime.strptime(row["upload_date"], "%Y-%m-%d %H:%M:%S")
+        row_list.append(row)
+
+    write_stream.append_rows(row_list)
+    write_stream.flush()
+    print(f"Appended {len(row_list)} rows to {write_stream.table_name}.")
+
 @flow(name=generate_flow_name(), log_prints=True)
-def sync_cpu_model_detail_to_bq() -> None:
+@profile_flow
+def sync_cpu_model_detail_to_bq(
+    sink: Literal["load_job", "write_stream"] = "load_job",
+    ingest_mode: Literal["struct", "long"] = "struct",
+) -> None:
+    """
+    Sync details of CPU models missing in `cpu_model_details`.
+
+    :param sink:            `load_job` loads every detail with one load job at the end.
+                            `write_stream` fetches, parses and appends details by chunks of
+                            `WRITE_STREAM_CHUNK_SIZE` to one pending stream of the BigQuery
+                            Storage Write API, committed at once when every chunk is appended.
+    :param ingest_mode:     `struct` keeps workload scores as STRING STRUCTs in `cpu_model_details`.
+                            `long` writes them as INT64 rows of `cpu_model_detail_workload_scores`.
+    """
+    start_metrics_server()
     cpu_model_result_id_df = e_get_cpu_model_id_and_result_id_for_scraping_details_df()
+    loaded_cpu_result_id_set = e_get_cpu_result_id_set_with_workload_scores() if ingest_mode == "long" else set()
     print("=====")
 
-    geekbench_processor_detail_with_model_id_list = e_fetch_geekbench_processor_details(
+    if sink == "write_stream":
+        # Streams are committed in reverse order, workload scores first
+        with (
+            BigQueryWriteStream("cpu_model_details", stream_type="PENDING") as write_stream,
+            (
+                BigQueryWriteStream(WORKLOAD_SCORE_TABLE_NAME, stream_type="PENDING")
+                if ingest_mode == "long" else nullcontext()
+            ) as workload_score_write_stream,
+        ):
+            for chunk_start in range(0, len(cpu_model_result_id_df), WRITE_STREAM_CHUNK_SIZE):
+                chunk_df = cpu_model_result_id_df.iloc[chunk_start:chunk_start + WRITE_STREAM_CHUNK_SIZE]
+                detail_list, workload_score_list = e_fetch_geekbench_processor_details(chunk_df, ingest_mode)
+                processed_data = t_prepare_geekbench_data(detail_list)
+                l_append_data_to_bq_write_stream(processed_data, write_stream)
+                if workload_score_write_stream is not None:
+                    l_append_data_to_bq_write_stream(
+                        drop_loaded_workload_scores(workload_score_list, loaded_cpu_result_id_set),
+                        workload_score_write_stream,
+                    )
+        publish_metrics(METRICS_ARTIFACT_KEY)
+        return
+
+    geekbench_processor_detail_with_model_id_list, workload_score_list = e_fetch_geekbench_processor_details(
         cpu_model_result_id_df,
+        ingest_mode,
     )
 
     processed_data = t_prepare_geekbench_data(
         geekbench_processor_detail_with_model_id_list,
     )
 
+    # Details are loaded last, so models are scraped again until both loads succeeded
+    if ingest_mode == "long":
+        l_load_workload_scores_to_bq(drop_loaded_workload_scores(workload_score_list, loaded_cpu_result_id_set))
     l_load_data_to_bq(
         processed_data,
     )
+    publish_metrics(METRICS_ARTIFACT_KEY)
 
 
 if __name__ == "__main__":
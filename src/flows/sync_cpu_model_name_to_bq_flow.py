@@ -8,30 +8,67 @@ CREATE TABLE `geekbench_report.cpu_model_names` (
     cpu_model STRING
 );
 ```
+
+The newest `cpu_result_id` seen on the latest results pages is recorded to
+`scrape_states` under `LATEST_CPU_RESULT_ID_STATE_KEY`, so the next run only
+fetches pages newer than it.
 """
 
 from prefect import flow, task
 
-from utils.core.bigquery_helper import update_cpu_model_names
+from utils.core.bigquery_helper import (
+    get_cpu_model_name_list_from_bq,
+    get_scrape_state_from_bq,
+    set_scrape_state_to_bq,
+    update_cpu_model_names,
+)
 from utils.core.geekbench.geekbench_processor_name_scraper import GeekbenchProcessorNameScraper
+from utils.metrics_utility import publish_metrics, start_metrics_server
 from utils.prefect_utility import generate_flow_name
+from utils.profiling_utility import profile_flow
+
+LATEST_CPU_RESULT_ID_STATE_KEY = "latest_results_page.latest_cpu_result_id"
+
 
+@task(log_prints=True)
+def e_get_last_seen_cpu_result_id() -> int | None:
+    state_value = get_scrape_state_from_bq(LATEST_CPU_RESULT_ID_STATE_KEY)
+    print(f"Last seen cpu_result_id: {state_value}")
+    return int(state_value) if state_value else None
 
 @task(log_prints=True)
-def e_fetch_all_cpu_model_names() -> list[str]:
+def e_fetch_new_cpu_model_names(last_seen_cpu_result_id: int | None) -> tuple[list[str], int | None]:
+    """Return new CPU model names and the newest cpu_result_id seen."""
     scraper = GeekbenchProcessorNameScraper()
-    all_cpu_model_list = scraper.scrape_all_cpu_models()
-    return all_cpu_model_list
+    new_cpu_model_list = scraper.scrape_new_cpu_models(
+        last_seen_cpu_result_id,
+        known_cpu_model_set=set(get_cpu_model_name_list_from_bq()),
+    )
+    print(f"Found {len(new_cpu_model_list)} new CPU models")
+    return new_cpu_model_list, scraper.latest_cpu_result_id
   
 @task(log_prints=True)
 def l_update_cpu_model_names(check_update_list: list[str]) -> None:
     update_cpu_model_names(check_update_list)
 
+@task(log_prints=True)
+def l_set_last_seen_cpu_result_id(cpu_result_id: int | None) -> None:
+    if cpu_result_id is None:
+        return
+    set_scrape_state_to_bq(LATEST_CPU_RESULT_ID_STATE_KEY, str(cpu_result_id))
+
 @flow(name=generate_flow_name(), log_prints=True)
+@profile_flow
 def sync_cpu_model_names_to_bq() -> None:
     """Sync CPU model names to BigQuery."""
-    all_cpu_model_list = e_fetch_all_cpu_model_names()
-    l_update_cpu_model_names(all_cpu_model_list)
+    start_metrics_server()
+    last_seen_cpu_result_id = e_get_last_seen_cpu_result_id()
+    new_cpu_model_list, latest_cpu_result_id = e_fetch_new_cpu_model_names(
+        last_seen_cpu_result_id,
+    )
+    l_update_cpu_model_names(new_cpu_model_list)
+    l_set_last_seen_cpu_result_id(latest_cpu_result_id)
+    publish_metrics("sync-cpu-model-name-metrics")
 
 
 if __name__ == "__main__":
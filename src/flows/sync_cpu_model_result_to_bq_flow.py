@@ -17,24 +17,74 @@ CREATE TABLE `geekbench_report.cpu_model_results` (
 ```
 """
 
+import json
 import os
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from typing import Literal
 
 import pandas as pd
 from prefect import flow
 
 from utils.core.bigquery_helper import (
     delete_duplicated_cpu_model_result_from_bq,
+    get_cpu_model_crawl_plan_df_from_bq,
+    get_cpu_model_crawl_run_df_from_bq,
     get_cpu_model_map_from_bq,
-    get_last_updated_dates_of_cpu_model_df,
+    get_cpu_model_upload_velocity_df,
     get_system_map_from_bq,
     load_df_to_bq,
+    refresh_cpu_model_daily_score_sketches,
     update_cpu_model_names,
     update_system_names,
 )
+from utils.core.bigquery_job_manager import get_job_manager
+from utils.core.bigquery_write_stream import BigQueryWriteStream
+from utils.core.cpu_model_crawl_budget import (
+    apply_crawl_budget,
+    build_crawl_run_record,
+    estimate_crawl_requests,
+    get_request_correction,
+    get_seconds_per_request,
+    summarize_crawl_budget,
+)
+from utils.core.cpu_model_crawl_scheduler import (
+    build_crawl_plan,
+    get_upload_velocity_window_start,
+    mark_crawled,
+    summarize_crawl_plan,
+)
 from utils.core.geekbench.geekbench_processor_result_scraper import GeekbenchProcessorResultScraper
+from utils.core.result_landing_zone import (
+    new_run_id,
+    publish_staged_results,
+    read_staged_results,
+    stage_results,
+)
+from utils.metrics_utility import (
+    CPU_MODEL_PAGES,
+    CPU_MODEL_ROWS,
+    CPU_MODELS_PROCESSED,
+    FLUSH_DURATION,
+    FLUSH_ROWS,
+    publish_metrics,
+    start_metrics_server,
+    write_metrics_textfile,
+)
 from utils.prefect_utility import generate_flow_name
+from utils.profiling_utility import profile_flow
 
 OFFSET_FILE_PATH = "/tmp/sync_cpu_model_result_offset.txt"
+RUN_ID_FILE_PATH = "/tmp/sync_cpu_model_result_run_id.txt"
+CRAWL_PROGRESS_FILE_PATH = "/tmp/sync_cpu_model_result_crawl_progress.json"
+
+# Number of CPU models scraped between two flushes of each sink
+FLUSH_MODELS_MAP = {
+    "landing_zone": 250,
+    "write_stream": 10,
+}
 
 
 def write_offset(offset_idx: int) -> None:
@@ -66,71 +116,380 @@ def delete_offset_file() -> None:
         os.remove(OFFSET_FILE_PATH)
 
 
+def get_run_id() -> str:
+    """
+    Return the run ID of the landing zone staging area.
+
+    A run resumed from an offset keeps the run ID, so rows staged before are loaded too.
+    """
+    if os.path.exists(RUN_ID_FILE_PATH):
+        with open(RUN_ID_FILE_PATH, "r") as f:
+            run_id = f.read().strip()
+        if run_id:
+            return run_id
+
+    run_id = new_run_id()
+    with open(RUN_ID_FILE_PATH, "w") as f:
+        f.write(run_id)
+    return run_id
+
+
+def delete_run_id_file() -> None:
+    """
+    Delete the run ID file if it exists.
+    """
+    if os.path.exists(RUN_ID_FILE_PATH):
+        os.remove(RUN_ID_FILE_PATH)
+
+
+def write_crawl_progress(
+    crawled_cpu_model_list: list[str],
+    total_pages_map: dict[str, int],
+    actual_requests: int,
+    actual_rows: int,
+    elapsed_seconds: float,
+) -> None:
+    """
+    Write the crawl progress of the flushed CPU models to a local file.
+    """
+    with open(CRAWL_PROGRESS_FILE_PATH, "w") as f:
+        json.dump(
+            {
+                "crawled_cpu_model_list": crawled_cpu_model_list,
+                "total_pages_map": total_pages_map,
+                "actual_requests": actual_requests,
+                "actual_rows": actual_rows,
+                "elapsed_seconds": elapsed_seconds,
+            },
+            f,
+        )
+
+
+def get_crawl_progress() -> dict:
+    """
+    Read the crawl progress from the local file.
+
+    A run resumed from an offset keeps the progress, so CPU models crawled before
+    are marked as crawled and counted in the crawl run record too.
+    If the file does not exist, return an empty progress.
+    """
+    progress = {
+        "crawled_cpu_model_list": [],
+        "total_pages_map": {},
+        "actual_requests": 0,
+        "actual_rows": 0,
+        "elapsed_seconds": 0.0,
+    }
+    if not os.path.exists(CRAWL_PROGRESS_FILE_PATH):
+        return progress
+    with open(CRAWL_PROGRESS_FILE_PATH, "r") as f:
+        try:
+            progress.update(json.load(f))
+        except Exception:
+            pass
+    return progress
+
+
+def delete_crawl_progress_file() -> None:
+    """
+    Delete the crawl progress file if it exists.
+    """
+    if os.path.exists(CRAWL_PROGRESS_FILE_PATH):
+        os.remove(CRAWL_PROGRESS_FILE_PATH)
+
+
+def get_sketch_refresh_range_list(df: pd.DataFrame) -> list[tuple[int, date]]:
+    """
+    Return the earliest uploaded date of each CPU model in `df`.
+
+    Models whose results in `df` all lack an upload date only have their NULL-date sketch rebuilt.
+    """
+    from_uploaded_series = (
+        df.dropna(subset=["cpu_model_id"])
+        .groupby("cpu_model_id")["uploaded"]
+        .min()
+    )
+    return [
+        (int(cpu_model_id), pd.Timestamp(from_uploaded).date() if pd.notna(from_uploaded) else date.max)
+        for cpu_model_id, from_uploaded in from_uploaded_series.items()
+    ]
+
+
+def load_cpu_model_results(df: pd.DataFrame) -> Future | None:
+    """
+    Append results, remove duplicates, then rebuild daily sketches of the loaded days.
+
+    Results are final once deduplicated, so the sketch refresh is returned as a
+    future and runs along with the next jobs of the flow.
+    """
+    load_df_to_bq(
+        df=df,
+        table_name="cpu_model_results",
+        if_exists="append",
+    )
+    delete_duplicated_cpu_model_result_from_bq()
+    return refresh_cpu_model_daily_score_sketches(get_sketch_refresh_range_list(df), wait=False)
+
+
+def flush_results(df: pd.DataFrame, run_id: str, write_stream: BigQueryWriteStream | None = None) -> None:
+    """
+    Stage results to the landing zone, and append them to `write_stream` if given.
+
+    Rows appended to the committed write stream are in BigQuery once acknowledged,
+    staged rows are still kept for the landing zone history.
+    """
+    sink = "landing_zone" if write_stream is None else "write_stream"
+    start_time = time.perf_counter()
+    stage_results(df, run_id)
+    if write_stream is not None:
+        write_stream.append_df(df)
+        write_stream.flush()
+    FLUSH_DURATION.labels(sink).observe(time.perf_counter() - start_time)
+    FLUSH_ROWS.labels(sink).observe(len(df))
+    # Metrics of a long run are visible while it goes
+    write_metrics_textfile()
+
+
+def load_staged_results(
+    run_id: str,
+    sink: Literal["landing_zone", "write_stream"] = "landing_zone",
+) -> Future | None:
+    """
+    Bulk load every row staged by the run at once, then publish them to the landing zone history.
+
+    With the `write_stream` sink, rows are already appended, so only duplicates
+    are removed and daily sketches of the staged days are rebuilt.
+
+    Returns the future of the sketch refresh, which runs while rows are published.
+    """
+    table = read_staged_results(run_id)
+    sketch_future = None
+    if sink == "write_stream":
+        if table.num_rows > 0:
+            delete_duplicated_cpu_model_result_from_bq()
+            sketch_future = refresh_cpu_model_daily_score_sketches(
+                get_sketch_refresh_range_list(table.to_pandas()), wait=False,
+            )
+    elif table.num_rows > 0:
+        sketch_future = load_cpu_model_results(table.to_pandas())
+    publish_staged_results(run_id, table)
+    return sketch_future
+
+
+def get_crawl_plan_df(
+    offset_idx: int,
+    full_refresh: bool,
+    crawl_run_df: pd.DataFrame,
+    max_requests: int | None,
+    max_runtime_minutes: float | None,
+) -> pd.DataFrame:
+    """
+    Build and persist the crawl plan of this run.
+
+    When resuming from an offset, reuse the persisted plan so that the offset
+    still points to the same CPU model.
+    """
+    if offset_idx > 0:
+        plan_df = get_cpu_model_crawl_plan_df_from_bq()
+        if len(plan_df) > 0:
+            return plan_df.sort_values("crawl_priority").reset_index(drop=True)
+
+    now = datetime.now()
+    plan_df = build_crawl_plan(
+        upload_velocity_df=get_cpu_model_upload_velocity_df(
+            get_upload_velocity_window_start(now),
+        ),
+        previous_plan_df=get_cpu_model_crawl_plan_df_from_bq(),
+        now=now,
+        full_refresh=full_refresh,
+    )
+    plan_df = estimate_crawl_requests(
+        plan_df,
+        now=now,
+        request_correction=get_request_correction(crawl_run_df),
+    )
+    plan_df = apply_crawl_budget(
+        plan_df,
+        seconds_per_request=get_seconds_per_request(crawl_run_df),
+        max_requests=max_requests,
+        max_runtime_minutes=max_runtime_minutes,
+    )
+    load_df_to_bq(
+        df=plan_df,
+        table_name="cpu_model_crawl_plans",
+        if_exists="replace",
+    )
+    return plan_df
+
+
 @flow(name=generate_flow_name(), log_prints=True)
-def sync_cpu_model_result_to_bq() -> None:
+@profile_flow
+def sync_cpu_model_result_to_bq(
+    full_refresh: bool = False,
+    max_requests: int | None = None,
+    max_runtime_minutes: float | None = None,
+    sink: Literal["landing_zone", "write_stream"] = "landing_zone",
+) -> None:
+    """
+    Sync results of CPU models which are due in the crawl plan.
 
+    :param full_refresh:            Crawl every CPU model no matter its refresh interval.
+    :param max_requests:            Cap of estimated HTTP requests of this run.
+    :param max_runtime_minutes:     Cap of runtime of this run. Models are selected by
+                                    the estimated ETA, and crawling stops once exceeded.
+    :param sink:                    `landing_zone` bulk loads staged results at the end of the run.
+                                    `write_stream` appends small batches through the BigQuery
+                                    Storage Write API as the run goes.
+    """
+    run_started_at = datetime.now()
+    start_metrics_server()
     offset_idx = get_offset()
+    run_id = get_run_id()
+    flush_models = FLUSH_MODELS_MAP[sink]
 
-    last_updated_dates_of_cpu_model_df = get_last_updated_dates_of_cpu_model_df()
+    crawl_run_df = get_cpu_model_crawl_run_df_from_bq()
+    seconds_per_request = get_seconds_per_request(crawl_run_df)
+    plan_df = get_crawl_plan_df(
+        offset_idx,
+        full_refresh,
+        crawl_run_df,
+        max_requests,
+        max_runtime_minutes,
+    )
+    print(summarize_crawl_plan(plan_df))
+    print(summarize_crawl_budget(plan_df, seconds_per_request))
+    last_updated_dates_of_cpu_model_df = plan_df[plan_df["is_selected"]].reset_index(drop=True)
     system_map = get_system_map_from_bq()
     cpu_model_map = get_cpu_model_map_from_bq()
 
-    all_df_list = []
-    for idx, row in last_updated_dates_of_cpu_model_df.loc[offset_idx:].iterrows():
-        cpu_model_name = row["cpu_model"]
-        last_updated_date = row["last_uploaded"]
+    # Progress of the CPU models flushed before the run was interrupted
+    if offset_idx == 0:
+        delete_crawl_progress_file()
+    progress = get_crawl_progress()
+    crawled_cpu_model_list = progress["crawled_cpu_model_list"]
+    total_pages_map = progress["total_pages_map"]
+    actual_requests = progress["actual_requests"]
+    actual_rows = progress["actual_rows"]
+    # Count the runtime before the interruption, not the time in between
+    run_started_at -= timedelta(seconds=progress["elapsed_seconds"])
 
-        # print(f"[{idx}] Processing {cpu_model_name}, from {last_updated_date}")
-        with open("/tmp/sync_cpu_model_result_to_bq.log", "w") as f:
-            f.write(f"[{idx}] Processing {cpu_model_name}, from {last_updated_date}")
+    # The committed stream is finalized on success and closed on error
+    with (
+        BigQueryWriteStream("cpu_model_results") if sink == "write_stream" else nullcontext()
+    ) as write_stream:
+        all_df_list = []
+        for idx, row in last_updated_dates_of_cpu_model_df.loc[offset_idx:].iterrows():
+            if (
+                max_runtime_minutes is not None
+                and datetime.now() - run_started_at > timedelta(minutes=max_runtime_minutes)
+            ):
+                print(f"Runtime exceeded {max_runtime_minutes} minutes, stop at [{idx}].")
+                break
 
-        scraper = GeekbenchProcessorResultScraper(
-            cpu_model_name,
-            offset_date=last_updated_date,
-        )
+            cpu_model_name = row["cpu_model"]
+            last_updated_date = row["last_uploaded"]
+
+            # print(f"[{idx}] Processing {cpu_model_name}, from {last_updated_date}")
+            with open("/tmp/sync_cpu_model_result_to_bq.log", "w") as f:
+                f.write(f"[{idx}] Processing {cpu_model_name}, from {last_updated_date}")
 
-        df = scraper.scrape_multiple_pages_until_offset_date()
-        if len(df) == 0:
-            continue
-
-        # update system_names and cpu_model_names if new one detected
-        if df[~(df["system"].isin(system_map))].shape[0] > 0:
-            update_system_names(df["system"].to_list())
-            system_map = get_system_map_from_bq()
-        if df[~(df["cpu_model"].isin(cpu_model_map))].shape[0] > 0:
-            update_cpu_model_names(df["cpu_model"].to_list())
-            cpu_model_map = get_cpu_model_map_from_bq()
-
-        # system -> system_id , cpu_model -> cpu_model_id
-        df["system_id"] = df["system"].map(system_map)
-        df["cpu_model_id"] = df["cpu_model"].map(cpu_model_map)
-
-        df_required_columns = df.drop(["system", "cpu_model"], axis=1)
-
-        all_df_list.append(df_required_columns)
-
-        # Flush
-        if (idx + 1) % 250 == 0:
-            print(pd.concat(all_df_list).drop_duplicates())
-            load_df_to_bq(
-                df=pd.concat(all_df_list).drop_duplicates(),
-                table_name="cpu_model_results",
-                if_exists="append",
+            scraper = GeekbenchProcessorResultScraper(
+                cpu_model_name,
+                offset_date=last_updated_date,
             )
-            delete_duplicated_cpu_model_result_from_bq()
-            all_df_list = []
-            write_offset(idx)
-
-    # Final flush
-    if all_df_list:
-        load_df_to_bq(
-            df=pd.concat(all_df_list).drop_duplicates(),
-            table_name="cpu_model_results",
-            if_exists="append",
-        )
-        delete_duplicated_cpu_model_result_from_bq()
+
+            df = scraper.scrape_multiple_pages_until_offset_date()
+
+            crawled_cpu_model_list.append(cpu_model_name)
+            total_pages_map[cpu_model_name] = scraper.get_total_pages()
+            actual_requests += scraper.request_count
+            actual_rows += len(df)
+            CPU_MODEL_PAGES.observe(scraper.request_count)
+            CPU_MODEL_ROWS.observe(len(df))
+            CPU_MODELS_PROCESSED.set(len(crawled_cpu_model_list))
+
+            if len(df) == 0:
+                continue
+
+            # update system_names and cpu_model_names if new one detected
+            if df[~(df["system"].isin(system_map))].shape[0] > 0:
+                update_system_names(df["system"].to_list())
+                system_map = get_system_map_from_bq()
+            if df[~(df["cpu_model"].isin(cpu_model_map))].shape[0] > 0:
+                update_cpu_model_names(df["cpu_model"].to_list())
+                cpu_model_map = get_cpu_model_map_from_bq()
+
+            # system -> system_id , cpu_model -> cpu_model_id
+            df["system_id"] = df["system"].map(system_map)
+            df["cpu_model_id"] = df["cpu_model"].map(cpu_model_map)
+
+            df_required_columns = df.drop(["system", "cpu_model"], axis=1)
+
+            all_df_list.append(df_required_columns)
+
+            # Flush
+            if (idx + 1) % flush_models == 0:
+                print(pd.concat(all_df_list).drop_duplicates())
+                flush_results(pd.concat(all_df_list).drop_duplicates(), run_id, write_stream)
+                all_df_list = []
+                write_crawl_progress(
+                    crawled_cpu_model_list,
+                    total_pages_map,
+                    actual_requests,
+                    actual_rows,
+                    (datetime.now() - run_started_at).total_seconds(),
+                )
+                # Resume after the flushed CPU model, it is counted in the progress already
+                write_offset(idx + 1)
+
+        # Final flush
+        if all_df_list:
+            flush_results(pd.concat(all_df_list).drop_duplicates(), run_id, write_stream)
+    sketch_future = load_staged_results(run_id, sink)
+
+    # Results are loaded, the sketch refresh and both crawl bookkeeping loads are independent
+    run_finished_at = datetime.now()
+    plan_future = load_df_to_bq(
+        df=mark_crawled(
+            plan_df,
+            crawled_cpu_model_list,
+            run_finished_at,
+            total_pages_map,
+        ),
+        table_name="cpu_model_crawl_plans",
+        if_exists="replace",
+        wait=False,
+    )
+    run_future = load_df_to_bq(
+        df=build_crawl_run_record(
+            plan_df,
+            crawled_cpu_model_list,
+            seconds_per_request=seconds_per_request,
+            run_started_at=run_started_at,
+            run_finished_at=run_finished_at,
+            actual_requests=actual_requests,
+            actual_rows=actual_rows,
+            max_requests=max_requests,
+            max_runtime_minutes=max_runtime_minutes,
+        ),
+        table_name="cpu_model_crawl_runs",
+        if_exists="append",
+        wait=False,
+    )
+    if sketch_future is not None:
+        print(f"{sketch_future.result()} daily sketches refreshed.")
+    plan_future.result()
+    run_future.result()
+    print(get_job_manager().summarize_job_records())
+    print(
+        f"Crawled {len(crawled_cpu_model_list)} CPU models with {actual_requests} requests "
+        f"in {(run_finished_at - run_started_at).total_seconds() / 60:.0f} min.",
+    )
+    publish_metrics("sync-cpu-model-result-metrics")
 
     delete_offset_file()
+    delete_run_id_file()
+    delete_crawl_progress_file()
 
 
 if __name__ == "__main__":
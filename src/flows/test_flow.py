@@ -2,6 +2,7 @@ import pandas as pd
 from prefect import flow, task
 
 from utils.prefect_utility import generate_flow_name
+from utils.profiling_utility import profile_flow
 
 
 @task(log_prints=True)
@@ -37,6 +38,7 @@ def l_db2(df: pd.DataFrame) -> None:
 
 
 @flow(name=generate_flow_name(), log_prints=True)
+@profile_flow
 def test_flow() -> None:
     df1 = e_data_source_1()
     df2 = e_data_source_2()
@@ -4,7 +4,7 @@ from typing import Literal
 
 import pandas as pd
 from google.cloud.bigquery import Client as BigQueryClient
-from google.cloud.bigquery import LoadJobConfig
+from google.cloud.bigquery import LoadJob, LoadJobConfig
 
 
 def _guarantee_single_type(df: pd.DataFrame) -> pd.DataFrame:
@@ -29,7 +29,8 @@ def load_dataframe_to_bigquery(
     destination: str,
     write_disposition: Literal["WRITE_APPEND", "WRITE_TRUNCATE", "WRITE_EMPTY"],
     trans_to_singe_type: bool = True,
-) -> None:
+    wait: bool = True,
+) -> LoadJob:
     """
     Load DataFrame to BigQuery.
 
@@ -40,6 +41,8 @@ def load_dataframe_to_bigquery(
             WRITE_EMPTY: Append data only when table is empty, or raise Exception.
         If table already exists:
             All mode above create table.
+
+    With `wait=False`, return the load job as soon as the data is uploaded.
     """
     if trans_to_singe_type:
         dataframe = _guarantee_single_type(dataframe)
@@ -49,4 +52,6 @@ def load_dataframe_to_bigquery(
         destination=destination,
         job_config=LoadJobConfig(write_disposition=write_disposition),
     )
-    job.result()
+    if wait:
+        job.result()
+    return job
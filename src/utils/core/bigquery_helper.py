@@ -1,59 +1,77 @@
 
+from __future__ import annotations
+
 import os
-from datetime import datetime
-from typing import Literal
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Literal
 
 import pandas as pd
 from dotenv import load_dotenv
-from google.cloud import bigquery
 
-from utils.bigquery_utility import load_dataframe_to_bigquery
+from utils.core.warehouse_backend import get_warehouse_backend
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
 
 load_dotenv()
 
 # Dataset name, default to 'geekbench_report' if not set
 GEEKBENCH_REPORT_BIGQUERY_DATASET = os.getenv("GEEKBENCH_REPORT_BIGQUERY_DATASET", "geekbench_report")
 
+# Functions below run on the backend selected by `GEEKBENCH_REPORT_WAREHOUSE`,
+# see `utils.core.warehouse_backend`.
+# With `wait=False`, write functions return a future instead of blocking, so
+# independent jobs run at the same time, see `utils.core.bigquery_job_manager`.
+
 def get_bq_client() -> bigquery.Client:
+    from google.cloud import bigquery
+
     return bigquery.Client()
 
+def _table(table_name: str) -> str:
+    return get_warehouse_backend().table_ref(table_name)
+
 def load_df_to_bq(
     df: pd.DataFrame,
     table_name: str,
     if_exists: Literal["fail", "replace", "append"] = "fail",
-) -> None:
-    # Map if_exists to write_disposition
-    write_disposition_map = {
-        "fail": "WRITE_EMPTY",
-        "replace": "WRITE_TRUNCATE",
-        "append": "WRITE_APPEND",
-    }
-    write_disposition = write_disposition_map.get(if_exists, "WRITE_EMPTY")
-    
-    destination = f"{GEEKBENCH_REPORT_BIGQUERY_DATASET}.{table_name}"
-    
-    client = get_bq_client()
-    load_dataframe_to_bigquery(
-        bigquery_client=client,
-        dataframe=df,
-        destination=destination,
-        write_disposition=write_disposition,
-    )
+    wait: bool = True,
+) -> Future | None:
+    future = get_warehouse_backend().submit_load_df(df=df, table_name=table_name, if_exists=if_exists)
+    if wait:
+        future.result()
+        return None
+    return future
+
+def _get_column_list(query: str, column: str, label: str = "query") -> list:
+    """Return values of `column` read from Arrow record batches, without a DataFrame."""
+    column_list = []
+    for record_batch in get_warehouse_backend().query_arrow_batches(query, label=label):
+        column_list.extend(record_batch.column(column).to_pylist())
+    return column_list
+
+def _get_map(query: str, key_column: str, value_column: str, label: str = "query") -> dict:
+    """Return a dict of `key_column` to `value_column` read from Arrow record batches."""
+    result_map = {}
+    for record_batch in get_warehouse_backend().query_arrow_batches(query, label=label):
+        result_map.update(
+            zip(record_batch.column(key_column).to_pylist(), record_batch.column(value_column).to_pylist())
+        )
+    return result_map
 
 def get_cpu_model_name_list_from_bq() -> list[str]:
-    client = get_bq_client()
-    query = f"SELECT cpu_model FROM `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_names`"
+    query = f"SELECT cpu_model FROM {_table('cpu_model_names')}"
     try:
-        return client.query(query).to_dataframe()["cpu_model"].to_list()
+        return _get_column_list(query, "cpu_model", label="read cpu_model_names")
     except Exception:
         # Return empty list if table logic fails or table doesn't exist
         return []
 
 def get_system_name_list_from_bq() -> list[str]:
-    client = get_bq_client()
-    query = f"SELECT system FROM `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.system_names`"
+    query = f"SELECT system FROM {_table('system_names')}"
     try:
-        return client.query(query).to_dataframe()["system"].to_list()
+        return _get_column_list(query, "system", label="read system_names")
     except Exception:
         return []
 
@@ -61,11 +79,9 @@ def get_cpu_model_map_from_bq() -> dict[str, int]:
     """
     Return a dict with key as cpu_model and value as cpu_model_id.
     """
-    client = get_bq_client()
-    query = f"SELECT cpu_model, cpu_model_id FROM `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_names`"
+    query = f"SELECT cpu_model, cpu_model_id FROM {_table('cpu_model_names')}"
     try:
-        df = client.query(query).to_dataframe()
-        return dict(zip(df["cpu_model"], df["cpu_model_id"]))
+        return _get_map(query, "cpu_model", "cpu_model_id", label="read cpu_model_names")
     except Exception:
         return {}
 
@@ -73,11 +89,9 @@ def get_system_map_from_bq() -> dict[str, int]:
     """
     Return a dict with key as system and value as system_id.
     """
-    client = get_bq_client()
-    query = f"SELECT system, system_id FROM `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.system_names`"
+    query = f"SELECT system, system_id FROM {_table('system_names')}"
     try:
-        df = client.query(query).to_dataframe()
-        return dict(zip(df["system"], df["system_id"]))
+        return _get_map(query, "system", "system_id", label="read system_names")
     except Exception:
         return {}
 
@@ -92,12 +106,10 @@ def update_cpu_model_names(check_update_list: list[str]) -> None:
     # Find new CPU models that need to be added
     new_models = set(df["cpu_model"]) - existing_model_set
     if new_models:
-        client = get_bq_client()
-        
         # Get max ID currently in the table to emulate auto-increment
-        max_id_query = f"SELECT MAX(cpu_model_id) as max_id FROM `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_names`"
+        max_id_query = f"SELECT MAX(cpu_model_id) as max_id FROM {_table('cpu_model_names')}"
         try:
-            res = client.query(max_id_query).to_dataframe()
+            res = get_warehouse_backend().query_df(max_id_query)
             current_max = res["max_id"].iloc[0]
             if pd.isna(current_max):
                 current_max = 0
@@ -127,11 +139,10 @@ def update_system_names(check_update_list: list[str]) -> None:
 
     new_systems = set(df["system"]) - existing_system_set
     if new_systems:
-        client = get_bq_client()
         # Get max ID
-        max_id_query = f"SELECT MAX(system_id) as max_id FROM `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.system_names`"
+        max_id_query = f"SELECT MAX(system_id) as max_id FROM {_table('system_names')}"
         try:
-            res = client.query(max_id_query).to_dataframe()
+            res = get_warehouse_backend().query_df(max_id_query)
             current_max = res["max_id"].iloc[0]
             if pd.isna(current_max):
                 current_max = 0
@@ -151,26 +162,126 @@ def update_system_names(check_update_list: list[str]) -> None:
     else:
         print("No new systems to add")
 
+def _get_default_last_uploaded() -> datetime:
+    """Last uploaded date of CPU models without results, 30 days ago."""
+    return (datetime.now() - timedelta(days=30)).replace(microsecond=0)
+
 def get_last_updated_dates_of_cpu_model_df() -> pd.DataFrame:
     query = f"""
         with last_uploaded_record as (
             select
                 cpu_model_id
                 , max(uploaded) as last_uploaded
-            from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_results`
+            from {_table('cpu_model_results')}
             group by cpu_model_id
         )
         select
             d.cpu_model
-            , COALESCE(f.last_uploaded, DATETIME_SUB(CURRENT_DATETIME(), INTERVAL 30 DAY)) AS last_uploaded
-        from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_names` d
+            , COALESCE(f.last_uploaded, @default_last_uploaded) AS last_uploaded
+        from {_table('cpu_model_names')} d
         left join last_uploaded_record f
         on d.cpu_model_id = f.cpu_model_id
         where d.cpu_model <> 'ARM'
         order by d.cpu_model_id
     """
-    client = get_bq_client()
-    return client.query(query).to_dataframe()
+    return get_warehouse_backend().query_df(
+        query, params={"default_last_uploaded": _get_default_last_uploaded()}, label="last uploaded dates",
+    )
+
+def get_cpu_model_upload_velocity_df(window_start: datetime) -> pd.DataFrame:
+    """
+    Return last uploaded date and number of uploads since `window_start` for each CPU model.
+
+    `last_uploaded` falls back to 30 days ago like `get_last_updated_dates_of_cpu_model_df`.
+    """
+    query = f"""
+        with upload_record as (
+            select
+                cpu_model_id
+                , max(uploaded) as last_uploaded
+                , countif(uploaded >= @window_start) as recent_upload_count
+            from {_table('cpu_model_results')}
+            group by cpu_model_id
+        )
+        select
+            d.cpu_model_id
+            , d.cpu_model
+            , COALESCE(f.last_uploaded, @default_last_uploaded) AS last_uploaded
+            , COALESCE(f.recent_upload_count, 0) AS recent_upload_count
+        from {_table('cpu_model_names')} d
+        left join upload_record f
+        on d.cpu_model_id = f.cpu_model_id
+        where d.cpu_model <> 'ARM'
+        order by d.cpu_model_id
+    """
+    return get_warehouse_backend().query_df(
+        query,
+        params={
+            "window_start": window_start,
+            "default_last_uploaded": _get_default_last_uploaded(),
+        },
+        label="upload velocity",
+    )
+
+def get_cpu_model_crawl_plan_df_from_bq() -> pd.DataFrame:
+    """Return the crawl plan persisted by the last run, or an empty DataFrame."""
+    query = f"SELECT * FROM {_table('cpu_model_crawl_plans')}"
+    try:
+        return get_warehouse_backend().query_df(query)
+    except Exception:
+        return pd.DataFrame()
+
+def get_cpu_model_crawl_run_df_from_bq() -> pd.DataFrame:
+    """Return records of previous result sync runs, or an empty DataFrame."""
+    query = f"SELECT * FROM {_table('cpu_model_crawl_runs')}"
+    try:
+        return get_warehouse_backend().query_df(query)
+    except Exception:
+        return pd.DataFrame()
+
+def get_scrape_state_from_bq(state_key: str) -> str | None:
+    """Return the latest value of `state_key` in `scrape_states`, or None if never set."""
+    query = f"""
+        select state_value
+        from {_table('scrape_states')}
+        where state_key = @state_key
+        order by updated_at desc
+        limit 1
+    """
+    try:
+        df = get_warehouse_backend().query_df(query, params={"state_key": state_key})
+    except Exception:
+        return None
+    if len(df) == 0:
+        return None
+    return df["state_value"].iloc[0]
+
+def set_scrape_state_to_bq(state_key: str, state_value: str) -> None:
+    """
+    Append a new value of `state_key` to `scrape_states`.
+
+    SQL for creating table `scrape_states` in BigQuery:
+    ```sql
+    CREATE TABLE `geekbench_report.scrape_states` (
+        state_key STRING,
+        state_value STRING,
+        updated_at DATETIME
+    );
+    ```
+    """
+    load_df_to_bq(
+        df=pd.DataFrame(
+            [
+                {
+                    "state_key": state_key,
+                    "state_value": state_value,
+                    "updated_at": datetime.now(),
+                },
+            ],
+        ),
+        table_name="scrape_states",
+        if_exists="append",
+    )
 
 def get_cpu_model_id_and_result_id_for_scraping_details_df() -> pd.DataFrame:
     query = f"""
@@ -178,7 +289,7 @@ def get_cpu_model_id_and_result_id_for_scraping_details_df() -> pd.DataFrame:
             select
                 cpu_model_id,
                 max(cpu_result_id) as cpu_result_id
-            from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_results`
+            from {_table('cpu_model_results')}
             group by cpu_model_id
         )
         select
@@ -186,68 +297,180 @@ def get_cpu_model_id_and_result_id_for_scraping_details_df() -> pd.DataFrame:
             cpu_result_id
         from cpu_model_id_with_result_id
         where cpu_model_id not in (
-            select cpu_model_id from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_details`
+            select cpu_model_id from {_table('cpu_model_details')}
         )
     """
-    client = get_bq_client()
+    return get_warehouse_backend().query_df(query)
 
-    return client.query(query).to_dataframe()
+def get_cpu_result_id_list_with_workload_scores_from_bq() -> list[int]:
+    """Return CPU result IDs already in `cpu_model_detail_workload_scores`."""
+    query = f"SELECT DISTINCT cpu_result_id FROM {_table('cpu_model_detail_workload_scores')}"
+    try:
+        return _get_column_list(query, "cpu_result_id", label="read workload score result ids")
+    except Exception:
+        return []
 
 def delete_cpu_model_result_record_from_date_to_now(
     cpu_model: str,
     from_date: str | datetime,
-) -> None:
-    client = get_bq_client()
-    # BQ uses strings for dates in loose queries usually, but safe to cast if needed.
+    wait: bool = True,
+) -> Future | None:
     # from_date is Python Object, f-string injection needs care.
-    if isinstance(from_date, (datetime, pd.Timestamp)):
-        from_date_str = from_date.strftime('%Y-%m-%d %H:%M:%S')
-    else:
-        from_date_str = str(from_date)
+    from_date = pd.Timestamp(from_date).to_pydatetime()
+    from_date_str = from_date.strftime('%Y-%m-%d %H:%M:%S')
         
     delete_sql = f"""
-        DELETE FROM `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_results`
+        DELETE FROM {_table('cpu_model_results')}
         WHERE cpu_model_id = (
-            SELECT cpu_model_id FROM `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_names` WHERE cpu_model = @cpu_model
+            SELECT cpu_model_id FROM {_table('cpu_model_names')} WHERE cpu_model = @cpu_model
         )
         AND uploaded >= @from_date
     """
-    job_config = bigquery.QueryJobConfig(
-        query_parameters=[
-            bigquery.ScalarQueryParameter("cpu_model", "STRING", cpu_model),
-            bigquery.ScalarQueryParameter("from_date", "DATETIME", from_date_str), # Assuming uploaded is DATETIME
-        ]
-    )
-    
     print(f"Deleting cpu_model='{cpu_model}'/uploaded>='{from_date_str}' from cpu_model_results...")
-    job = client.query(delete_sql, job_config=job_config)
-    job.result()
-    print(f"{job.num_dml_affected_rows} rows affected.")
-
-def delete_duplicated_cpu_model_result_from_bq() -> None:
-    # Use Create or Replace Logic as DELETE dedup is hard
-    table_id = f"{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_results"
-    
-    dedup_sql = f"""
-        CREATE OR REPLACE TABLE `{table_id}` AS
-        SELECT * EXCEPT(rn)
-        FROM (
-            SELECT *,
-                ROW_NUMBER() OVER (
-                    partition by cpu_result_id, system_id, cpu_model_id, frequency, cores,
-                                    uploaded, platform, single_core_score, multi_core_score
-                ) as rn
-            FROM `{table_id}`
-        )
-        WHERE rn = 1
-    """
-    client = get_bq_client()
+    future = get_warehouse_backend().submit_execute(
+        delete_sql,
+        params={"cpu_model": cpu_model, "from_date": from_date},
+        label="delete cpu_model_results from date",
+    )
+    if wait:
+        print(f"{future.result()} rows affected.")
+        return None
+    return future
+
+def delete_duplicated_cpu_model_result_from_bq(wait: bool = True) -> Future | None:
     print("Deleting duplicated data from cpu_model_results (Redefining table)...")
-    job = client.query(dedup_sql)
-    job.result()
-    print("Done.")
+    future = get_warehouse_backend().submit_dedup_cpu_model_results()
+    if wait:
+        future.result()
+        print("Done.")
+        return None
+    return future
+
+def refresh_cpu_model_daily_score_sketches(
+    refresh_range_list: list[tuple[int, date]],
+    wait: bool = True,
+) -> Future | None:
+    """
+    Rebuild `cpu_model_daily_score_sketches` of each (cpu_model_id, from_date) and later days.
+
+    Called in the load path of the result sync with the earliest uploaded date of
+    each loaded model. Pass `date.min` as from_date to rebuild every day of a model.
+    Results without an upload date are kept in a day with a NULL `uploaded_date`.
+
+    Medians and percentiles are answered by merging the KLL sketches
+    (`KLL_QUANTILES.MERGE_*`), with the approximation error of BigQuery KLL
+    sketches at the default precision (1000).
+
+    SQL for creating table `cpu_model_daily_score_sketches` in BigQuery:
+    ```sql
+    CREATE TABLE `geekbench_report.cpu_model_daily_score_sketches` (
+        cpu_model_id INT64,
+        uploaded_date DATE,
+        data_count INT64,
+        single_core_count INT64,
+        single_core_sum INT64,
+        single_core_sum_squares FLOAT64,
+        single_core_min INT64,
+        single_core_max INT64,
+        single_core_sketch BYTES,
+        multi_core_count INT64,
+        multi_core_sum INT64,
+        multi_core_sum_squares FLOAT64,
+        multi_core_min INT64,
+        multi_core_max INT64,
+        multi_core_sketch BYTES,
+        min_uploaded DATETIME,
+        max_uploaded DATETIME,
+        refreshed_at DATETIME
+    )
+    CLUSTER BY cpu_model_id, uploaded_date;
+    ```
+    """
+    if not refresh_range_list:
+        return None
+
+    print(f"Refreshing cpu_model_daily_score_sketches of {len(refresh_range_list)} CPU models...")
+    future = get_warehouse_backend().submit_refresh_cpu_model_daily_score_sketches(refresh_range_list)
+    if wait:
+        print(f"{future.result()} daily sketches refreshed.")
+        return None
+    return future
+
+def backfill_cpu_model_daily_score_sketches() -> None:
+    """
+    Build daily sketches of every (CPU model, upload day) with results but no sketch yet.
+
+    Run before each stats refresh, so days loaded before the sketches existed
+    are reported with all their results, including days of models whose newer
+    days were already refreshed by the result sync.
+    """
+    print("Backfilling cpu_model_daily_score_sketches of days without any...")
+    future = get_warehouse_backend().submit_backfill_cpu_model_daily_score_sketches()
+    print(f"{future.result()} daily sketches backfilled.")
+
+def refresh_cpu_model_score_stats(wait: bool = True) -> Future | None:
+    """
+    Refresh `cpu_model_score_stats` for CPU models whose daily sketches changed since the last refresh.
+
+    Per-model stats are merged from `cpu_model_daily_score_sketches`,
+    so `cpu_model_results` is not scanned. Days without daily sketches are
+    backfilled first, see `backfill_cpu_model_daily_score_sketches`.
+
+    SQL for creating table `cpu_model_score_stats` in BigQuery:
+    ```sql
+    CREATE TABLE `geekbench_report.cpu_model_score_stats` (
+        cpu_model_id INT64,
+        data_count INT64,
+        single_core_count INT64,
+        single_core_sum INT64,
+        single_core_sum_squares FLOAT64,
+        single_core_min INT64,
+        single_core_max INT64,
+        single_core_sketch BYTES,
+        multi_core_count INT64,
+        multi_core_sum INT64,
+        multi_core_sum_squares FLOAT64,
+        multi_core_min INT64,
+        multi_core_max INT64,
+        multi_core_sketch BYTES,
+        min_uploaded DATETIME,
+        max_uploaded DATETIME,
+        refreshed_at DATETIME  -- latest `refreshed_at` of the merged daily sketches
+    )
+    CLUSTER BY cpu_model_id;
+    ```
+    """
+    backfill_cpu_model_daily_score_sketches()
+
+    print("Refreshing cpu_model_score_stats...")
+    future = get_warehouse_backend().submit_refresh_cpu_model_score_stats()
+    if wait:
+        print(f"{future.result()} CPU models refreshed.")
+        return None
+    return future
 
 def get_score_report_from_df() -> pd.DataFrame:
-    from utils.core.sql.mart_average_score_and_benchmark_score import sql
-    client = get_bq_client()
-    return client.query(sql).to_dataframe()
+    """
+    Read the score report from `cpu_model_score_stats`, see `refresh_cpu_model_score_stats`.
+
+    On DuckDB, the report is computed from `cpu_model_results` by the full mart query.
+    """
+    return get_warehouse_backend().get_score_report_df()
+
+def export_tables_to_parquet(table_column_map: dict[str, list[str]], output_dir: str) -> None:
+    """
+    Export the given columns of each table to `{output_dir}/{table_name}.parquet`.
+
+    Each file is written to a temporary path first, so readers never see a partial mirror file.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for table_name, column_list in table_column_map.items():
+        query = f"""
+        SELECT {", ".join(column_list)}
+        FROM {_table(table_name)}
+        """
+        df = get_warehouse_backend().query_df(query, label=f"export {table_name}")
+        output_path = os.path.join(output_dir, f"{table_name}.parquet")
+        df.to_parquet(f"{output_path}.tmp", index=False)
+        os.replace(f"{output_path}.tmp", output_path)
+        print(f"Exported {len(df)} rows of {table_name} to {output_path}")
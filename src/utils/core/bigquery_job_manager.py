@@ -0,0 +1,214 @@
+"""
+Submit BigQuery jobs without blocking, and poll their completion in the background.
+
+`BigQueryJobManager.submit()` starts a job and returns a `Future` right away,
+so independent jobs (e.g. loading the next batch while the previous MERGE runs)
+proceed at the same time. One daemon thread polls every pending job and
+resolves its future once done.
+
+Wall time, server time and bytes of every finished job are recorded in
+`job_record_list`, see `summarize_job_records()`, and in `utils.metrics_utility`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from utils.metrics_utility import (
+    BIGQUERY_JOB_BYTES_BILLED,
+    BIGQUERY_JOB_BYTES_PROCESSED,
+    BIGQUERY_JOB_DURATION,
+)
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
+POLL_INTERVAL_SECONDS = 1.0
+# Consecutive failed status requests of a job before its future fails,
+# e.g. expired credentials or a job not found are not resolved by polling again
+MAX_STATUS_ERRORS = 5
+
+
+@dataclass
+class BigQueryJobRecord:
+    label: str
+    job_id: str
+    job_type: str
+    state: str
+    wall_seconds: float
+    server_seconds: float | None
+    total_bytes_processed: int | None
+    total_bytes_billed: int | None
+    slot_millis: int | None
+    output_rows: int | None
+
+
+@dataclass
+class _PendingJob:
+    label: str
+    job: bigquery.LoadJob | bigquery.QueryJob
+    future: Future
+    result_func: Callable[[Any], Any]
+    submitted_at: float
+    status_error_count: int = 0
+
+
+class BigQueryJobManager:
+    def __init__(self, poll_interval_seconds: float = POLL_INTERVAL_SECONDS):
+        self.poll_interval_seconds = poll_interval_seconds
+        self.job_record_list: list[BigQueryJobRecord] = []
+        self._pending_job_list: list[_PendingJob] = []
+        self._condition = threading.Condition()
+        self._poll_thread = None
+
+    def submit(
+        self,
+        start_job: Callable[[], bigquery.LoadJob | bigquery.QueryJob],
+        label: str,
+        result_func: Callable[[Any], Any] | None = None,
+    ) -> Future:
+        """
+        Start a job with `start_job()` and return a future of `result_func(job)`.
+
+        The future raises the error of the job if it failed.
+        """
+        future = Future()
+        submitted_at = time.time()
+        try:
+            job = start_job()
+        except Exception as e:
+            future.set_exception(e)
+            return future
+
+        with self._condition:
+            self._pending_job_list.append(
+                _PendingJob(
+                    label=label,
+                    job=job,
+                    future=future,
+                    result_func=result_func or (lambda job: job),
+                    submitted_at=submitted_at,
+                ),
+            )
+            if self._poll_thread is None or not self._poll_thread.is_alive():
+                self._poll_thread = threading.Thread(
+                    target=self._poll, name="bigquery-job-poller", daemon=True,
+                )
+                self._poll_thread.start()
+            self._condition.notify()
+        return future
+
+    def _poll(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending_job_list:
+                    self._condition.wait()
+                pending_job_list = list(self._pending_job_list)
+
+            for pending_job in pending_job_list:
+                try:
+                    if not pending_job.job.done():
+                        pending_job.status_error_count = 0
+                        continue
+                except Exception as e:
+                    # Transient errors of the status request are retried next round
+                    pending_job.status_error_count += 1
+                    if pending_job.status_error_count < MAX_STATUS_ERRORS:
+                        continue
+                    print(f"Could not get the status of {pending_job.label} {MAX_STATUS_ERRORS} times in a row: {e}")
+                    with self._condition:
+                        self._pending_job_list.remove(pending_job)
+                    pending_job.future.set_exception(e)
+                    continue
+
+                with self._condition:
+                    self._pending_job_list.remove(pending_job)
+                try:
+                    self._resolve(pending_job)
+                except Exception as e:
+                    # The poller must keep running, or futures of other jobs never resolve
+                    if not pending_job.future.done():
+                        pending_job.future.set_exception(e)
+
+            time.sleep(self.poll_interval_seconds)
+
+    def _resolve(self, pending_job: _PendingJob) -> None:
+        job = pending_job.job
+        error = None
+        try:
+            # Returns at once for a finished job, raises its error if failed
+            job.result()
+            result = pending_job.result_func(job)
+        except Exception as e:
+            error = e
+
+        # Recorded before resolving the future, so waiters see the record
+        self.record_job(pending_job.label, job, pending_job.submitted_at, failed=error is not None)
+
+        if error:
+            pending_job.future.set_exception(error)
+        else:
+            pending_job.future.set_result(result)
+
+    def record_job(
+        self,
+        label: str,
+        job: bigquery.LoadJob | bigquery.QueryJob,
+        submitted_at: float,
+        failed: bool = False,
+    ) -> BigQueryJobRecord:
+        """Record a finished job, also used for jobs the caller waits for itself (e.g. reads)."""
+        server_seconds = None
+        if job.started and job.ended:
+            server_seconds = (job.ended - job.started).total_seconds()
+        record = BigQueryJobRecord(
+            label=label,
+            job_id=job.job_id,
+            job_type=job.job_type,
+            state="FAILED" if failed else "DONE",
+            wall_seconds=time.time() - submitted_at,
+            server_seconds=server_seconds,
+            total_bytes_processed=getattr(job, "total_bytes_processed", None),
+            total_bytes_billed=getattr(job, "total_bytes_billed", None),
+            slot_millis=getattr(job, "slot_millis", None),
+            output_rows=getattr(job, "output_rows", None),
+        )
+        BIGQUERY_JOB_DURATION.labels(record.label, record.job_type, record.state).observe(record.wall_seconds)
+        if record.total_bytes_processed:
+            BIGQUERY_JOB_BYTES_PROCESSED.labels(record.label).inc(record.total_bytes_processed)
+        if record.total_bytes_billed:
+            BIGQUERY_JOB_BYTES_BILLED.labels(record.label).inc(record.total_bytes_billed)
+        self.job_record_list.append(record)
+        return record
+
+    def summarize_job_records(self) -> str:
+        line_list = [f"{'label':<40} {'type':<6} {'state':<6} {'wall s':>8} {'server s':>9} {'MB processed':>13}"]
+        for record in self.job_record_list:
+            server_seconds = f"{record.server_seconds:.2f}" if record.server_seconds is not None else "-"
+            mb_processed = (
+                f"{record.total_bytes_processed / 1e6:.1f}"
+                if record.total_bytes_processed is not None else "-"
+            )
+            line_list.append(
+                f"{record.label:<40} {record.job_type:<6} {record.state:<6} "
+                f"{record.wall_seconds:>8.2f} {server_seconds:>9} {mb_processed:>13}"
+            )
+        return "\n".join(line_list)
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> BigQueryJobManager:
+    """Return the job manager shared by the process."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = BigQueryJobManager()
+        return _job_manager
@@ -0,0 +1,218 @@
+"""
+Append rows to BigQuery through the Storage Write API.
+
+Load jobs have a fixed latency of seconds and a daily quota per table, while a
+write stream accepts small batches continuously. Rows are sent as serialized
+Arrow record batches with explicit offsets. An append failed with a transient
+error is sent again at the same offset, so it is written exactly once:
+    - `COMMITTED` streams: rows are visible as soon as their append is acknowledged.
+    - `PENDING` streams: rows become visible atomically on `commit()`, and are
+      discarded if the stream is aborted.
+
+Needs `pip install .[bqstorage]`.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Literal
+
+import pandas as pd
+import pyarrow as pa
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
+load_dotenv()
+
+GEEKBENCH_REPORT_BIGQUERY_DATASET = os.getenv("GEEKBENCH_REPORT_BIGQUERY_DATASET", "geekbench_report")
+
+# An append request must be under 10 MB
+MAX_ROWS_PER_REQUEST = 10_000
+MAX_PENDING_REQUESTS = 16
+
+# Resends of an append failed with a transient error, with exponential backoff
+APPEND_NUM_RETRIES = 5
+MAX_BACKOFF_SECONDS = 32
+
+_ARROW_TYPE_MAP = {
+    "STRING": pa.string(),
+    "INTEGER": pa.int64(),
+    "INT64": pa.int64(),
+    "FLOAT": pa.float64(),
+    "FLOAT64": pa.float64(),
+    "BOOLEAN": pa.bool_(),
+    "BOOL": pa.bool_(),
+    "DATE": pa.date32(),
+    "DATETIME": pa.timestamp("us"),
+    "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+    "BYTES": pa.binary(),
+}
+
+
+def _to_arrow_field(schema_field: bigquery.SchemaField) -> pa.Field:
+    if schema_field.field_type in ("RECORD", "STRUCT"):
+        arrow_type = pa.struct([_to_arrow_field(field) for field in schema_field.fields])
+    else:
+        arrow_type = _ARROW_TYPE_MAP[schema_field.field_type]
+    if schema_field.mode == "REPEATED":
+        arrow_type = pa.list_(arrow_type)
+    return pa.field(schema_field.name, arrow_type, nullable=schema_field.mode != "REQUIRED")
+
+
+def bq_schema_to_arrow_schema(schema: list[bigquery.SchemaField]) -> pa.Schema:
+    return pa.schema([_to_arrow_field(schema_field) for schema_field in schema])
+
+
+class BigQueryWriteStream:
+    """
+    Write stream of one table in `GEEKBENCH_REPORT_BIGQUERY_DATASET`.
+
+    The Arrow schema is derived from the table, use as a context manager to
+    commit on success and abort on error:
+    ```python
+    with BigQueryWriteStream("cpu_model_results") as write_stream:
+        write_stream.append_df(df)
+        write_stream.flush()
+    ```
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        stream_type: Literal["COMMITTED", "PENDING"] = "COMMITTED",
+        max_pending_requests: int = MAX_PENDING_REQUESTS,
+    ):
+        from google.cloud import bigquery, bigquery_storage_v1
+        from google.cloud.bigquery_storage_v1 import types, writer
+
+        self._types = types
+        self.table_name = table_name
+        self.stream_type = stream_type
+        self.max_pending_requests = max_pending_requests
+
+        table = bigquery.Client().get_table(f"{GEEKBENCH_REPORT_BIGQUERY_DATASET}.{table_name}")
+        self.arrow_schema = bq_schema_to_arrow_schema(table.schema)
+
+        self.write_client = bigquery_storage_v1.BigQueryWriteClient()
+        self.parent = self.write_client.table_path(table.project, table.dataset_id, table.table_id)
+        self.write_stream = self.write_client.create_write_stream(
+            parent=self.parent,
+            write_stream=types.WriteStream(type_=types.WriteStream.Type[stream_type]),
+        )
+        # The schema is sent once with the first request of the connection
+        request_template = types.AppendRowsRequest(
+            write_stream=self.write_stream.name,
+            arrow_rows=types.AppendRowsRequest.ArrowData(
+                writer_schema=types.ArrowSchema(
+                    serialized_schema=self.arrow_schema.serialize().to_pybytes(),
+                ),
+            ),
+        )
+        self.append_rows_stream = writer.AppendRowsStream(self.write_client, request_template)
+
+        self.offset = 0
+        self._pending_append_queue = deque()
+
+    def __enter__(self) -> "BigQueryWriteStream":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def _wait(self, request, future) -> None:
+        """Wait for the append of `request`, sending it again at the same offset on transient errors."""
+        from google.api_core.exceptions import (
+            Aborted,
+            AlreadyExists,
+            DeadlineExceeded,
+            InternalServerError,
+            OutOfRange,
+            ServiceUnavailable,
+        )
+
+        for attempt in range(APPEND_NUM_RETRIES + 1):
+            try:
+                future.result()
+                return
+            except AlreadyExists:
+                # Rows at this offset were written by a previous attempt
+                return
+            except (Aborted, DeadlineExceeded, InternalServerError, OutOfRange, ServiceUnavailable) as e:
+                # A broken connection fails every append in flight, and appends after a
+                # failed one are out of range. They are sent again in offset order.
+                if attempt == APPEND_NUM_RETRIES:
+                    raise
+                backoff_seconds = min(2 ** attempt, MAX_BACKOFF_SECONDS) + random.random()
+                print(
+                    f"Append at offset {request.offset} of {self.table_name} failed with "
+                    f"{type(e).__name__}, retrying in {backoff_seconds:.1f}s..."
+                )
+                time.sleep(backoff_seconds)
+                future = self.append_rows_stream.send(request)
+
+    def append_table(self, table: pa.Table) -> None:
+        """Send `table` without waiting, at most `max_pending_requests` requests are in flight."""
+        table = table.select(self.arrow_schema.names).cast(self.arrow_schema)
+        for record_batch in table.to_batches(max_chunksize=MAX_ROWS_PER_REQUEST):
+            request = self._types.AppendRowsRequest(
+                offset=self.offset,
+                arrow_rows=self._types.AppendRowsRequest.ArrowData(
+                    rows=self._types.ArrowRecordBatch(
+                        serialized_record_batch=record_batch.serialize().to_pybytes(),
+                        row_count=record_batch.num_rows,
+                    ),
+                ),
+            )
+            self._pending_append_queue.append((request, self.append_rows_stream.send(request)))
+            self.offset += record_batch.num_rows
+            while len(self._pending_append_queue) > self.max_pending_requests:
+                self._wait(*self._pending_append_queue.popleft())
+
+    def append_df(self, df: pd.DataFrame) -> None:
+        """Append `df`, columns of the table missing in `df` are written as NULL."""
+        table = pa.Table.from_pandas(
+            df[[column for column in self.arrow_schema.names if column in df.columns]],
+            preserve_index=False,
+        )
+        for field in self.arrow_schema:
+            if field.name not in table.column_names:
+                table = table.append_column(field.name, pa.nulls(table.num_rows, field.type))
+        self.append_table(table)
+
+    def append_rows(self, row_list: list[dict]) -> None:
+        """Append rows of nested dicts, e.g. STRUCT columns as dicts."""
+        self.append_table(pa.Table.from_pylist(row_list, schema=self.arrow_schema))
+
+    def flush(self) -> None:
+        """Wait until every appended row is acknowledged."""
+        while self._pending_append_queue:
+            self._wait(*self._pending_append_queue.popleft())
+
+    def commit(self) -> None:
+        """Flush and finalize the stream, making rows of a pending stream visible."""
+        self.flush()
+        self.append_rows_stream.close()
+        self.write_client.finalize_write_stream(name=self.write_stream.name)
+        if self.stream_type == "PENDING":
+            response = self.write_client.batch_commit_write_streams(
+                self._types.BatchCommitWriteStreamsRequest(
+                    parent=self.parent,
+                    write_streams=[self.write_stream.name],
+                ),
+            )
+            if response.stream_errors:
+                raise RuntimeError(f"Failed to commit {self.write_stream.name}: {response.stream_errors}")
+        print(f"Committed {self.offset} rows to {self.table_name} through the Storage Write API.")
+
+    def abort(self) -> None:
+        """Close the connection, rows of a pending stream are discarded."""
+        self.append_rows_stream.close()
+        print(f"Aborted write stream of {self.table_name} at offset {self.offset}.")
@@ -0,0 +1,192 @@
+"""
+Estimate the requests and runtime of a result sync before it starts.
+
+For each due CPU model, the number of new results is estimated from its upload
+velocity and the time since its last uploaded result. Pages are derived from
+`RESULTS_PER_PAGE` and capped by the total page count persisted from the last
+crawl. One extra request is spent by `get_total_pages()` for every model.
+
+When the operator caps total requests or runtime, models with the highest
+expected new results per request are selected first.
+
+Every run is recorded to `cpu_model_crawl_runs`, and the ratio between actual
+and planned figures of recent runs is used to correct the next estimation:
+```sql
+CREATE TABLE `geekbench_report.cpu_model_crawl_runs` (
+    run_started_at DATETIME,
+    run_finished_at DATETIME,
+    max_requests INT64,
+    max_runtime_minutes FLOAT64,
+    planned_models INT64,
+    planned_requests INT64,
+    planned_seconds FLOAT64,
+    crawled_models INT64,
+    crawled_planned_requests INT64,
+    actual_requests INT64,
+    actual_seconds FLOAT64,
+    actual_rows INT64
+);
+```
+"""
+
+import math
+from datetime import datetime
+
+import pandas as pd
+
+RESULTS_PER_PAGE = 20
+DEFAULT_SECONDS_PER_REQUEST = 1.5
+
+# Number of recent runs used to learn seconds per request and request correction
+CRAWL_RUN_HISTORY_SIZE = 5
+
+
+def get_seconds_per_request(crawl_run_df: pd.DataFrame) -> float:
+    """Learn average seconds per request from recent runs."""
+    if len(crawl_run_df) == 0:
+        return DEFAULT_SECONDS_PER_REQUEST
+
+    recent_df = crawl_run_df.sort_values("run_started_at").tail(CRAWL_RUN_HISTORY_SIZE)
+    actual_requests = recent_df["actual_requests"].sum()
+    if actual_requests <= 0:
+        return DEFAULT_SECONDS_PER_REQUEST
+    return float(recent_df["actual_seconds"].sum() / actual_requests)
+
+
+def get_request_correction(crawl_run_df: pd.DataFrame) -> float:
+    """
+    Learn how far off the request estimation was in recent runs.
+
+    Only the planned requests of models actually crawled are compared,
+    so runs cut short by a runtime cap still count.
+    """
+    if len(crawl_run_df) == 0:
+        return 1.0
+
+    recent_df = crawl_run_df.sort_values("run_started_at").tail(CRAWL_RUN_HISTORY_SIZE)
+    planned_requests = recent_df["crawled_planned_requests"].sum()
+    if planned_requests <= 0:
+        return 1.0
+    return float(recent_df["actual_requests"].sum() / planned_requests)
+
+
+def estimate_crawl_requests(
+    plan_df: pd.DataFrame,
+    now: datetime,
+    request_correction: float = 1.0,
+) -> pd.DataFrame:
+    """Add `expected_new_results`, `estimated_pages` and `estimated_requests` to the plan."""
+    plan_df = plan_df.copy()
+
+    weeks_since_last_uploaded = (
+        (pd.Timestamp(now) - pd.to_datetime(plan_df["last_uploaded"])).dt.total_seconds()
+        / (7 * 24 * 60 * 60)
+    ).clip(lower=0)
+    plan_df["expected_new_results"] = plan_df["uploads_per_week"] * weeks_since_last_uploaded
+
+    estimated_pages = (
+        plan_df["expected_new_results"] / RESULTS_PER_PAGE
+    ).map(math.ceil).clip(lower=1)
+    if "total_pages" in plan_df.columns:
+        estimated_pages = estimated_pages.where(
+            plan_df["total_pages"].isna(),
+            estimated_pages.clip(upper=plan_df["total_pages"]),
+        )
+    plan_df["estimated_pages"] = estimated_pages.astype(int)
+
+    # `get_total_pages()` requests page 1 once before scraping
+    plan_df["estimated_requests"] = (
+        ((plan_df["estimated_pages"] + 1) * request_correction).map(math.ceil).astype(int)
+    )
+    return plan_df
+
+
+def apply_crawl_budget(
+    plan_df: pd.DataFrame,
+    seconds_per_request: float,
+    max_requests: int | None = None,
+    max_runtime_minutes: float | None = None,
+) -> pd.DataFrame:
+    """
+    Select due models within the budget, highest expected yield first.
+
+    Sets `is_selected` and re-orders `crawl_priority` by expected new results per request.
+    """
+    plan_df = plan_df.copy()
+    plan_df["expected_yield_per_request"] = (
+        plan_df["expected_new_results"] / plan_df["estimated_requests"]
+    )
+    plan_df = plan_df.sort_values(
+        ["is_due", "expected_yield_per_request", "crawl_priority"],
+        ascending=[False, False, True],
+    ).reset_index(drop=True)
+    plan_df["crawl_priority"] = range(1, len(plan_df) + 1)
+
+    request_budget = math.inf
+    if max_requests is not None:
+        request_budget = min(request_budget, max_requests)
+    if max_runtime_minutes is not None:
+        request_budget = min(
+            request_budget, max_runtime_minutes * 60 / seconds_per_request,
+        )
+
+    # Greedy by yield, a model too large for the remaining budget does not
+    # block smaller models behind it.
+    is_selected_list = []
+    remaining_requests = request_budget
+    for is_due, estimated_requests in zip(plan_df["is_due"], plan_df["estimated_requests"]):
+        is_selected = bool(is_due) and estimated_requests <= remaining_requests
+        if is_selected:
+            remaining_requests -= estimated_requests
+        is_selected_list.append(is_selected)
+    plan_df["is_selected"] = is_selected_list
+    return plan_df
+
+
+def summarize_crawl_budget(plan_df: pd.DataFrame, seconds_per_request: float) -> str:
+    selected_df = plan_df[plan_df["is_selected"]]
+    due_count = int(plan_df["is_due"].sum())
+    planned_requests = int(selected_df["estimated_requests"].sum())
+    eta_minutes = planned_requests * seconds_per_request / 60
+    return (
+        f"Crawl budget: {len(selected_df)}/{due_count} due CPU models selected, "
+        f"~{planned_requests} requests, ETA ~{eta_minutes:.0f} min "
+        f"({seconds_per_request:.2f} s/request)"
+    )
+
+
+def build_crawl_run_record(
+    plan_df: pd.DataFrame,
+    crawled_cpu_model_list: list[str],
+    seconds_per_request: float,
+    run_started_at: datetime,
+    run_finished_at: datetime,
+    actual_requests: int,
+    actual_rows: int,
+    max_requests: int | None = None,
+    max_runtime_minutes: float | None = None,
+) -> pd.DataFrame:
+    """Return one row DataFrame for `cpu_model_crawl_runs`."""
+    selected_df = plan_df[plan_df["is_selected"]]
+    crawled_df = selected_df[selected_df["cpu_model"].isin(crawled_cpu_model_list)]
+    planned_requests = int(selected_df["estimated_requests"].sum())
+    return pd.DataFrame(
+        [
+            {
+                "run_started_at": run_started_at,
+                "run_finished_at": run_finished_at,
+                "max_requests": max_requests,
+                "max_runtime_minutes": (
+                    float(max_runtime_minutes) if max_runtime_minutes is not None else None
+                ),
+                "planned_models": len(selected_df),
+                "planned_requests": planned_requests,
+                "planned_seconds": planned_requests * seconds_per_request,
+                "crawled_models": len(crawled_df),
+                "crawled_planned_requests": int(crawled_df["estimated_requests"].sum()),
+                "actual_requests": actual_requests,
+                "actual_seconds": (run_finished_at - run_started_at).total_seconds(),
+                "actual_rows": actual_rows,
+            },
+        ],
+    ).astype({"max_requests": "Int64", "max_runtime_minutes": "Float64"})
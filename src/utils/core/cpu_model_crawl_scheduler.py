@@ -0,0 +1,159 @@
+"""
+Plan which CPU models the result flow should crawl in this run.
+
+Each model's upload rate is estimated from the number of results uploaded in the
+last `UPLOAD_VELOCITY_WINDOW_WEEKS` weeks. Hot models (at least one expected new
+result per week) are crawled every week, cold models every N weeks where N is
+the number of weeks needed to expect `MIN_EXPECTED_NEW_RESULTS` new results,
+capped by `MAX_REFRESH_INTERVAL_WEEKS`.
+
+The plan is persisted to `cpu_model_crawl_plans` so that `last_crawled` survives
+between runs:
+```sql
+CREATE TABLE `geekbench_report.cpu_model_crawl_plans` (
+    cpu_model_id INT64,
+    cpu_model STRING,
+    last_uploaded DATETIME,
+    recent_upload_count INT64,
+    uploads_per_week FLOAT64,
+    refresh_interval_weeks INT64,
+    last_crawled DATETIME,
+    next_crawl DATETIME,
+    is_due BOOL,
+    crawl_priority INT64,
+    planned_at DATETIME,
+    -- Maintained by `utils.core.cpu_model_crawl_budget`
+    total_pages INT64,
+    expected_new_results FLOAT64,
+    estimated_pages INT64,
+    estimated_requests INT64,
+    expected_yield_per_request FLOAT64,
+    is_selected BOOL
+);
+```
+"""
+
+import math
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+UPLOAD_VELOCITY_WINDOW_WEEKS = 12
+MIN_EXPECTED_NEW_RESULTS = 1
+MAX_REFRESH_INTERVAL_WEEKS = 8
+
+# Weekly runs do not start at exactly the same second, allow some slack
+# so a model planned for "1 week later" is not pushed to the week after.
+SCHEDULE_SLACK = timedelta(hours=12)
+
+
+def get_upload_velocity_window_start(now: datetime) -> datetime:
+    return now - timedelta(weeks=UPLOAD_VELOCITY_WINDOW_WEEKS)
+
+
+def get_refresh_interval_weeks(uploads_per_week: float) -> int:
+    """Return how many weeks to wait before crawling a model again."""
+    if uploads_per_week <= 0:
+        return MAX_REFRESH_INTERVAL_WEEKS
+
+    interval = math.ceil(MIN_EXPECTED_NEW_RESULTS / uploads_per_week)
+    return max(1, min(interval, MAX_REFRESH_INTERVAL_WEEKS))
+
+
+def build_crawl_plan(
+    upload_velocity_df: pd.DataFrame,
+    previous_plan_df: pd.DataFrame,
+    now: datetime,
+    full_refresh: bool = False,
+) -> pd.DataFrame:
+    """
+    Build the crawl plan of this run.
+
+    :param upload_velocity_df:  From `get_cpu_model_upload_velocity_df`.
+    :param previous_plan_df:    From `get_cpu_model_crawl_plan_df_from_bq`, can be empty.
+    :param full_refresh:        Mark every model as due, e.g. for backfilling.
+
+    Returns the plan ordered by `crawl_priority` (hot models first).
+    """
+    plan_df = upload_velocity_df.copy()
+
+    # Carry over what was learned from previous crawls
+    carried_column_list = [
+        column
+        for column in ["last_crawled", "total_pages"]
+        if column in previous_plan_df.columns
+    ]
+    if carried_column_list:
+        plan_df = plan_df.merge(
+            previous_plan_df[["cpu_model_id", *carried_column_list]],
+            on="cpu_model_id",
+            how="left",
+        )
+    if "last_crawled" not in plan_df.columns:
+        plan_df["last_crawled"] = pd.NaT
+    if "total_pages" not in plan_df.columns:
+        plan_df["total_pages"] = pd.NA
+    plan_df["last_crawled"] = pd.to_datetime(plan_df["last_crawled"])
+    plan_df["total_pages"] = plan_df["total_pages"].astype("Int64")
+
+    plan_df["uploads_per_week"] = (
+        plan_df["recent_upload_count"].astype(float) / UPLOAD_VELOCITY_WINDOW_WEEKS
+    )
+    plan_df["refresh_interval_weeks"] = plan_df["uploads_per_week"].map(
+        get_refresh_interval_weeks,
+    )
+    plan_df["next_crawl"] = plan_df["last_crawled"] + pd.to_timedelta(
+        plan_df["refresh_interval_weeks"] * 7, unit="D",
+    )
+
+    if full_refresh:
+        plan_df["is_due"] = True
+    else:
+        # Never crawled models are always due
+        plan_df["is_due"] = plan_df["next_crawl"].isna() | (
+            plan_df["next_crawl"] <= pd.Timestamp(now + SCHEDULE_SLACK)
+        )
+
+    plan_df = plan_df.sort_values(
+        ["uploads_per_week", "last_uploaded"],
+        ascending=[False, False],
+    ).reset_index(drop=True)
+    plan_df["crawl_priority"] = range(1, len(plan_df) + 1)
+    plan_df["planned_at"] = pd.Timestamp(now)
+
+    return plan_df
+
+
+def mark_crawled(
+    plan_df: pd.DataFrame,
+    crawled_cpu_model_list: list[str],
+    crawled_at: datetime,
+    total_pages_map: dict[str, int] | None = None,
+) -> pd.DataFrame:
+    """Set `last_crawled`, `next_crawl` and `total_pages` of crawled models."""
+    plan_df = plan_df.copy()
+    if total_pages_map:
+        crawled_total_pages = plan_df["cpu_model"].map(total_pages_map).astype("Int64")
+        plan_df["total_pages"] = crawled_total_pages.fillna(plan_df["total_pages"])
+
+    crawled_mask = plan_df["cpu_model"].isin(crawled_cpu_model_list)
+    plan_df.loc[crawled_mask, "last_crawled"] = pd.Timestamp(crawled_at)
+    plan_df.loc[crawled_mask, "next_crawl"] = plan_df.loc[
+        crawled_mask, "last_crawled",
+    ] + pd.to_timedelta(plan_df.loc[crawled_mask, "refresh_interval_weeks"] * 7, unit="D")
+    plan_df.loc[crawled_mask, "is_due"] = False
+    return plan_df
+
+
+def summarize_crawl_plan(plan_df: pd.DataFrame) -> str:
+    due_count = int(plan_df["is_due"].sum())
+    interval_count = (
+        plan_df[plan_df["is_due"]]["refresh_interval_weeks"].value_counts().sort_index()
+    )
+    interval_summary = ", ".join(
+        f"{weeks}w: {count}" for weeks, count in interval_count.items()
+    )
+    return (
+        f"{due_count}/{len(plan_df)} CPU models due this run "
+        f"(by refresh interval: {interval_summary or '-'})"
+    )
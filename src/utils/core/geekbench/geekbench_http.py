@@ -0,0 +1,113 @@
+"""
+HTTP access to Geekbench Browser shared by the scrapers.
+
+`GEEKBENCH_BROWSER_BASE_URL` points every scraper at another host, e.g. the
+stand-in server of `scripts/geekbench_standin_server.py` for load tests.
+
+Requests go through one `requests.Session` per thread, so connections are
+reused across pages. A 429 or 5xx response is retried up to `GEEKBENCH_HTTP_MAX_RETRIES`
+times, waiting for `Retry-After` (or an exponential backoff if not given).
+An error response left after the retries raises `requests.HTTPError`, so
+scrapers never parse an error page.
+
+Latency, bytes and throttling of requests are recorded by route in
+`utils.metrics_utility`.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+from utils.metrics_utility import HTTP_REQUEST_DURATION, HTTP_RESPONSE_BYTES, HTTP_THROTTLED
+
+if TYPE_CHECKING:
+    import requests
+
+load_dotenv()
+
+GEEKBENCH_BROWSER_BASE_URL = os.getenv(
+    "GEEKBENCH_BROWSER_BASE_URL", "https://browser.geekbench.com"
+).rstrip("/")
+GEEKBENCH_HTTP_MAX_RETRIES = int(os.getenv("GEEKBENCH_HTTP_MAX_RETRIES", "3"))
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
+}
+
+MAX_BACKOFF_SECONDS = 30
+
+_thread_local = threading.local()
+
+
+def get_browser_url(path: str) -> str:
+    """Return the URL of `path` (e.g. "/search") on `GEEKBENCH_BROWSER_BASE_URL`."""
+    return f"{GEEKBENCH_BROWSER_BASE_URL}{path}"
+
+
+def get_route(url: str) -> str:
+    """Return the kind of page of `url`, used as the metric label."""
+    path = urlparse(url).path.rstrip("/")
+    if path == "/search":
+        return "search"
+    if path == "/v6/cpu":
+        return "latest_results"
+    if path.startswith("/v6/cpu/"):
+        return "detail"
+    if path == "/processor-benchmarks":
+        return "processor_benchmarks"
+    return "other"
+
+
+def _get_session() -> requests.Session:
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        import requests
+
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        _thread_local.session = session
+    return session
+
+
+def _get_retry_seconds(response: requests.Response, attempt: int) -> float:
+    retry_after = response.headers.get("Retry-After", "")
+    try:
+        return min(float(retry_after), MAX_BACKOFF_SECONDS)
+    except ValueError:
+        return min(2**attempt, MAX_BACKOFF_SECONDS)
+
+
+def _is_retryable(response: requests.Response) -> bool:
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def http_get(url: str, params: dict[str, str] | None = None) -> requests.Response:
+    """GET `url`, retrying when throttled or on server errors, and raise if it still fails."""
+    session = _get_session()
+    route = get_route(url)
+    for attempt in range(GEEKBENCH_HTTP_MAX_RETRIES + 1):
+        start_time = time.perf_counter()
+        response = session.get(url, params=params)
+        HTTP_REQUEST_DURATION.labels(route, str(response.status_code)).observe(
+            time.perf_counter() - start_time
+        )
+        HTTP_RESPONSE_BYTES.labels(route).inc(len(response.content))
+        if not _is_retryable(response) or attempt == GEEKBENCH_HTTP_MAX_RETRIES:
+            break
+
+        retry_seconds = _get_retry_seconds(response, attempt)
+        if response.status_code == 429:
+            HTTP_THROTTLED.labels(route).inc()
+            print(f"Throttled by {url}, retrying in {retry_seconds:.1f}s")
+        else:
+            print(f"{url} returned {response.status_code}, retrying in {retry_seconds:.1f}s")
+        time.sleep(retry_seconds)
+
+    response.raise_for_status()
+    return response
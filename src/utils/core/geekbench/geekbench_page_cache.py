@@ -0,0 +1,112 @@
+"""
+Fetch-and-parse cache of Geekbench Browser pages, keyed by URL.
+
+Pages shared by several flows (e.g. the processor-benchmarks page) are
+downloaded once per run and parsed once per process:
+    - Raw HTML is stored under `GEEKBENCH_PAGE_CACHE_DIR` for `ttl_seconds`,
+      so flows running in other processes on the same worker reuse it.
+    - The parsed soup is kept in memory of the current process.
+
+The SHA-256 hash of the content is stored next to the HTML. The markup can
+change between requests while the data does not, so callers that skip
+unchanged data should hash the parsed records instead.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from utils.core.geekbench.geekbench_http import http_get
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+GEEKBENCH_PAGE_CACHE_DIR = os.getenv(
+    "GEEKBENCH_PAGE_CACHE_DIR", "/tmp/geekbench_page_cache"
+)
+
+# A weekly run of all flows finishes within a few hours
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    content_hash: str
+    fetched_at: float
+    soup: BeautifulSoup
+
+
+_soup_cache: dict[str, CachedPage] = {}
+_soup_cache_lock = threading.Lock()
+
+
+def _get_cache_file_path(url: str) -> str:
+    url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(GEEKBENCH_PAGE_CACHE_DIR, url_hash)
+
+
+def _read_cache_file(url: str, ttl_seconds: float) -> tuple[str, str, float] | None:
+    """Return (text, content_hash, fetched_at) if the cached page is not expired."""
+    cache_file_path = _get_cache_file_path(url)
+    try:
+        with open(f"{cache_file_path}.json", "r") as f:
+            meta = json.load(f)
+        if time.time() - meta["fetched_at"] > ttl_seconds:
+            return None
+        with open(f"{cache_file_path}.html", "r", encoding="utf-8") as f:
+            text = f.read()
+    except (OSError, ValueError, KeyError):
+        return None
+    return text, meta["content_hash"], meta["fetched_at"]
+
+
+def _write_cache_file(url: str, text: str, content_hash: str, fetched_at: float) -> None:
+    os.makedirs(GEEKBENCH_PAGE_CACHE_DIR, exist_ok=True)
+    cache_file_path = _get_cache_file_path(url)
+    # Write to a temporary file first, other processes may read at the same time
+    with open(f"{cache_file_path}.html.tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(f"{cache_file_path}.html.tmp", f"{cache_file_path}.html")
+    with open(f"{cache_file_path}.json.tmp", "w") as f:
+        json.dump(
+            {"url": url, "content_hash": content_hash, "fetched_at": fetched_at}, f,
+        )
+    os.replace(f"{cache_file_path}.json.tmp", f"{cache_file_path}.json")
+
+
+def get_page(url: str, ttl_seconds: float = DEFAULT_TTL_SECONDS) -> CachedPage:
+    """Return the page of `url`, downloading and parsing it only if not cached."""
+    with _soup_cache_lock:
+        cached_page = _soup_cache.get(url)
+        if cached_page and time.time() - cached_page.fetched_at <= ttl_seconds:
+            return cached_page
+
+        cached_file = _read_cache_file(url, ttl_seconds)
+        if cached_file:
+            text, content_hash, fetched_at = cached_file
+        else:
+            response = http_get(url)
+            text = response.text
+            content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            fetched_at = time.time()
+            _write_cache_file(url, text, content_hash, fetched_at)
+
+        from bs4 import BeautifulSoup
+
+        cached_page = CachedPage(
+            url=url,
+            text=text,
+            content_hash=content_hash,
+            fetched_at=fetched_at,
+            soup=BeautifulSoup(text, "html.parser"),
+        )
+        _soup_cache[url] = cached_page
+        return cached_page
@@ -0,0 +1,140 @@
+"""
+Process pool for parsing Geekbench Browser pages.
+
+BeautifulSoup parsing is CPU-bound and holds the GIL, so pages are fetched as
+raw bytes in the calling thread and parsed in a `ProcessPoolExecutor` sized to
+the machine (`GEEKBENCH_PARSE_WORKERS`, default to the number of usable CPUs).
+Parse functions must be module-level and return pickling-friendly records.
+They call `free_soup()` once done, so each page is freed right away.
+
+Set `GEEKBENCH_PARSE_WORKERS=1` to parse in the current process.
+
+Parse time is measured in the worker and recorded by the caller in
+`utils.metrics_utility`, as metrics of worker processes are not collected.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from utils.metrics_utility import PARSE_DURATION
+
+GEEKBENCH_PARSE_WORKERS = int(
+    os.getenv("GEEKBENCH_PARSE_WORKERS", str(os.process_cpu_count() or 1))
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_parse_executor() -> ProcessPoolExecutor | None:
+    """Return the shared parse pool, or None if parsing in the current process."""
+    global _executor
+    if GEEKBENCH_PARSE_WORKERS <= 1:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            # Flows run with threads (Prefect), forking them is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=GEEKBENCH_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            atexit.register(shutdown_parse_executor)
+        return _executor
+
+
+def shutdown_parse_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+def free_soup(soup) -> None:
+    """
+    Free the tree of `soup` now instead of at the next cyclic garbage collection.
+
+    Tags reference their parent and siblings, so a tree is never freed by
+    reference counting. `BeautifulSoup.decompose()` does not walk the tree from
+    the root, top-level elements are decomposed instead. Values returned by the
+    parse function must be copied out of the tree first (e.g. `get_text()`).
+    """
+    for element in list(soup.contents):
+        element.decompose()
+    soup.decompose()
+
+
+def _timed_parse(parse_func: Callable[..., Any], *args: Any) -> tuple[float, Any]:
+    start_time = time.perf_counter()
+    result = parse_func(*args)
+    return time.perf_counter() - start_time, result
+
+
+def _record_parse_duration(parse_func: Callable[..., Any], timed_future: Future) -> Future:
+    """Return a future of the result of `timed_future`, recording its parse time."""
+    future = Future()
+
+    def _resolve(done_future: Future) -> None:
+        try:
+            elapsed_seconds, result = done_future.result()
+        except Exception as e:
+            future.set_exception(e)
+            return
+        PARSE_DURATION.labels(parse_func.__name__).observe(elapsed_seconds)
+        future.set_result(result)
+
+    timed_future.add_done_callback(_resolve)
+    return future
+
+
+def submit_parse(parse_func: Callable[..., Any], *args: Any) -> Future:
+    """Submit `parse_func(*args)` to the parse pool."""
+    executor = get_parse_executor()
+    if executor is not None:
+        return _record_parse_duration(parse_func, executor.submit(_timed_parse, parse_func, *args))
+    return _parse_in_process(parse_func, *args)
+
+
+def _parse_in_process(parse_func: Callable[..., Any], *args: Any) -> Future:
+    timed_future = Future()
+    try:
+        timed_future.set_result(_timed_parse(parse_func, *args))
+    except Exception as e:
+        timed_future.set_exception(e)
+    return _record_parse_duration(parse_func, timed_future)
+
+
+def parse_in_pool(
+    parse_func: Callable[..., Any],
+    fetched_args_iter: Iterable[tuple],
+    max_pending: int | None = None,
+) -> Iterator[Any]:
+    """
+    Yield `parse_func(*args)` for each args of `fetched_args_iter`, in order.
+
+    `fetched_args_iter` is expected to be a generator fetching pages lazily, so
+    the next page is downloaded while previous pages are being parsed.
+    At most `max_pending` pages (default to 4 per worker) are held in memory.
+    With `max_pending=1` each page is waited for right away, so it is parsed in
+    the current process instead of being sent to the pool.
+    """
+    if max_pending is None:
+        max_pending = max(GEEKBENCH_PARSE_WORKERS, 1) * 4
+    submit_func = submit_parse if max_pending > 1 else _parse_in_process
+
+    pending_future_queue = deque()
+    for args in fetched_args_iter:
+        pending_future_queue.append(submit_func(parse_func, *args))
+        if len(pending_future_queue) >= max_pending:
+            yield pending_future_queue.popleft().result()
+
+    while pending_future_queue:
+        yield pending_future_queue.popleft().result()
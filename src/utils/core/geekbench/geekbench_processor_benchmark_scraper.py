@@ -1,16 +1,15 @@
+import hashlib
+import json
 import re
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
-import requests
-from bs4 import BeautifulSoup
+from utils.core.geekbench.geekbench_http import get_browser_url
+from utils.core.geekbench.geekbench_page_cache import get_page
 
-BASE_URL = "https://browser.geekbench.com/processor-benchmarks"
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
-}
+BASE_URL = get_browser_url("/processor-benchmarks")
 
 
-@dataclass
+@dataclass(slots=True)
 class GeekbenchProcessorBenchmark:
     cpu_model: str
     frequency: str | None
@@ -45,12 +44,11 @@ def parse_processor_row(row):
     }
 
 
-def extract_processor_rows_from_div(soup, div_id):
+def extract_processor_rows_from_div(div):
     """
-    Extract all processor rows from the table under the specified div_id.
+    Extract all processor rows from the table under the specified div.
     Returns a dict with processor name as key.
     """
-    div = soup.find("div", id=div_id)
     if not div:
         return {}
     table = div.select_one("table.table")
@@ -63,16 +61,14 @@ def extract_processor_rows_from_div(soup, div_id):
     return result
 
 
-def scrape_page() -> list[GeekbenchProcessorBenchmark]:
-    """
-    Scrape single-core and multi-core data separately and merge by processor name.
-    Returns:
-        list of GeekbenchProcessorBenchmark
-    """
-    response = requests.get(BASE_URL, headers=HEADERS)
-    soup = BeautifulSoup(response.text, "html.parser")
-    single_core_dict = extract_processor_rows_from_div(soup, "single-core")
-    multi_core_dict = extract_processor_rows_from_div(soup, "multi-core")
+def parse_benchmarks_page(soup) -> list[GeekbenchProcessorBenchmark]:
+    """Parse single-core and multi-core tables separately and merge by processor name."""
+    # Find both divs in one walk of the soup
+    div_map = {
+        div["id"]: div for div in soup.find_all("div", id=["single-core", "multi-core"])
+    }
+    single_core_dict = extract_processor_rows_from_div(div_map.get("single-core"))
+    multi_core_dict = extract_processor_rows_from_div(div_map.get("multi-core"))
 
     all_names = set(single_core_dict.keys()) | set(multi_core_dict.keys())
     result_list = []
@@ -94,8 +90,26 @@ def scrape_page() -> list[GeekbenchProcessorBenchmark]:
     return result_list
 
 
-if __name__ == "__main__":
-    import json
-    from dataclasses import asdict
+def scrape_page() -> list[GeekbenchProcessorBenchmark]:
+    """
+    Scrape single-core and multi-core data separately and merge by processor name.
+    Returns:
+        list of GeekbenchProcessorBenchmark
+    """
+    return parse_benchmarks_page(get_page(BASE_URL).soup)
+
+
+def get_benchmark_list_hash(benchmark_list: list[GeekbenchProcessorBenchmark]) -> str:
+    """
+    Return SHA-256 hash of the parsed benchmarks, sorted by CPU model.
+
+    The raw HTML differs between requests even when the data does not, so the
+    records are hashed to detect changes.
+    """
+    record_list = sorted((asdict(x) for x in benchmark_list), key=lambda x: x["cpu_model"])
+    content = json.dumps(record_list, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
+
+if __name__ == "__main__":
     print(json.dumps([asdict(x) for x in scrape_page()], indent=2, ensure_ascii=False))
@@ -1,15 +1,20 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-import requests
-from bs4 import BeautifulSoup
+from utils.core.geekbench.geekbench_http import get_browser_url, http_get
+from utils.core.geekbench.geekbench_parse_pool import free_soup
 
-BASE_URL = "https://browser.geekbench.com/v6/cpu/{cpu_result_id}"
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
-}
+BASE_URL = get_browser_url("/v6/cpu/{cpu_result_id}")
 
 
-@dataclass
+@dataclass(slots=True)
+class GeekbenchWorkloadScore:
+    core_type: str
+    workload: str
+    score: int | None
+    description: str
+
+
+@dataclass(slots=True)
 class GeekbenchProcessorDetail:
     cpu_result_id: int
     title: str | None
@@ -23,6 +28,128 @@ class GeekbenchProcessorDetail:
     memory_info: dict[str, str]
     single_core_benchmarks: dict[str, dict[str, str]]
     multi_core_benchmarks: dict[str, dict[str, str]]
+    # Benchmarks of both tables with numeric scores, one per (core_type, workload)
+    workload_scores: list[GeekbenchWorkloadScore] = field(default_factory=list)
+
+
+def parse_table(soup, index: int) -> dict[str, str]:
+    """Extract a key-value table based on class 'system-table' by index."""
+    data = {}
+    rows = soup.select("table.system-table")[index].select("tbody tr")
+    for row in rows:
+        cells = row.find_all("td")
+        if len(cells) == 2:
+            key = cells[0].get_text(strip=True)
+            value = cells[1].get_text(strip=True)
+            data[key] = value
+    return data
+
+
+def parse_benchmark_table(table) -> dict[str, dict[str, str]]:
+    benchmarks = {}
+    for row in table.select("tbody tr"):
+        name_tag = row.find("td", class_="name")
+        score_tag = row.find("td", class_="score")
+        desc_tag = row.find("span", class_="description")
+        if name_tag and score_tag:
+            name = name_tag.get_text(strip=True)
+            score = score_tag.contents[0].strip()
+            description = desc_tag.get_text(strip=True) if desc_tag else ""
+            benchmarks[name] = {"score": score, "description": description}
+    return benchmarks
+
+
+def parse_score(score: str | None) -> int | None:
+    """Parse a score like '2,345' to an int, or None if it is not a number."""
+    if not score:
+        return None
+    try:
+        return int(score.replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def to_workload_score_list(
+    benchmarks: dict[str, dict[str, str]],
+    core_type: str,
+) -> list[GeekbenchWorkloadScore]:
+    return [
+        GeekbenchWorkloadScore(
+            core_type=core_type,
+            workload=workload,
+            score=parse_score(benchmark["score"]),
+            description=benchmark["description"],
+        )
+        for workload, benchmark in benchmarks.items()
+    ]
+
+
+def parse_detail_page(cpu_result_id: int | str, content: bytes) -> GeekbenchProcessorDetail:
+    """
+    Parse a detail page.
+
+    Module-level so it can run in the parse pool, see `geekbench_parse_pool`.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+
+    # Extract title
+    title = soup.title.string.strip() if soup.title else None
+
+    # Extract scores
+    score_tags = soup.select(".score-container .score")
+    single_core_score = score_tags[0].text.strip() if len(score_tags) > 0 else None
+    multi_core_score = score_tags[1].text.strip() if len(score_tags) > 1 else None
+
+    # Upload date and views
+    def get_value(label: str) -> str | None:
+        td = soup.find("td", class_="system-name", string=label)
+        return td.find_next_sibling("td").get_text(strip=True) if td else None
+
+    upload_date = get_value("Upload Date")
+    views = get_value("Views")
+
+    # System / CPU / Memory tables (by known indexes)
+    system_info = parse_table(soup, 1)
+    cpu_info = parse_table(soup, 2)
+    memory_info = parse_table(soup, 3)
+
+    cpu_codename = cpu_info.get("Codename")
+    # cpu_model = cpu_info.get("Name")
+
+    # Benchmarks
+    benchmark_tables = soup.select("table.benchmark-table")
+    single_core_benchmarks = (
+        parse_benchmark_table(benchmark_tables[0])
+        if len(benchmark_tables) > 0
+        else {}
+    )
+    multi_core_benchmarks = (
+        parse_benchmark_table(benchmark_tables[1])
+        if len(benchmark_tables) > 1
+        else {}
+    )
+    free_soup(soup)
+
+    return GeekbenchProcessorDetail(
+        cpu_result_id=cpu_result_id,
+        title=title,
+        upload_date=upload_date,
+        views=views,
+        cpu_codename=cpu_codename,
+        single_core_score=single_core_score,
+        multi_core_score=multi_core_score,
+        system_info=system_info,
+        cpu_info=cpu_info,
+        memory_info=memory_info,
+        single_core_benchmarks=single_core_benchmarks,
+        multi_core_benchmarks=multi_core_benchmarks,
+        workload_scores=(
+            to_workload_score_list(single_core_benchmarks, "single_core")
+            + to_workload_score_list(multi_core_benchmarks, "multi_core")
+        ),
+    )
 
 
 class GeekbenchProcessorDetailScraper:
@@ -38,86 +165,13 @@ class GeekbenchProcessorDetailScraper:
     def _get_detail_url(self) -> str:
         return BASE_URL.format(cpu_result_id=self.cpu_result_id)
 
-    def _parse_table(self, soup, index: int) -> dict[str, str]:
-        """Extract a key-value table based on class 'system-table' by index."""
-        data = {}
-        rows = soup.select("table.system-table")[index].select("tbody tr")
-        for row in rows:
-            cells = row.find_all("td")
-            if len(cells) == 2:
-                key = cells[0].get_text(strip=True)
-                value = cells[1].get_text(strip=True)
-                data[key] = value
-        return data
-
-    def _parse_benchmark_table(self, table) -> dict[str, dict[str, str]]:
-        benchmarks = {}
-        for row in table.select("tbody tr"):
-            name_tag = row.find("td", class_="name")
-            score_tag = row.find("td", class_="score")
-            desc_tag = row.find("span", class_="description")
-            if name_tag and score_tag:
-                name = name_tag.get_text(strip=True)
-                score = score_tag.contents[0].strip()
-                description = desc_tag.get_text(strip=True) if desc_tag else ""
-                benchmarks[name] = {"score": score, "description": description}
-        return benchmarks
+    def fetch_detail_page(self) -> bytes:
+        """Download the detail page without parsing it."""
+        response = http_get(self._get_detail_url())
+        return response.content
 
     def scrape_detail_page(self) -> GeekbenchProcessorDetail:
-        response = requests.get(self._get_detail_url(), headers=HEADERS)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Extract title
-        title = soup.title.string.strip() if soup.title else None
-
-        # Extract scores
-        score_tags = soup.select(".score-container .score")
-        single_core_score = score_tags[0].text.strip() if len(score_tags) > 0 else None
-        multi_core_score = score_tags[1].text.strip() if len(score_tags) > 1 else None
-
-        # Upload date and views
-        def get_value(label: str) -> str | None:
-            td = soup.find("td", class_="system-name", string=label)
-            return td.find_next_sibling("td").get_text(strip=True) if td else None
-
-        upload_date = get_value("Upload Date")
-        views = get_value("Views")
-
-        # System / CPU / Memory tables (by known indexes)
-        system_info = self._parse_table(soup, 1)
-        cpu_info = self._parse_table(soup, 2)
-        memory_info = self._parse_table(soup, 3)
-
-        cpu_codename = cpu_info.get("Codename")
-        # cpu_model = cpu_info.get("Name")
-
-        # Benchmarks
-        benchmark_tables = soup.select("table.benchmark-table")
-        single_core_benchmarks = (
-            self._parse_benchmark_table(benchmark_tables[0])
-            if len(benchmark_tables) > 0
-            else {}
-        )
-        multi_core_benchmarks = (
-            self._parse_benchmark_table(benchmark_tables[1])
-            if len(benchmark_tables) > 1
-            else {}
-        )
-
-        return GeekbenchProcessorDetail(
-            cpu_result_id=self.cpu_result_id,
-            title=title,
-            upload_date=upload_date,
-            views=views,
-            cpu_codename=cpu_codename,
-            single_core_score=single_core_score,
-            multi_core_score=multi_core_score,
-            system_info=system_info,
-            cpu_info=cpu_info,
-            memory_info=memory_info,
-            single_core_benchmarks=single_core_benchmarks,
-            multi_core_benchmarks=multi_core_benchmarks,
-        )
+        return parse_detail_page(self.cpu_result_id, self.fetch_detail_page())
 
 
 # Example usage:
@@ -3,28 +3,77 @@ Scrape the names of CPUs from the latest results and benchmarks pages.
 
 The latest results page is the page that contains the latest 100 pages of CPUs.
 The benchmarks page is the page that contains the benchmarks of common used CPUs.
+
+Latest results are ordered from newest to oldest by `cpu_result_id`. Given the
+newest `cpu_result_id` seen by the previous run, paging stops once that ID is
+reached, so only new pages are fetched.
 """
 
-import requests
-from bs4 import BeautifulSoup
+from __future__ import annotations
+
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from utils.core.geekbench.geekbench_http import get_browser_url, http_get
+from utils.core.geekbench.geekbench_page_cache import get_page
+from utils.core.geekbench.geekbench_parse_pool import free_soup
+from utils.metrics_utility import PARSE_DURATION
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 # For latest 100 pages of results of CPUs. Parameters: page
-LATEST_RESULTS_URL = "https://browser.geekbench.com/v6/cpu?page={page}"
+LATEST_RESULTS_URL = get_browser_url("/v6/cpu?page={page}")
 
 # For benchmarks of common used CPUs. Only one page.
-BENCHMARKS_URL = "https://browser.geekbench.com/processor-benchmarks"
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36",
-}
+BENCHMARKS_URL = get_browser_url("/processor-benchmarks")
 
 TOTAL_PAGES_OF_LATEST_RESULTS = 100
 
+# Number of latest results pages fetched at the same time
+MAX_CONCURRENT_PAGES = 8
+
+
+def parse_latest_results_page(content: bytes | str) -> list[tuple[int | None, str | None]]:
+    """Return (cpu_result_id, cpu_model) of each entry on a latest results page."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+    entry_list = []
+    for entry in soup.select("div.list-col-inner"):
+        cpu_info = entry.select_one("span.list-col-model")
+        cpu_lines = cpu_info.text.strip().split("\n") if cpu_info else []
+        cpu_model = cpu_lines[0].strip() if len(cpu_lines) > 0 else None
+
+        result_a = entry.select_one("a[href^='/v6/cpu/']")
+        cpu_result_id_text = result_a["href"].split("/")[-1] if result_a else ""
+        cpu_result_id = int(cpu_result_id_text) if cpu_result_id_text.isdigit() else None
+
+        entry_list.append((cpu_result_id, cpu_model))
+    free_soup(soup)
+    return entry_list
+
+
+def parse_benchmarks_page_cpu_models(soup: BeautifulSoup) -> list[str]:
+    """Return CPU models listed on the processor-benchmarks page."""
+    cpu_model_set = set()
+    for entry in soup.select("tbody tr td.name"):
+        cpu_model = entry.select_one("a").text.strip()
+        cpu_model_set.add(cpu_model)
+
+    return list(cpu_model_set)
+
 
 class GeekbenchProcessorNameScraper:
     def __init__(self) -> None:
         self._total_pages = TOTAL_PAGES_OF_LATEST_RESULTS
 
+        # Newest `cpu_result_id` seen on the latest results pages
+        self.latest_cpu_result_id = None
+        self._latest_cpu_result_id_lock = threading.Lock()
+
     def _get_latest_results_url(self, page: int) -> str:
         return LATEST_RESULTS_URL.format(page=page)
 
@@ -32,20 +81,59 @@ class GeekbenchProcessorNameScraper:
         """Get the total number of pages available for the CPU."""
         return self._total_pages
 
-    def scrape_latest_results_page(self, page: int) -> list[str]:
-        response = requests.get(
-            self._get_latest_results_url(page),
-            headers=HEADERS,
-        )
-        soup = BeautifulSoup(response.text, "html.parser")
-        cpu_model_set = set()
-        for entry in soup.select("div.list-col-inner"):
-            cpu_info = entry.select_one("span.list-col-model")
-            cpu_lines = cpu_info.text.strip().split("\n") if cpu_info else []
-            cpu_model = cpu_lines[0].strip() if len(cpu_lines) > 0 else None
-            cpu_model_set.add(cpu_model)
+    def _scrape_latest_results_entries(self, page: int) -> list[tuple[int | None, str | None]]:
+        """Return (cpu_result_id, cpu_model) of each entry on a latest results page."""
+        response = http_get(self._get_latest_results_url(page))
+        with PARSE_DURATION.labels("parse_latest_results_page").time():
+            entry_list = parse_latest_results_page(response.text)
+        self._update_latest_cpu_result_id(entry_list)
+        return entry_list
+
+    def _scrape_latest_results_entries_of_pages(
+        self, page_list: list[int],
+    ) -> dict[int, list[tuple[int | None, str | None]]]:
+        """Fetch latest results pages concurrently. Returns a dict with page as key."""
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PAGES) as executor:
+            return dict(
+                zip(page_list, executor.map(self._scrape_latest_results_entries, page_list))
+            )
+
+    def _update_latest_cpu_result_id(
+        self, entry_list: list[tuple[int | None, str | None]],
+    ) -> None:
+        cpu_result_id_list = [
+            cpu_result_id for cpu_result_id, _ in entry_list if cpu_result_id is not None
+        ]
+        if not cpu_result_id_list:
+            return
+        with self._latest_cpu_result_id_lock:
+            if self.latest_cpu_result_id is None:
+                self.latest_cpu_result_id = max(cpu_result_id_list)
+            else:
+                self.latest_cpu_result_id = max(self.latest_cpu_result_id, *cpu_result_id_list)
 
-        return list(cpu_model_set)
+    @staticmethod
+    def _collect_new_entries(
+        entry_list: list[tuple[int | None, str | None]],
+        last_seen_cpu_result_id: int,
+        new_entry_list: list[tuple[int | None, str | None]],
+    ) -> bool:
+        """
+        Append entries newer than `last_seen_cpu_result_id` to `new_entry_list`.
+
+        Returns True if any entry was already seen (or the page is empty),
+        which means no further page is needed.
+        """
+        page_new_entry_list = [
+            (cpu_result_id, cpu_model)
+            for cpu_result_id, cpu_model in entry_list
+            if cpu_result_id is None or cpu_result_id > last_seen_cpu_result_id
+        ]
+        new_entry_list.extend(page_new_entry_list)
+        return len(page_new_entry_list) < len(entry_list) or not entry_list
+
+    def scrape_latest_results_page(self, page: int) -> list[str]:
+        return list({cpu_model for _, cpu_model in self._scrape_latest_results_entries(page)})
 
     def scrape_latest_results_multiple_pages(
         self, start_page: int = 1, end_page: int | None = None
@@ -58,28 +146,111 @@ class GeekbenchProcessorNameScraper:
         if end_page > TOTAL_PAGES_OF_LATEST_RESULTS:
             end_page = TOTAL_PAGES_OF_LATEST_RESULTS
 
-        all_results = []
-        for page in range(start_page, end_page + 1):
-            results = self.scrape_latest_results_page(page)
-            all_results.extend(results)
+        entries_of_pages = self._scrape_latest_results_entries_of_pages(
+            list(range(start_page, end_page + 1)),
+        )
 
-        return list(set(all_results))
+        return list(
+            {
+                cpu_model
+                for entry_list in entries_of_pages.values()
+                for _, cpu_model in entry_list
+            }
+        )
 
-    def scrape_benchmarks_page(self) -> list[str]:
-        response = requests.get(BENCHMARKS_URL, headers=HEADERS)
-        soup = BeautifulSoup(response.text, "html.parser")
-        cpu_model_set = set()
-        for entry in soup.select("tbody tr td.name"):
-            cpu_model = entry.select_one("a").text.strip()
-            cpu_model_set.add(cpu_model)
+    def scrape_latest_results_until_cpu_result_id(
+        self,
+        last_seen_cpu_result_id: int | None,
+        known_cpu_model_set: set[str] | None = None,
+    ) -> list[str]:
+        """
+        Scrape latest results pages until reaching `last_seen_cpu_result_id`.
+
+        Page 1 is fetched first. The number of remaining pages is estimated from
+        the gap between its oldest ID and `last_seen_cpu_result_id`, and those
+        pages are fetched concurrently. If the estimation falls short, the next
+        `MAX_CONCURRENT_PAGES` pages are fetched until the ID is reached.
+
+        Returns CPU models of results newer than `last_seen_cpu_result_id`
+        which are not in `known_cpu_model_set`.
+        If `last_seen_cpu_result_id` is None, all pages are scraped.
+        """
+        if last_seen_cpu_result_id is None:
+            cpu_model_list = self.scrape_latest_results_multiple_pages()
+        else:
+            new_entry_list = []
+            entry_list = self._scrape_latest_results_entries(1)
+            is_reached = self._collect_new_entries(
+                entry_list, last_seen_cpu_result_id, new_entry_list,
+            )
 
-        return list(cpu_model_set)
+            # Estimate remaining pages from the ID gap, assuming IDs are dense
+            cpu_result_id_list = [x for x, _ in entry_list if x is not None]
+            batch_pages = (
+                math.ceil((min(cpu_result_id_list) - last_seen_cpu_result_id) / len(entry_list))
+                if cpu_result_id_list
+                else MAX_CONCURRENT_PAGES
+            )
+
+            last_page = 1
+            while not is_reached and last_page < TOTAL_PAGES_OF_LATEST_RESULTS:
+                page_list = list(
+                    range(
+                        last_page + 1,
+                        min(last_page + max(batch_pages, 1), TOTAL_PAGES_OF_LATEST_RESULTS) + 1,
+                    )
+                )
+                print(f"Fetching latest results pages {page_list[0]}-{page_list[-1]}")
+                entries_of_pages = self._scrape_latest_results_entries_of_pages(page_list)
+                for page in page_list:
+                    last_page = page
+                    is_reached = self._collect_new_entries(
+                        entries_of_pages[page], last_seen_cpu_result_id, new_entry_list,
+                    )
+                    if is_reached:
+                        break
+                batch_pages = MAX_CONCURRENT_PAGES
+
+            print(
+                f"Scraped {last_page} latest results pages, "
+                f"{len(new_entry_list)} results newer than {last_seen_cpu_result_id}",
+            )
+            cpu_model_list = list({cpu_model for _, cpu_model in new_entry_list})
+
+        if known_cpu_model_set is None:
+            return cpu_model_list
+        return [
+            cpu_model
+            for cpu_model in cpu_model_list
+            if cpu_model is not None and cpu_model not in known_cpu_model_set
+        ]
+
+    def scrape_benchmarks_page(self) -> list[str]:
+        # Shared with `geekbench_processor_benchmark_scraper.scrape_page`
+        return parse_benchmarks_page_cpu_models(get_page(BENCHMARKS_URL).soup)
 
     def scrape_all_cpu_models(self) -> list[str]:
         latest_results_cpu_model_list = self.scrape_latest_results_multiple_pages()
         benchmarks_cpu_model_list = self.scrape_benchmarks_page()
         return list(set(latest_results_cpu_model_list + benchmarks_cpu_model_list))
 
+    def scrape_new_cpu_models(
+        self,
+        last_seen_cpu_result_id: int | None,
+        known_cpu_model_set: set[str],
+    ) -> list[str]:
+        """Return CPU models not in `known_cpu_model_set` since `last_seen_cpu_result_id`."""
+        latest_results_cpu_model_list = self.scrape_latest_results_until_cpu_result_id(
+            last_seen_cpu_result_id,
+            known_cpu_model_set,
+        )
+        benchmarks_cpu_model_list = [
+            cpu_model
+            for cpu_model in self.scrape_benchmarks_page()
+            if cpu_model not in known_cpu_model_set
+        ]
+        return list(set(latest_results_cpu_model_list + benchmarks_cpu_model_list))
+
 
 if __name__ == "__main__":
     scraper = GeekbenchProcessorNameScraper()
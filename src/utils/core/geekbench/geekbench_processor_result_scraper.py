@@ -1,17 +1,33 @@
+"""
+Scrape search results of a CPU model.
+
+`iter_pages()` yields the results of each page as soon as it is parsed, and
+pages are only fetched as the iterator is consumed. Results are kept as
+`__slots__` records for one page at a time, then converted to an Arrow record
+batch, so memory of a long crawl grows with the compact columns only.
+"""
+
+import os
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from datetime import datetime
 
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import pyarrow as pa
+
+from utils.core.geekbench.geekbench_http import get_browser_url, http_get
+from utils.core.geekbench.geekbench_parse_pool import free_soup, parse_in_pool
+from utils.metrics_utility import PARSE_DURATION
+
+BASE_URL = get_browser_url("/search")
 
-BASE_URL = "https://browser.geekbench.com/search"
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
-}
+# Pages fetched ahead when scraping until the offset date. The next page is
+# downloaded while the current one is parsed, and at most this many pages
+# past the offset date are fetched for nothing.
+GEEKBENCH_OFFSET_DATE_PREFETCH_PAGES = int(os.getenv("GEEKBENCH_OFFSET_DATE_PREFETCH_PAGES", "2"))
 
 
-@dataclass
+@dataclass(slots=True)
 class GeekbenchProcessorResult:
     cpu_result_id: int | None
     system: str | None
@@ -24,6 +40,171 @@ class GeekbenchProcessorResult:
     multi_core_score: int | None
 
 
+RESULT_ARROW_SCHEMA = pa.schema(
+    [
+        ("cpu_result_id", pa.int64()),
+        ("system", pa.string()),
+        ("cpu_model", pa.string()),
+        ("frequency", pa.string()),
+        ("cores", pa.int64()),
+        ("uploaded", pa.timestamp("us")),
+        ("platform", pa.string()),
+        ("single_core_score", pa.int64()),
+        ("multi_core_score", pa.int64()),
+    ]
+)
+
+
+def to_result_record_batch(result_list: list[GeekbenchProcessorResult]) -> pa.RecordBatch:
+    """Return `result_list` as a record batch of `RESULT_ARROW_SCHEMA`."""
+    return pa.RecordBatch.from_arrays(
+        [
+            # from_pandas treats NaT of unparsable upload dates as null
+            pa.array([getattr(result, field.name) for result in result_list], type=field.type, from_pandas=True)
+            for field in RESULT_ARROW_SCHEMA
+        ],
+        schema=RESULT_ARROW_SCHEMA,
+    )
+
+
+def to_result_df(record_batch_iter: Iterable[pa.RecordBatch]) -> pd.DataFrame:
+    """Concatenate record batches of results into a DataFrame, columns of GeekbenchProcessorResult."""
+    return pa.Table.from_batches(record_batch_iter, schema=RESULT_ARROW_SCHEMA).to_pandas()
+
+
+def parse_cpu_info(
+    cpu_info_text: str,
+) -> tuple[str | None, str | None, int | None]:
+    """
+    Extract cpu_model, cpu_freq, and cpu_cores from raw <span> content.
+    Example: entry.select_one("span.list-col-model")
+
+    Handles patterns like:
+    - AMD Athlon 200GE\n3200 MHz\n(2 cores)
+    - Intel Xeon E5-2618L v3\n\n2294 MHz\n(8 cores)
+    """
+    lines = [line.strip() for line in cpu_info_text.splitlines() if line.strip()]
+
+    cpu_model = lines[0] if len(lines) > 0 else None
+    cpu_freq = lines[1] if len(lines) > 1 else None
+    cpu_cores = None
+    if len(lines) > 2 and "core" in lines[2]:
+        try:
+            cpu_cores = int(
+                lines[2]
+                .replace("(", "")
+                .replace("cores", "")
+                .replace("core", "")
+                .replace(")", "")
+                .strip()
+            )
+        except ValueError:
+            pass
+
+    return cpu_model, cpu_freq, cpu_cores
+
+
+def parse_entry(entry) -> tuple:
+    system_a = entry.select_one("a[href^='/v6/cpu/']")
+    system = system_a.text.strip() if system_a else None
+    cpu_result_id_url = (
+        system_a["href"] if system_a and system_a.has_attr("href") else None
+    )
+    cpu_result_id = (
+        int(cpu_result_id_url.split("/")[-1]) if cpu_result_id_url else None
+    )
+
+    cpu_info_text = entry.select_one("span.list-col-model").text
+    cpu_model, cpu_freq, cpu_cores = parse_cpu_info(cpu_info_text)
+
+    uploaded_text = entry.select_one(
+        "span.list-col-subtitle:-soup-contains('Uploaded') + span"
+    )
+    # Some date string be like "Feb 28, 2023\n\nrdelossantos"
+    date_str = (
+        uploaded_text.text.strip().split("\n")[0].strip() if uploaded_text else None
+    )
+    uploaded = pd.to_datetime(date_str, errors="coerce") if date_str else None
+
+    platform_text = entry.select_one(
+        "span.list-col-subtitle:-soup-contains('Platform') + span"
+    )
+    platform = platform_text.text.strip() if platform_text else None
+    single_core_score = entry.select_one(
+        "span.list-col-subtitle-score:-soup-contains('Single-Core Score') + span"
+    )
+    multi_core_score = entry.select_one(
+        "span.list-col-subtitle-score:-soup-contains('Multi-Core Score') + span"
+    )
+
+    # Convert scores to integers using isdigit()
+    single_score = None
+    if single_core_score:
+        score_text = single_core_score.text.strip().replace(",", "")
+        single_score = int(score_text) if score_text.isdigit() else None
+
+    multi_score = None
+    if multi_core_score:
+        score_text = multi_core_score.text.strip().replace(",", "")
+        multi_score = int(score_text) if score_text.isdigit() else None
+
+    # Same field order as GeekbenchProcessorResult
+    return (
+        cpu_result_id,
+        system,
+        cpu_model,
+        cpu_freq,
+        cpu_cores,
+        uploaded,
+        platform,
+        single_score,
+        multi_score,
+    )
+
+
+def parse_result_page(content: bytes) -> list[tuple]:
+    """
+    Parse a search result page into compact tuples of GeekbenchProcessorResult fields.
+
+    Module-level and returns plain tuples, so it can run in the parse pool.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+    result_div = soup.select('div[class="row"] div[class="col-12 col-lg-9"] div')[1]
+    entries = result_div.select('div[class="col-12 list-col"]')
+
+    row_list = [parse_entry(entry) for entry in entries]
+    free_soup(soup)
+    return row_list
+
+
+def parse_total_pages(content: bytes | str) -> int:
+    """Return the last page number of the pagination of a search result page, 1 if none."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+
+    # Find pagination info
+    pagination = soup.select_one("ul.pagination")
+    if not pagination:
+        return 1
+
+    # Get the last page number from pagination
+    page_links = pagination.select("li.page-item a.page-link")
+    if not page_links:
+        return 1
+
+    try:
+        return max(
+            int(link.text.strip())
+            for link in page_links
+            if link.text.strip().isdigit()
+        )
+    except ValueError:
+        return 1
+
+
 class GeekbenchProcessorResultScraper:
     def __init__(
         self,
@@ -35,6 +216,9 @@ class GeekbenchProcessorResultScraper:
         self._total_pages = None
         self.max_pages = max_pages
 
+        # Number of HTTP requests sent, used to measure crawl budget
+        self.request_count = 0
+
         # CPU results are shown from latest to older.
         # If `offset` is set, the crawler will stop when detected uploaded date > `offset`
         # no matter what `max_pages` set.
@@ -54,124 +238,14 @@ class GeekbenchProcessorResultScraper:
     def _get_params(self, page: int) -> dict[str, str]:
         return {"q": self.cpu_name, "page": str(page)}
 
-    def _get_cpu_info(
-        self, cpu_info_text: str
-    ) -> tuple[str | None, str | None, int | None]:
-        """
-        Extract cpu_model, cpu_freq, and cpu_cores from raw <span> content.
-        Example: entry.select_one("span.list-col-model")
-
-        Handles patterns like:
-        - AMD Athlon 200GE\n3200 MHz\n(2 cores)
-        - Intel Xeon E5-2618L v3\n\n2294 MHz\n(8 cores)
-        """
-        lines = [line.strip() for line in cpu_info_text.splitlines() if line.strip()]
-
-        cpu_model = lines[0] if len(lines) > 0 else None
-        cpu_freq = lines[1] if len(lines) > 1 else None
-        cpu_cores = None
-        if len(lines) > 2 and "core" in lines[2]:
-            try:
-                cpu_cores = int(
-                    lines[2]
-                    .replace("(", "")
-                    .replace("cores", "")
-                    .replace("core", "")
-                    .replace(")", "")
-                    .strip()
-                )
-            except ValueError:
-                pass
-
-        return cpu_model, cpu_freq, cpu_cores
-
-    def _parse_entry(self, entry) -> GeekbenchProcessorResult:
-        system_a = entry.select_one("a[href^='/v6/cpu/']")
-        system = system_a.text.strip() if system_a else None
-        cpu_result_id_url = (
-            system_a["href"] if system_a and system_a.has_attr("href") else None
-        )
-        cpu_result_id = (
-            int(cpu_result_id_url.split("/")[-1]) if cpu_result_id_url else None
-        )
-
-        cpu_info_text = entry.select_one("span.list-col-model").text
-        cpu_model, cpu_freq, cpu_cores = self._get_cpu_info(cpu_info_text)
-
-        uploaded_text = entry.select_one(
-            "span.list-col-subtitle:-soup-contains('Uploaded') + span"
-        )
-        # Some date string be like "Feb 28, 2023\n\nrdelossantos"
-        date_str = (
-            uploaded_text.text.strip().split("\n")[0].strip() if uploaded_text else None
-        )
-        uploaded = pd.to_datetime(date_str, errors="coerce") if date_str else None
-
-        platform_text = entry.select_one(
-            "span.list-col-subtitle:-soup-contains('Platform') + span"
-        )
-        platform = platform_text.text.strip() if platform_text else None
-        single_core_score = entry.select_one(
-            "span.list-col-subtitle-score:-soup-contains('Single-Core Score') + span"
-        )
-        multi_core_score = entry.select_one(
-            "span.list-col-subtitle-score:-soup-contains('Multi-Core Score') + span"
-        )
-
-        # Convert scores to integers using isdigit()
-        single_score = None
-        if single_core_score:
-            score_text = single_core_score.text.strip().replace(",", "")
-            single_score = int(score_text) if score_text.isdigit() else None
-
-        multi_score = None
-        if multi_core_score:
-            score_text = multi_core_score.text.strip().replace(",", "")
-            multi_score = int(score_text) if score_text.isdigit() else None
-
-        return GeekbenchProcessorResult(
-            cpu_result_id=cpu_result_id,
-            system=system,
-            cpu_model=cpu_model,
-            frequency=cpu_freq,
-            cores=cpu_cores,
-            uploaded=uploaded,
-            platform=platform,
-            single_core_score=single_score,
-            multi_core_score=multi_score,
-        )
-
     def get_total_pages(self) -> int:
         """Get the total number of pages available for the CPU."""
         if self._total_pages is not None:
             return self._total_pages
 
-        response = requests.get(
-            self._get_base_url(), headers=HEADERS, params=self._get_params(1)
-        )
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Find pagination info
-        pagination = soup.select_one("ul.pagination")
-        if not pagination:
-            self._total_pages = 1
-            return self._total_pages
-
-        # Get the last page number from pagination
-        page_links = pagination.select("li.page-item a.page-link")
-        if not page_links:
-            self._total_pages = 1
-            return self._total_pages
-
-        try:
-            self._total_pages = max(
-                int(link.text.strip())
-                for link in page_links
-                if link.text.strip().isdigit()
-            )
-        except ValueError:
-            self._total_pages = 1
-
+        response = http_get(self._get_base_url(), params=self._get_params(1))
+        self.request_count += 1
+        self._total_pages = parse_total_pages(response.text)
         return self._total_pages
 
     def get_max_pages(self) -> int:
@@ -181,33 +255,35 @@ class GeekbenchProcessorResultScraper:
             )
             return min(self.get_total_pages(), self.max_pages)
 
+    def fetch_page(self, page: int) -> bytes:
+        """Download a single page of results without parsing it."""
+        response = http_get(self._get_base_url(), params=self._get_params(page))
+        self.request_count += 1
+        return response.content
+
     def scrape_page(self, page: int) -> list[GeekbenchProcessorResult]:
         """Scrape a single page of results."""
-        response = requests.get(
-            self._get_base_url(),
-            headers=HEADERS,
-            params=self._get_params(page),
-        )
-        soup = BeautifulSoup(response.text, "html.parser")
-        result_div = soup.select('div[class="row"] div[class="col-12 col-lg-9"] div')[1]
-        entries = result_div.select('div[class="col-12 list-col"]')
+        content = self.fetch_page(page)
+        with PARSE_DURATION.labels("parse_result_page").time():
+            return [GeekbenchProcessorResult(*row) for row in parse_result_page(content)]
 
-        return [self._parse_entry(entry) for entry in entries]
-
-    def scrape_multiple_pages(
+    def iter_pages(
         self,
         start_page: int = 1,
         end_page: int | None = None,
-    ) -> pd.DataFrame:
+        max_pending: int | None = None,
+    ) -> Iterator[list[GeekbenchProcessorResult]]:
         """
-        Scrape multiple pages of results.
+        Yield the results of each page from `start_page` to `end_page`, in order.
+
+        Pages are downloaded as the iterator is consumed and parsed in the parse
+        pool, at most `max_pending` pages ahead (see `parse_in_pool`), so
+        stopping the iteration stops the crawl.
 
         Args:
             start_page: The page number to start scraping from (default: 1)
             end_page: The page number to end scraping at (default: None, will scrape all pages)
-
-        Returns:
-            DataFrame containing all scraped results
+            max_pending: Pages fetched ahead of the one yielded, 1 to fetch and parse the next page only when asked
         """
         if end_page is None:
             end_page = self.get_total_pages()
@@ -217,12 +293,32 @@ class GeekbenchProcessorResultScraper:
         if end_page > self.get_total_pages():
             end_page = self.get_total_pages()
 
-        all_results = []
-        for page in range(start_page, end_page + 1):
-            results = self.scrape_page(page)
-            all_results.extend(results)
+        for row_list in parse_in_pool(
+            parse_result_page,
+            ((self.fetch_page(page),) for page in range(start_page, end_page + 1)),
+            max_pending=max_pending,
+        ):
+            yield [GeekbenchProcessorResult(*row) for row in row_list]
+
+    def scrape_multiple_pages(
+        self,
+        start_page: int = 1,
+        end_page: int | None = None,
+    ) -> pd.DataFrame:
+        """
+        Scrape multiple pages of results.
+
+        Args:
+            start_page: The page number to start scraping from (default: 1)
+            end_page: The page number to end scraping at (default: None, will scrape all pages)
 
-        return pd.DataFrame([vars(result) for result in all_results])
+        Returns:
+            DataFrame containing all scraped results
+        """
+        return to_result_df(
+            to_result_record_batch(result_list)
+            for result_list in self.iter_pages(start_page, end_page)
+        )
 
     def scrape_multiple_pages_until_max_page(self) -> pd.DataFrame:
         if self.max_pages is None:
@@ -238,26 +334,22 @@ class GeekbenchProcessorResultScraper:
         if self.offset_date is None:
             return self.scrape_multiple_pages()
 
-        start_page = 1
-        end_page = self.get_total_pages()
-        all_results = []
-
-        for page in range(start_page, end_page + 1):
-            results = self.scrape_page(page)
+        record_batch_list = []
 
+        # Pages past the offset date are not needed, only prefetch a small window
+        # and discard the pages fetched ahead once the offset date is reached
+        for results in self.iter_pages(max_pending=GEEKBENCH_OFFSET_DATE_PREFETCH_PAGES):
             # Separate valid vs too-old results
             filtered_results = [
                 r for r in results if not r.uploaded or r.uploaded >= self.offset_date
             ]
+            record_batch_list.append(to_result_record_batch(filtered_results))
 
             # If any results were filtered out due to being too old, break
             if len(filtered_results) < len(results):
-                all_results.extend(filtered_results)
                 break
 
-            all_results.extend(filtered_results)
-
-        return pd.DataFrame([vars(result) for result in all_results])
+        return to_result_df(record_batch_list)
 
 
 # Example usage
@@ -0,0 +1,176 @@
+"""
+Compute the score report locally from a Parquet mirror of the BigQuery tables.
+
+Produces the same columns as `mart_average_score_and_benchmark_score` with
+vectorized pandas groupbys, without a BigQuery round trip:
+    - Mean, population stddev, min/max and the trimmed mean (excluding the min
+      and the max of each score) match BigQuery within rounding.
+    - The median is an exact discrete median (the lower middle value, like
+      DuckDB `quantile_disc`), while BigQuery uses `APPROX_QUANTILES`. Both
+      return a score of a result, never the average of the two middle values.
+
+The mirror is a directory of `{table_name}.parquet` files, one per table in
+`PARQUET_MIRROR_TABLE_COLUMNS`, written by `bigquery_helper.export_tables_to_parquet`.
+It is exported again once older than `GEEKBENCH_REPORT_PARQUET_MIRROR_TTL_HOURS`.
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEEKBENCH_REPORT_PARQUET_MIRROR_DIR = os.getenv(
+    "GEEKBENCH_REPORT_PARQUET_MIRROR_DIR", "/tmp/geekbench_report_mirror"
+)
+# Results are synced daily at most, so a mirror of the last day is up to date
+GEEKBENCH_REPORT_PARQUET_MIRROR_TTL_HOURS = float(
+    os.getenv("GEEKBENCH_REPORT_PARQUET_MIRROR_TTL_HOURS", "24")
+)
+
+# Only the columns used by the report are mirrored
+PARQUET_MIRROR_TABLE_COLUMNS = {
+    "cpu_model_results": ["cpu_model_id", "single_core_score", "multi_core_score", "uploaded"],
+    "cpu_model_names": ["cpu_model_id", "cpu_model"],
+    "cpu_model_benchmarks": ["cpu_model", "single_core_score", "multi_core_score"],
+    "cpu_model_details": ["cpu_model_id", "cpu_codename"],
+}
+
+SCORE_REPORT_COLUMNS = [
+    "cpu_codename",
+    "cpu_model",
+    "median_single_core_score",
+    "median_multi_core_score",
+    "benchmark_single_core_score",
+    "benchmark_multi_core_score",
+    "mean_single_core_score",
+    "mean_multi_core_score",
+    "trimmed_mean_single_core_score",
+    "trimmed_mean_multi_core_score",
+    "max_single_core_score",
+    "min_multi_core_score",
+    "stddev_single_core_score",
+    "stddev_multi_core_score",
+    "max_uploaded",
+    "min_uploaded",
+    "data_count",
+]
+
+
+def get_parquet_mirror_path(table_name: str, mirror_dir: str | None = None) -> str:
+    return os.path.join(mirror_dir or GEEKBENCH_REPORT_PARQUET_MIRROR_DIR, f"{table_name}.parquet")
+
+
+def parquet_mirror_exists(mirror_dir: str | None = None) -> bool:
+    return all(
+        os.path.exists(get_parquet_mirror_path(table_name, mirror_dir))
+        for table_name in PARQUET_MIRROR_TABLE_COLUMNS
+    )
+
+
+def parquet_mirror_is_fresh(
+    ttl_hours: float = GEEKBENCH_REPORT_PARQUET_MIRROR_TTL_HOURS,
+    mirror_dir: str | None = None,
+) -> bool:
+    """Return whether every mirror file exists and was exported less than `ttl_hours` ago."""
+    if not parquet_mirror_exists(mirror_dir):
+        return False
+    # Files are replaced atomically on export, so the modification time is the export time
+    exported_at = min(
+        os.path.getmtime(get_parquet_mirror_path(table_name, mirror_dir))
+        for table_name in PARQUET_MIRROR_TABLE_COLUMNS
+    )
+    return time.time() - exported_at < ttl_hours * 60 * 60
+
+
+def _read_parquet_mirror(table_name: str, mirror_dir: str | None = None) -> pd.DataFrame:
+    return pd.read_parquet(
+        get_parquet_mirror_path(table_name, mirror_dir),
+        columns=PARQUET_MIRROR_TABLE_COLUMNS[table_name],
+    )
+
+
+def _round(series: pd.Series) -> pd.Series:
+    """Round half away from zero like BigQuery `ROUND`, numpy rounds half to even."""
+    values = series.astype("float64")
+    return np.sign(values) * np.floor(np.abs(values) + 0.5)
+
+
+def _get_score_stats_df(results_df: pd.DataFrame, score_column: str) -> pd.DataFrame:
+    score_stats_df = results_df.groupby("cpu_model_id")[score_column].agg(
+        ["mean", "min", "max", "sum", "count"],
+    )
+    # Discrete median like `quantile_disc`, pandas `median` averages the two middle values
+    score_stats_df["median"] = results_df.groupby("cpu_model_id")[score_column].quantile(
+        0.5,
+        interpolation="lower",
+    )
+    # Population stddev like STDDEV_POP
+    score_stats_df["stddev"] = results_df.groupby("cpu_model_id")[score_column].std(ddof=0)
+    score_stats_df["trimmed_mean"] = (
+        (score_stats_df["sum"] - score_stats_df["min"] - score_stats_df["max"])
+        / (score_stats_df["count"] - 2)
+    ).where(score_stats_df["count"] > 2)
+    return score_stats_df
+
+
+def compute_score_report_from_parquet(mirror_dir: str | None = None) -> pd.DataFrame:
+    """Return the same report as `get_score_report_from_df`, computed from the Parquet mirror."""
+    results_df = _read_parquet_mirror("cpu_model_results", mirror_dir)
+    results_df["single_core_score"] = results_df["single_core_score"].astype("float64")
+    results_df["multi_core_score"] = results_df["multi_core_score"].astype("float64")
+
+    single_stats_df = _get_score_stats_df(results_df, "single_core_score")
+    multi_stats_df = _get_score_stats_df(results_df, "multi_core_score")
+    uploaded_stats_df = results_df.groupby("cpu_model_id").agg(
+        max_uploaded=("uploaded", "max"),
+        min_uploaded=("uploaded", "min"),
+        data_count=("uploaded", "size"),
+    )
+
+    report_df = pd.DataFrame(
+        {
+            "mean_single_core_score": _round(single_stats_df["mean"]),
+            "stddev_single_core_score": _round(single_stats_df["stddev"]),
+            "median_single_core_score": _round(single_stats_df["median"]),
+            "trimmed_mean_single_core_score": _round(single_stats_df["trimmed_mean"]),
+            "mean_multi_core_score": _round(multi_stats_df["mean"]),
+            "stddev_multi_core_score": _round(multi_stats_df["stddev"]),
+            "median_multi_core_score": _round(multi_stats_df["median"]),
+            "trimmed_mean_multi_core_score": _round(multi_stats_df["trimmed_mean"]),
+            "max_single_core_score": _round(single_stats_df["max"]),
+            "min_multi_core_score": _round(multi_stats_df["min"]),
+        },
+    ).join(uploaded_stats_df).reset_index()
+
+    names_df = _read_parquet_mirror("cpu_model_names", mirror_dir)
+    benchmarks_df = _read_parquet_mirror("cpu_model_benchmarks", mirror_dir).rename(
+        columns={
+            "single_core_score": "benchmark_single_core_score",
+            "multi_core_score": "benchmark_multi_core_score",
+        },
+    )
+    benchmarks_df["benchmark_single_core_score"] = _round(benchmarks_df["benchmark_single_core_score"])
+    benchmarks_df["benchmark_multi_core_score"] = _round(benchmarks_df["benchmark_multi_core_score"])
+    codename_df = (
+        _read_parquet_mirror("cpu_model_details", mirror_dir)
+        .groupby("cpu_model_id", as_index=False)["cpu_codename"]
+        .max()
+    )
+
+    report_df = (
+        report_df.merge(names_df, on="cpu_model_id", how="left")
+        .merge(benchmarks_df, on="cpu_model", how="left")
+        .merge(codename_df, on="cpu_model_id", how="left")
+    )
+
+    # Same order as `order by cpu_codename desc, cpu_model`, BigQuery puts NULLs last for `desc`
+    return (
+        report_df.sort_values(
+            ["cpu_codename", "cpu_model"], ascending=[False, True], na_position="last", kind="stable",
+        )
+        .reset_index(drop=True)[SCORE_REPORT_COLUMNS]
+    )
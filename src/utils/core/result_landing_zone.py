@@ -0,0 +1,214 @@
+"""
+Parquet landing zone of scraped CPU model results.
+
+Flushes of the result sync are written to `GEEKBENCH_RESULT_LANDING_ZONE_URI`
+(a local path or an object-store URI such as `gs://bucket/prefix`) instead of
+being loaded one by one:
+    - `staging/run_id=<run_id>/`: files of each flush of a run not finished yet.
+    - `results/uploaded_month=<first day>/model_shard=<n>/`: rows of finished runs, sorted
+      by `cpu_model_id` and `uploaded`, with row groups sized for scanning. This is
+      the replayable raw history, see `read_landing_zone_results`.
+
+At the end of a run, the staged rows are bulk loaded to `cpu_model_results` once,
+then published to `results/`. Each partition written by the run is compacted into
+one file, so a partition does not pile up one small file per run.
+"""
+
+import os
+import uuid
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEEKBENCH_RESULT_LANDING_ZONE_URI = os.getenv(
+    "GEEKBENCH_RESULT_LANDING_ZONE_URI", "/tmp/geekbench_result_landing_zone"
+)
+
+# Shard of a model is `cpu_model_id % MODEL_SHARD_COUNT`, a power of two
+MODEL_SHARD_COUNT = 16
+
+# ~20 MB of compressed results per row group
+MAX_ROWS_PER_GROUP = 1024 * 1024
+MIN_ROWS_PER_GROUP = 64 * 1024
+
+# Columns of `cpu_model_results`
+RESULT_SCHEMA = pa.schema(
+    [
+        ("cpu_result_id", pa.int64()),
+        ("frequency", pa.string()),
+        ("cores", pa.int64()),
+        ("uploaded", pa.timestamp("us")),
+        ("platform", pa.string()),
+        ("single_core_score", pa.int64()),
+        ("multi_core_score", pa.int64()),
+        ("cpu_model_id", pa.int64()),
+        ("system_id", pa.int64()),
+    ]
+)
+
+# A month of one shard is large enough to fill row groups, a day of one shard is not
+PARTITION_SCHEMA = pa.schema([("uploaded_month", pa.date32()), ("model_shard", pa.int32())])
+
+
+def _get_partitioning():
+    # pyarrow.dataset is not loaded by pandas, import it only when reading or writing
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+
+def _get_filesystem_and_path(uri: str | None = None) -> tuple[pyarrow.fs.FileSystem, str]:
+    uri = uri or GEEKBENCH_RESULT_LANDING_ZONE_URI
+    if "://" not in uri:
+        uri = os.path.abspath(uri)
+    return pyarrow.fs.FileSystem.from_uri(uri)
+
+
+def new_run_id() -> str:
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def _to_result_table(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(
+        df[RESULT_SCHEMA.names], schema=RESULT_SCHEMA, preserve_index=False,
+    )
+
+
+def stage_results(df: pd.DataFrame, run_id: str, uri: str | None = None) -> None:
+    """Write one flush of `run_id` to the staging area."""
+    filesystem, path = _get_filesystem_and_path(uri)
+    staging_path = f"{path}/staging/run_id={run_id}"
+    filesystem.create_dir(staging_path, recursive=True)
+    with filesystem.open_output_stream(f"{staging_path}/{uuid.uuid4().hex}.parquet") as f:
+        pq.write_table(_to_result_table(df), f)
+    print(f"Staged {len(df)} rows of run {run_id} to {staging_path}")
+
+
+def read_staged_results(run_id: str, uri: str | None = None) -> pa.Table:
+    """Return distinct rows staged by `run_id`, or an empty table."""
+    filesystem, path = _get_filesystem_and_path(uri)
+    staging_path = f"{path}/staging/run_id={run_id}"
+    if filesystem.get_file_info(staging_path).type != pyarrow.fs.FileType.Directory:
+        return RESULT_SCHEMA.empty_table()
+    import pyarrow.dataset as ds
+
+    table = ds.dataset(
+        staging_path, schema=RESULT_SCHEMA, format="parquet", filesystem=filesystem,
+    ).to_table()
+    # A model crawled again after a resume is staged twice
+    return table.group_by(RESULT_SCHEMA.names).aggregate([]).select(RESULT_SCHEMA.names)
+
+
+def _compact_partition(
+    filesystem: pyarrow.fs.FileSystem, partition_path: str, run_id: str,
+) -> None:
+    """
+    Rewrite the files of one partition into a single file.
+
+    The compacted file is written before the others are deleted: if interrupted in between,
+    rows are duplicated until the next compaction of the partition drops them.
+    """
+    file_info_list = [
+        file_info
+        for file_info in filesystem.get_file_info(pyarrow.fs.FileSelector(partition_path))
+        if file_info.type == pyarrow.fs.FileType.File and file_info.path.endswith(".parquet")
+    ]
+    if len(file_info_list) <= 1:
+        return
+
+    table = pa.concat_tables(
+        pq.read_table(file_info.path, schema=RESULT_SCHEMA, filesystem=filesystem)
+        for file_info in file_info_list
+    )
+    table = (
+        table.group_by(RESULT_SCHEMA.names)
+        .aggregate([])
+        .select(RESULT_SCHEMA.names)
+        .sort_by([("cpu_model_id", "ascending"), ("uploaded", "ascending")])
+    )
+    compacted_path = f"{partition_path}/{run_id}-compacted.parquet"
+    with filesystem.open_output_stream(compacted_path) as f:
+        pq.write_table(table, f, row_group_size=MAX_ROWS_PER_GROUP)
+    for file_info in file_info_list:
+        if file_info.path != compacted_path:
+            filesystem.delete_file(file_info.path)
+
+
+def publish_staged_results(run_id: str, table: pa.Table, uri: str | None = None) -> None:
+    """
+    Write the staged rows of `run_id` to the partitioned history, then drop the staging area.
+
+    File names are derived from `run_id`, so publishing the same run again overwrites its files.
+    Partitions written by the run are compacted with the files of earlier runs.
+    """
+    import pyarrow.dataset as ds
+
+    filesystem, path = _get_filesystem_and_path(uri)
+    if table.num_rows > 0:
+        table = table.sort_by([("cpu_model_id", "ascending"), ("uploaded", "ascending")])
+        uploaded_date = pc.cast(table["uploaded"], pa.date32())
+        table = table.append_column(
+            "uploaded_month",
+            pc.cast(pc.floor_temporal(uploaded_date, unit="month"), pa.date32()),
+        ).append_column(
+            "model_shard", pc.cast(pc.bit_wise_and(table["cpu_model_id"], MODEL_SHARD_COUNT - 1), pa.int32()),
+        )
+        partition_path_set = set()
+        ds.write_dataset(
+            table,
+            f"{path}/results",
+            format="parquet",
+            filesystem=filesystem,
+            partitioning=_get_partitioning(),
+            basename_template=f"{run_id}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=MAX_ROWS_PER_GROUP,
+            min_rows_per_group=MIN_ROWS_PER_GROUP,
+            file_visitor=lambda written_file: partition_path_set.add(
+                written_file.path.rsplit("/", 1)[0],
+            ),
+        )
+        for partition_path in sorted(partition_path_set):
+            _compact_partition(filesystem, partition_path, run_id)
+        print(
+            f"Published {table.num_rows} rows of run {run_id} to {path}/results "
+            f"({len(partition_path_set)} partitions)"
+        )
+
+    staging_path = f"{path}/staging/run_id={run_id}"
+    if filesystem.get_file_info(staging_path).type == pyarrow.fs.FileType.Directory:
+        filesystem.delete_dir(staging_path)
+
+
+def read_landing_zone_results(
+    from_date: date | None = None,
+    cpu_model_id_list: list[int] | None = None,
+    uri: str | None = None,
+) -> pd.DataFrame:
+    """Replay published results, pruning partitions by upload date and model shard."""
+    import pyarrow.dataset as ds
+
+    filesystem, path = _get_filesystem_and_path(uri)
+    dataset = ds.dataset(
+        f"{path}/results", format="parquet", filesystem=filesystem, partitioning=_get_partitioning(),
+    )
+    filter_expression = None
+    if from_date is not None:
+        # Prune months, then drop the days of the first month before `from_date`
+        from_datetime = datetime.combine(from_date, datetime.min.time())
+        filter_expression = (
+            ds.field("uploaded_month") >= pa.scalar(from_date.replace(day=1), pa.date32())
+        ) & (ds.field("uploaded") >= pa.scalar(from_datetime, pa.timestamp("us")))
+    if cpu_model_id_list is not None:
+        model_filter = ds.field("model_shard").isin(
+            sorted({cpu_model_id % MODEL_SHARD_COUNT for cpu_model_id in cpu_model_id_list})
+        ) & ds.field("cpu_model_id").isin(cpu_model_id_list)
+        filter_expression = model_filter if filter_expression is None else filter_expression & model_filter
+    return dataset.to_table(columns=RESULT_SCHEMA.names, filter=filter_expression).to_pandas()
@@ -18,6 +18,125 @@ with base as (
 	from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_results`
 ),
 
+-- Main stats: mean, stddev, median, min/max, and counts
+with_stats as (
+	select
+		cpu_model_id,
+		AVG(single_core_score) as mean_single_core_score,
+		STDDEV_POP(single_core_score) as stddev_single_core_score,
+		APPROX_QUANTILES(single_core_score, 100)[OFFSET(50)] as median_single_core_score,
+		AVG(multi_core_score) as mean_multi_core_score,
+		STDDEV_POP(multi_core_score) as stddev_multi_core_score,
+		APPROX_QUANTILES(multi_core_score, 100)[OFFSET(50)] as median_multi_core_score,
+		MAX(single_core_score) as max_single_core_score,
+		MIN(single_core_score) as min_single_core_score,
+		SUM(single_core_score) as sum_single_core_score,
+		COUNT(single_core_score) as count_single_core_score,
+		MAX(multi_core_score) as max_multi_core_score,
+		MIN(multi_core_score) as min_multi_core_score,
+		SUM(multi_core_score) as sum_multi_core_score,
+		COUNT(multi_core_score) as count_multi_core_score,
+		MAX(uploaded) as max_uploaded,
+		MIN(uploaded) as min_uploaded,
+		COUNT(*) as data_count
+	from base
+	group by cpu_model_id
+),
+
+cpu_codename_dim as (
+	select
+		cpu_model_id,
+		max(cpu_codename) as cpu_codename
+	from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_details`
+	group by cpu_model_id
+),
+
+-- Final output: combine stats and model name
+final_table as (
+	select
+		dim.cpu_model,
+		detail.cpu_codename,
+		ROUND(s.mean_single_core_score) as mean_single_core_score,
+		ROUND(s.stddev_single_core_score) as stddev_single_core_score,
+		ROUND(s.median_single_core_score) as median_single_core_score,
+		-- Trimmed mean: exclude the min and the max of each score independently,
+		-- derived from the same aggregation pass without sorting
+		ROUND(IF(
+			s.count_single_core_score > 2,
+			(s.sum_single_core_score - s.min_single_core_score - s.max_single_core_score)
+				/ (s.count_single_core_score - 2),
+			NULL
+		)) as trimmed_mean_single_core_score,
+		ROUND(b.single_core_score) as benchmark_single_core_score,
+		ROUND(s.mean_multi_core_score) as mean_multi_core_score,
+		ROUND(s.stddev_multi_core_score) as stddev_multi_core_score,
+		ROUND(s.median_multi_core_score) as median_multi_core_score,
+		ROUND(IF(
+			s.count_multi_core_score > 2,
+			(s.sum_multi_core_score - s.min_multi_core_score - s.max_multi_core_score)
+				/ (s.count_multi_core_score - 2),
+			NULL
+		)) as trimmed_mean_multi_core_score,
+		ROUND(b.multi_core_score) as benchmark_multi_core_score,
+		ROUND(s.max_single_core_score) as max_single_core_score,
+		ROUND(s.min_multi_core_score) as min_multi_core_score,
+		s.max_uploaded,
+		s.min_uploaded,
+		s.data_count
+	from with_stats s
+	left join `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_names` dim
+		on s.cpu_model_id = dim.cpu_model_id
+	left join `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_benchmarks` b
+		on dim.cpu_model = b.cpu_model
+	left join cpu_codename_dim detail
+		on s.cpu_model_id = detail.cpu_model_id
+-- 	order by dim.cpu_model
+)
+
+select
+	cpu_codename,
+	cpu_model,
+	median_single_core_score,
+	median_multi_core_score,
+	benchmark_single_core_score,
+	benchmark_multi_core_score,
+	mean_single_core_score,
+	mean_multi_core_score,
+	trimmed_mean_single_core_score,
+	trimmed_mean_multi_core_score,
+	max_single_core_score,
+	min_multi_core_score,
+	stddev_single_core_score,
+	stddev_multi_core_score,
+	max_uploaded,
+	min_uploaded,
+	data_count
+from final_table
+-- Ties broken by model, so rows keep their position between runs for the sheet diff
+order by cpu_codename desc, cpu_model
+"""
+
+# DuckDB dialect of `sql` for `warehouse_backend.DuckDBBackend`: tables are in a schema
+# named after the dataset, and the median is exact.
+duckdb_sql = (
+    sql.replace(f"`{GEEKBENCH_REPORT_BIGQUERY_DATASET}.", f'"{GEEKBENCH_REPORT_BIGQUERY_DATASET}".')
+    .replace("`", "")
+    .replace("APPROX_QUANTILES(single_core_score, 100)[OFFSET(50)]", "quantile_disc(single_core_score, 0.5)")
+    .replace("APPROX_QUANTILES(multi_core_score, 100)[OFFSET(50)]", "quantile_disc(multi_core_score, 0.5)")
+)
+
+# Previous query with two row_number() windows for the trimmed mean.
+# It also drops rows extreme in only one score. Kept for `scripts/compare_mart_queries.py`.
+legacy_sql = f"""-- Base dataset: only the relevant columns
+with base as (
+	select
+		cpu_model_id,
+		single_core_score,
+		multi_core_score,
+		uploaded
+	from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_results`
+),
+
 -- Main stats: mean, stddev, median, min/max, and counts
 with_stats as (
 	select
@@ -119,7 +238,8 @@ select
 	min_uploaded,
 	data_count
 from final_table
-order by cpu_codename desc
+-- Ties broken by model, so rows keep their position between runs for the sheet diff
+order by cpu_codename desc, cpu_model
 """
 
 if __name__ == "__main__":
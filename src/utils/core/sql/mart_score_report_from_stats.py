@@ -0,0 +1,111 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEEKBENCH_REPORT_BIGQUERY_DATASET = os.getenv(
+    "GEEKBENCH_REPORT_BIGQUERY_DATASET", "geekbench_report"
+)
+
+# Same columns as `mart_average_score_and_benchmark_score`, read from the small
+# `cpu_model_score_stats` table instead of scanning `cpu_model_results`.
+sql = f"""-- Stats derived from sufficient statistics and quantile sketches
+with with_stats as (
+	select
+		cpu_model_id,
+		SAFE_DIVIDE(single_core_sum, single_core_count) as mean_single_core_score,
+		SQRT(GREATEST(
+			SAFE_DIVIDE(single_core_sum_squares, single_core_count)
+			- POW(SAFE_DIVIDE(single_core_sum, single_core_count), 2),
+			0
+		)) as stddev_single_core_score,
+		KLL_QUANTILES.EXTRACT_POINT_INT64(single_core_sketch, 0.5) as median_single_core_score,
+		-- Trimmed mean: exclude the min and the max of each score
+		IF(
+			single_core_count > 2,
+			(single_core_sum - single_core_min - single_core_max) / (single_core_count - 2),
+			NULL
+		) as trimmed_mean_single_core_score,
+		SAFE_DIVIDE(multi_core_sum, multi_core_count) as mean_multi_core_score,
+		SQRT(GREATEST(
+			SAFE_DIVIDE(multi_core_sum_squares, multi_core_count)
+			- POW(SAFE_DIVIDE(multi_core_sum, multi_core_count), 2),
+			0
+		)) as stddev_multi_core_score,
+		KLL_QUANTILES.EXTRACT_POINT_INT64(multi_core_sketch, 0.5) as median_multi_core_score,
+		IF(
+			multi_core_count > 2,
+			(multi_core_sum - multi_core_min - multi_core_max) / (multi_core_count - 2),
+			NULL
+		) as trimmed_mean_multi_core_score,
+		single_core_max as max_single_core_score,
+		multi_core_min as min_multi_core_score,
+		max_uploaded,
+		min_uploaded,
+		data_count
+	from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_score_stats`
+),
+
+cpu_codename_dim as (
+	select
+		cpu_model_id,
+		max(cpu_codename) as cpu_codename
+	from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_details`
+	group by cpu_model_id
+),
+
+-- Final output: combine stats and model name
+final_table as (
+	select
+		dim.cpu_model,
+		detail.cpu_codename,
+		ROUND(s.mean_single_core_score) as mean_single_core_score,
+		ROUND(s.stddev_single_core_score) as stddev_single_core_score,
+		ROUND(s.median_single_core_score) as median_single_core_score,
+		ROUND(s.trimmed_mean_single_core_score) as trimmed_mean_single_core_score,
+		ROUND(b.single_core_score) as benchmark_single_core_score,
+		ROUND(s.mean_multi_core_score) as mean_multi_core_score,
+		ROUND(s.stddev_multi_core_score) as stddev_multi_core_score,
+		ROUND(s.median_multi_core_score) as median_multi_core_score,
+		ROUND(s.trimmed_mean_multi_core_score) as trimmed_mean_multi_core_score,
+		ROUND(b.multi_core_score) as benchmark_multi_core_score,
+		ROUND(s.max_single_core_score) as max_single_core_score,
+		ROUND(s.min_multi_core_score) as min_multi_core_score,
+		s.max_uploaded,
+		s.min_uploaded,
+		s.data_count
+	from with_stats s
+	left join `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_names` dim
+		on s.cpu_model_id = dim.cpu_model_id
+	left join `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_benchmarks` b
+		on dim.cpu_model = b.cpu_model
+	left join cpu_codename_dim detail
+		on s.cpu_model_id = detail.cpu_model_id
+)
+
+select
+	cpu_codename,
+	cpu_model,
+	median_single_core_score,
+	median_multi_core_score,
+	benchmark_single_core_score,
+	benchmark_multi_core_score,
+	mean_single_core_score,
+	mean_multi_core_score,
+	trimmed_mean_single_core_score,
+	trimmed_mean_multi_core_score,
+	max_single_core_score,
+	min_multi_core_score,
+	stddev_single_core_score,
+	stddev_multi_core_score,
+	max_uploaded,
+	min_uploaded,
+	data_count
+from final_table
+-- Ties broken by model, so rows keep their position between runs for the sheet diff
+order by cpu_codename desc, cpu_model
+"""
+
+if __name__ == "__main__":
+    print(sql)
@@ -0,0 +1,133 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEEKBENCH_REPORT_BIGQUERY_DATASET = os.getenv(
+    "GEEKBENCH_REPORT_BIGQUERY_DATASET", "geekbench_report"
+)
+
+
+def _get_merge_sql(comment: str, source_filter: str) -> str:
+    """
+    Return a merge of the daily sketches of the results selected by `source_filter`.
+
+    Results without an upload date are kept in a bucket with a NULL
+    `uploaded_date`, so they are counted like in the full mart query.
+    """
+    return f"""-- {comment}
+merge `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_daily_score_sketches` t
+using (
+	select
+		r.cpu_model_id,
+		DATE(r.uploaded) as uploaded_date,
+		COUNT(*) as data_count,
+		COUNT(r.single_core_score) as single_core_count,
+		SUM(r.single_core_score) as single_core_sum,
+		SUM(CAST(r.single_core_score as FLOAT64) * r.single_core_score) as single_core_sum_squares,
+		MIN(r.single_core_score) as single_core_min,
+		MAX(r.single_core_score) as single_core_max,
+		KLL_QUANTILES.INIT_INT64(r.single_core_score) as single_core_sketch,
+		COUNT(r.multi_core_score) as multi_core_count,
+		SUM(r.multi_core_score) as multi_core_sum,
+		SUM(CAST(r.multi_core_score as FLOAT64) * r.multi_core_score) as multi_core_sum_squares,
+		MIN(r.multi_core_score) as multi_core_min,
+		MAX(r.multi_core_score) as multi_core_max,
+		KLL_QUANTILES.INIT_INT64(r.multi_core_score) as multi_core_sketch,
+		MIN(r.uploaded) as min_uploaded,
+		MAX(r.uploaded) as max_uploaded,
+		CURRENT_DATETIME() as refreshed_at
+	from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_results` r
+	{source_filter}
+	group by r.cpu_model_id, uploaded_date
+) s
+on t.cpu_model_id = s.cpu_model_id and t.uploaded_date is not distinct from s.uploaded_date
+when matched then update set
+	data_count = s.data_count,
+	single_core_count = s.single_core_count,
+	single_core_sum = s.single_core_sum,
+	single_core_sum_squares = s.single_core_sum_squares,
+	single_core_min = s.single_core_min,
+	single_core_max = s.single_core_max,
+	single_core_sketch = s.single_core_sketch,
+	multi_core_count = s.multi_core_count,
+	multi_core_sum = s.multi_core_sum,
+	multi_core_sum_squares = s.multi_core_sum_squares,
+	multi_core_min = s.multi_core_min,
+	multi_core_max = s.multi_core_max,
+	multi_core_sketch = s.multi_core_sketch,
+	min_uploaded = s.min_uploaded,
+	max_uploaded = s.max_uploaded,
+	refreshed_at = s.refreshed_at
+when not matched then insert (
+	cpu_model_id,
+	uploaded_date,
+	data_count,
+	single_core_count,
+	single_core_sum,
+	single_core_sum_squares,
+	single_core_min,
+	single_core_max,
+	single_core_sketch,
+	multi_core_count,
+	multi_core_sum,
+	multi_core_sum_squares,
+	multi_core_min,
+	multi_core_max,
+	multi_core_sketch,
+	min_uploaded,
+	max_uploaded,
+	refreshed_at
+) values (
+	s.cpu_model_id,
+	s.uploaded_date,
+	s.data_count,
+	s.single_core_count,
+	s.single_core_sum,
+	s.single_core_sum_squares,
+	s.single_core_min,
+	s.single_core_max,
+	s.single_core_sketch,
+	s.multi_core_count,
+	s.multi_core_sum,
+	s.multi_core_sum_squares,
+	s.multi_core_min,
+	s.multi_core_max,
+	s.multi_core_sketch,
+	s.min_uploaded,
+	s.max_uploaded,
+	s.refreshed_at
+)
+"""
+
+
+# Parameter `@refresh_ranges`: ARRAY<STRUCT<cpu_model_id INT64, from_date DATE>>.
+# A result sync scrapes every result uploaded on or after the last uploaded date
+# of a model, so each (model, day) on or after `from_date` is complete and can
+# be replaced instead of merged, which keeps the refresh idempotent.
+# The NULL upload date bucket holds every such result of the model, so it is rebuilt as a whole.
+sql = _get_merge_sql(
+    "Rebuild per (model, upload day) sufficient statistics and KLL sketches",
+    """join UNNEST(@refresh_ranges) refresh_range
+		on r.cpu_model_id = refresh_range.cpu_model_id
+		and (r.uploaded is null or DATE(r.uploaded) >= refresh_range.from_date)""",
+)
+
+# Every (model, upload day) with results but no daily sketch yet, e.g. results
+# loaded before the sketches were deployed. A model crawled after the deploy has
+# sketches of its new days only, its older days are backfilled here as well.
+# A day with a sketch is complete, as the refresh rebuilds whole days.
+backfill_sql = _get_merge_sql(
+    "Build daily sketches of (model, upload day) without any",
+    f"""where not exists (
+		select 1
+		from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_daily_score_sketches` d
+		where d.cpu_model_id = r.cpu_model_id
+			and d.uploaded_date is not distinct from DATE(r.uploaded)
+	)""",
+)
+
+if __name__ == "__main__":
+    print(sql)
+    print(backfill_sql)
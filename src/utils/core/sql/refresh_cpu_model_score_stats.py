@@ -0,0 +1,108 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEEKBENCH_REPORT_BIGQUERY_DATASET = os.getenv(
+    "GEEKBENCH_REPORT_BIGQUERY_DATASET", "geekbench_report"
+)
+
+sql = f"""-- Merge daily sketches only for CPU models with daily sketches refreshed after the merged ones
+merge `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_score_stats` t
+using (
+	with changed_cpu_model as (
+		select distinct
+			d.cpu_model_id
+		from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_daily_score_sketches` d
+		left join `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_score_stats` s
+			on d.cpu_model_id = s.cpu_model_id
+		where
+			s.cpu_model_id is null
+			or d.refreshed_at > s.refreshed_at
+	)
+
+	select
+		cpu_model_id,
+		SUM(data_count) as data_count,
+		SUM(single_core_count) as single_core_count,
+		SUM(single_core_sum) as single_core_sum,
+		SUM(single_core_sum_squares) as single_core_sum_squares,
+		MIN(single_core_min) as single_core_min,
+		MAX(single_core_max) as single_core_max,
+		KLL_QUANTILES.MERGE_PARTIAL(single_core_sketch) as single_core_sketch,
+		SUM(multi_core_count) as multi_core_count,
+		SUM(multi_core_sum) as multi_core_sum,
+		SUM(multi_core_sum_squares) as multi_core_sum_squares,
+		MIN(multi_core_min) as multi_core_min,
+		MAX(multi_core_max) as multi_core_max,
+		KLL_QUANTILES.MERGE_PARTIAL(multi_core_sketch) as multi_core_sketch,
+		MIN(min_uploaded) as min_uploaded,
+		MAX(max_uploaded) as max_uploaded,
+		-- Watermark of the merged daily sketches rather than the time of this job:
+		-- a sketch merge started before this job but committed after it has an
+		-- older `refreshed_at`, and is still picked up by the next refresh
+		MAX(refreshed_at) as refreshed_at
+	from `{GEEKBENCH_REPORT_BIGQUERY_DATASET}.cpu_model_daily_score_sketches`
+	where cpu_model_id in (select cpu_model_id from changed_cpu_model)
+	group by cpu_model_id
+) s
+on t.cpu_model_id = s.cpu_model_id
+when matched then update set
+	data_count = s.data_count,
+	single_core_count = s.single_core_count,
+	single_core_sum = s.single_core_sum,
+	single_core_sum_squares = s.single_core_sum_squares,
+	single_core_min = s.single_core_min,
+	single_core_max = s.single_core_max,
+	single_core_sketch = s.single_core_sketch,
+	multi_core_count = s.multi_core_count,
+	multi_core_sum = s.multi_core_sum,
+	multi_core_sum_squares = s.multi_core_sum_squares,
+	multi_core_min = s.multi_core_min,
+	multi_core_max = s.multi_core_max,
+	multi_core_sketch = s.multi_core_sketch,
+	min_uploaded = s.min_uploaded,
+	max_uploaded = s.max_uploaded,
+	refreshed_at = s.refreshed_at
+when not matched then insert (
+	cpu_model_id,
+	data_count,
+	single_core_count,
+	single_core_sum,
+	single_core_sum_squares,
+	single_core_min,
+	single_core_max,
+	single_core_sketch,
+	multi_core_count,
+	multi_core_sum,
+	multi_core_sum_squares,
+	multi_core_min,
+	multi_core_max,
+	multi_core_sketch,
+	min_uploaded,
+	max_uploaded,
+	refreshed_at
+) values (
+	s.cpu_model_id,
+	s.data_count,
+	s.single_core_count,
+	s.single_core_sum,
+	s.single_core_sum_squares,
+	s.single_core_min,
+	s.single_core_max,
+	s.single_core_sketch,
+	s.multi_core_count,
+	s.multi_core_sum,
+	s.multi_core_sum_squares,
+	s.multi_core_min,
+	s.multi_core_max,
+	s.multi_core_sketch,
+	s.min_uploaded,
+	s.max_uploaded,
+	s.refreshed_at
+)
+"""
+
+if __name__ == "__main__":
+    print(sql)
@@ -0,0 +1,443 @@
+"""
+Storage backends of the pipeline tables.
+
+`bigquery_helper` functions run on the backend selected by
+`GEEKBENCH_REPORT_WAREHOUSE`:
+    - `bigquery` (default): tables in the `GEEKBENCH_REPORT_BIGQUERY_DATASET` dataset.
+      Set `GEEKBENCH_REPORT_BQ_STORAGE_READ=true` to read query results as Arrow
+      record batches through the Storage Read API instead of the paginated REST
+      API (`pip install .[bqstorage]`).
+    - `duckdb`: an embedded DuckDB database at `GEEKBENCH_REPORT_DUCKDB_PATH`,
+      with tables in a schema of the same name as the dataset. Used to run and
+      profile the whole ingest and report path offline (`pip install duckdb`).
+
+Queries shared by both backends are written in the common subset of both
+dialects, with `@name` parameters and table names from `table_ref()`.
+Dialect-specific statements (dedup, sketch refresh, mart) are backend methods.
+
+Loads and statements are submitted as futures (`submit_*`): BigQuery jobs are
+polled by `bigquery_job_manager` in the background, DuckDB runs them at once.
+
+The client library of each backend is imported on first use, so importing this
+module (and every flow) does not load google-cloud-bigquery or duckdb.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from datetime import date, datetime
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING, Any, Literal
+
+import pandas as pd
+import pyarrow as pa
+from dotenv import load_dotenv
+
+from utils.core.bigquery_job_manager import BigQueryJobManager, get_job_manager
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
+load_dotenv()
+
+GEEKBENCH_REPORT_BIGQUERY_DATASET = os.getenv("GEEKBENCH_REPORT_BIGQUERY_DATASET", "geekbench_report")
+GEEKBENCH_REPORT_WAREHOUSE = os.getenv("GEEKBENCH_REPORT_WAREHOUSE", "bigquery")
+GEEKBENCH_REPORT_BQ_STORAGE_READ = os.getenv("GEEKBENCH_REPORT_BQ_STORAGE_READ", "false").lower() == "true"
+GEEKBENCH_REPORT_DUCKDB_PATH = os.getenv("GEEKBENCH_REPORT_DUCKDB_PATH", "/tmp/geekbench_report.duckdb")
+
+# Columns identifying a duplicated row of `cpu_model_results`
+CPU_MODEL_RESULT_KEY_COLUMNS = [
+    "cpu_result_id",
+    "system_id",
+    "cpu_model_id",
+    "frequency",
+    "cores",
+    "uploaded",
+    "platform",
+    "single_core_score",
+    "multi_core_score",
+]
+
+
+class WarehouseBackend(ABC):
+    name: str
+
+    @abstractmethod
+    def table_ref(self, table_name: str) -> str:
+        """Return `table_name` qualified and quoted for the SQL dialect of the backend."""
+
+    @abstractmethod
+    def submit_load_df(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: Literal["fail", "replace", "append"] = "fail",
+    ) -> Future:
+        """Load `df` to `table_name`, creating the table if it does not exist."""
+
+    def load_df(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: Literal["fail", "replace", "append"] = "fail",
+    ) -> None:
+        self.submit_load_df(df, table_name, if_exists).result()
+
+    @abstractmethod
+    def query_df(self, query: str, params: dict[str, Any] | None = None, label: str = "query") -> pd.DataFrame:
+        """Run a query with `@name` parameters and return the result."""
+
+    @abstractmethod
+    def query_arrow_batches(
+        self, query: str, params: dict[str, Any] | None = None, label: str = "query",
+    ) -> Iterator[pa.RecordBatch]:
+        """Run a query with `@name` parameters and yield the result as Arrow record batches."""
+
+    @abstractmethod
+    def submit_execute(self, query: str, params: dict[str, Any] | None = None, label: str = "execute") -> Future:
+        """Run a statement with `@name` parameters, the future returns the number of affected rows."""
+
+    def execute(self, query: str, params: dict[str, Any] | None = None) -> int | None:
+        return self.submit_execute(query, params).result()
+
+    @abstractmethod
+    def submit_dedup_cpu_model_results(self) -> Future:
+        """Keep one row per `CPU_MODEL_RESULT_KEY_COLUMNS` in `cpu_model_results`."""
+
+    @abstractmethod
+    def submit_refresh_cpu_model_daily_score_sketches(self, refresh_range_list: list[tuple[int, date]]) -> Future:
+        """The future returns the number of refreshed daily sketches."""
+
+    @abstractmethod
+    def submit_backfill_cpu_model_daily_score_sketches(self) -> Future:
+        """Build daily sketches of (CPU model, upload day) without any, the future returns the number of sketches."""
+
+    @abstractmethod
+    def submit_refresh_cpu_model_score_stats(self) -> Future:
+        """The future returns the number of refreshed CPU models."""
+
+    @abstractmethod
+    def get_score_report_df(self) -> pd.DataFrame:
+        pass
+
+
+class BigQueryBackend(WarehouseBackend):
+    name = "bigquery"
+
+    def __init__(
+        self,
+        dataset: str = GEEKBENCH_REPORT_BIGQUERY_DATASET,
+        use_storage_read: bool = GEEKBENCH_REPORT_BQ_STORAGE_READ,
+    ):
+        self.dataset = dataset
+        self.use_storage_read = use_storage_read
+        self._bqstorage_client = None
+        self.job_manager: BigQueryJobManager = get_job_manager()
+
+    def get_client(self) -> bigquery.Client:
+        from google.cloud import bigquery
+
+        return bigquery.Client()
+
+    def get_bqstorage_client(self):
+        """Return the shared Storage Read API client, or None to read through the REST API."""
+        if not self.use_storage_read:
+            return None
+        if self._bqstorage_client is None:
+            from google.cloud import bigquery_storage
+
+            self._bqstorage_client = bigquery_storage.BigQueryReadClient()
+        return self._bqstorage_client
+
+    def table_ref(self, table_name: str) -> str:
+        return f"`{self.dataset}.{table_name}`"
+
+    def submit_load_df(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: Literal["fail", "replace", "append"] = "fail",
+    ) -> Future:
+        from utils.bigquery_utility import load_dataframe_to_bigquery
+
+        # Map if_exists to write_disposition
+        write_disposition_map = {
+            "fail": "WRITE_EMPTY",
+            "replace": "WRITE_TRUNCATE",
+            "append": "WRITE_APPEND",
+        }
+        return self.job_manager.submit(
+            lambda: load_dataframe_to_bigquery(
+                bigquery_client=self.get_client(),
+                dataframe=df,
+                destination=f"{self.dataset}.{table_name}",
+                write_disposition=write_disposition_map.get(if_exists, "WRITE_EMPTY"),
+                wait=False,
+            ),
+            label=f"load {table_name}",
+            result_func=lambda job: None,
+        )
+
+    @staticmethod
+    def _to_query_parameter(name: str, value: Any) -> bigquery.ScalarQueryParameter:
+        from google.cloud import bigquery
+
+        # bool is a subclass of int, datetime is a subclass of date
+        if isinstance(value, bool):
+            return bigquery.ScalarQueryParameter(name, "BOOL", value)
+        if isinstance(value, int):
+            return bigquery.ScalarQueryParameter(name, "INT64", value)
+        if isinstance(value, float):
+            return bigquery.ScalarQueryParameter(name, "FLOAT64", value)
+        if isinstance(value, datetime):
+            return bigquery.ScalarQueryParameter(name, "DATETIME", value.strftime('%Y-%m-%d %H:%M:%S'))
+        if isinstance(value, date):
+            return bigquery.ScalarQueryParameter(name, "DATE", value)
+        return bigquery.ScalarQueryParameter(name, "STRING", str(value))
+
+    def _get_job_config(self, params: dict[str, Any] | None) -> bigquery.QueryJobConfig:
+        from google.cloud import bigquery
+
+        return bigquery.QueryJobConfig(
+            query_parameters=[
+                self._to_query_parameter(name, value) for name, value in (params or {}).items()
+            ]
+        )
+
+    def _run_query(self, query: str, params: dict[str, Any] | None, label: str) -> bigquery.QueryJob:
+        """Run a query and wait for it, recording the job like the submitted ones."""
+        submitted_at = time.time()
+        job = self.get_client().query(query, job_config=self._get_job_config(params))
+        try:
+            job.result()
+        except Exception:
+            self.job_manager.record_job(label, job, submitted_at, failed=True)
+            raise
+        self.job_manager.record_job(label, job, submitted_at)
+        return job
+
+    def query_df(self, query: str, params: dict[str, Any] | None = None, label: str = "query") -> pd.DataFrame:
+        return self._run_query(query, params, label).to_dataframe(
+            bqstorage_client=self.get_bqstorage_client(),
+            create_bqstorage_client=False,
+        )
+
+    def query_arrow_batches(
+        self, query: str, params: dict[str, Any] | None = None, label: str = "query",
+    ) -> Iterator[pa.RecordBatch]:
+        job = self._run_query(query, params, label)
+        yield from job.result().to_arrow_iterable(bqstorage_client=self.get_bqstorage_client())
+
+    def submit_execute(self, query: str, params: dict[str, Any] | None = None, label: str = "execute") -> Future:
+        job_config = self._get_job_config(params)
+        return self.job_manager.submit(
+            lambda: self.get_client().query(query, job_config=job_config),
+            label=label,
+            result_func=lambda job: job.num_dml_affected_rows,
+        )
+
+    def submit_dedup_cpu_model_results(self) -> Future:
+        # Use Create or Replace Logic as DELETE dedup is hard
+        table_ref = self.table_ref("cpu_model_results")
+        return self.submit_execute(f"""
+            CREATE OR REPLACE TABLE {table_ref} AS
+            SELECT * EXCEPT(rn)
+            FROM (
+                SELECT *,
+                    ROW_NUMBER() OVER (
+                        partition by {", ".join(CPU_MODEL_RESULT_KEY_COLUMNS)}
+                    ) as rn
+                FROM {table_ref}
+            )
+            WHERE rn = 1
+        """, label="dedup cpu_model_results")
+
+    def submit_refresh_cpu_model_daily_score_sketches(self, refresh_range_list: list[tuple[int, date]]) -> Future:
+        from google.cloud import bigquery
+
+        from utils.core.sql.refresh_cpu_model_daily_score_sketches import sql
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter(
+                    "refresh_ranges",
+                    "STRUCT",
+                    [
+                        bigquery.StructQueryParameter(
+                            None,
+                            bigquery.ScalarQueryParameter("cpu_model_id", "INT64", int(cpu_model_id)),
+                            bigquery.ScalarQueryParameter("from_date", "DATE", from_date),
+                        )
+                        for cpu_model_id, from_date in refresh_range_list
+                    ],
+                ),
+            ]
+        )
+        return self.job_manager.submit(
+            lambda: self.get_client().query(sql, job_config=job_config),
+            label="refresh cpu_model_daily_score_sketches",
+            result_func=lambda job: job.num_dml_affected_rows,
+        )
+
+    def submit_backfill_cpu_model_daily_score_sketches(self) -> Future:
+        from utils.core.sql.refresh_cpu_model_daily_score_sketches import backfill_sql
+        return self.submit_execute(backfill_sql, label="backfill cpu_model_daily_score_sketches")
+
+    def submit_refresh_cpu_model_score_stats(self) -> Future:
+        from utils.core.sql.refresh_cpu_model_score_stats import sql
+        return self.submit_execute(sql, label="refresh cpu_model_score_stats")
+
+    def get_score_report_df(self) -> pd.DataFrame:
+        from utils.core.sql.mart_score_report_from_stats import sql
+        return self.query_df(sql, label="score report")
+
+
+class DuckDBBackend(WarehouseBackend):
+    """
+    Embedded DuckDB implementation.
+
+    KLL sketches are BigQuery only, so the sketch and stats refreshes are
+    skipped and the report is computed by the full mart query.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, database_path: str = GEEKBENCH_REPORT_DUCKDB_PATH):
+        import duckdb
+
+        # Same schema name as the dataset, so the mart SQL translates directly
+        self.schema = GEEKBENCH_REPORT_BIGQUERY_DATASET
+        self.conn = duckdb.connect(database_path)
+        self.conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{self.schema}"')
+        # A DuckDB connection must not be used by several threads at the same time
+        self._lock = threading.Lock()
+
+    def table_ref(self, table_name: str) -> str:
+        return f'"{self.schema}"."{table_name}"'
+
+    def _table_exists(self, table_name: str) -> bool:
+        return bool(
+            self.conn.execute(
+                "SELECT count(*) FROM information_schema.tables WHERE table_schema = $schema AND table_name = $table_name",
+                {"schema": self.schema, "table_name": table_name},
+            ).fetchone()[0]
+        )
+
+    @staticmethod
+    def _run_to_future(func: Callable[[], Any]) -> Future:
+        future = Future()
+        try:
+            future.set_result(func())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def submit_load_df(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: Literal["fail", "replace", "append"] = "fail",
+    ) -> Future:
+        return self._run_to_future(lambda: self._load_df(df, table_name, if_exists))
+
+    def _load_df(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: Literal["fail", "replace", "append"],
+    ) -> None:
+        table_ref = self.table_ref(table_name)
+        with self._lock:
+            self.conn.register("load_df_view", df)
+            try:
+                if not self._table_exists(table_name) or if_exists == "replace":
+                    self.conn.execute(f"CREATE OR REPLACE TABLE {table_ref} AS SELECT * FROM load_df_view")
+                elif if_exists == "append":
+                    self.conn.execute(f"INSERT INTO {table_ref} BY NAME SELECT * FROM load_df_view")
+                elif self.conn.execute(f"SELECT count(*) FROM {table_ref}").fetchone()[0] == 0:
+                    self.conn.execute(f"INSERT INTO {table_ref} BY NAME SELECT * FROM load_df_view")
+                else:
+                    raise ValueError(f"Table {table_ref} is not empty.")
+            finally:
+                self.conn.unregister("load_df_view")
+
+    @staticmethod
+    def _to_duckdb_query(query: str, params: dict[str, Any] | None) -> str:
+        # DuckDB names parameters with `$`
+        for name in sorted(params or {}, key=len, reverse=True):
+            query = query.replace(f"@{name}", f"${name}")
+        return query
+
+    def query_df(self, query: str, params: dict[str, Any] | None = None, label: str = "query") -> pd.DataFrame:
+        with self._lock:
+            return self.conn.execute(self._to_duckdb_query(query, params), params or {}).df()
+
+    def query_arrow_batches(
+        self, query: str, params: dict[str, Any] | None = None, label: str = "query",
+    ) -> Iterator[pa.RecordBatch]:
+        with self._lock:
+            table = self.conn.execute(self._to_duckdb_query(query, params), params or {}).to_arrow_table()
+        yield from table.to_batches()
+
+    def submit_execute(self, query: str, params: dict[str, Any] | None = None, label: str = "execute") -> Future:
+        return self._run_to_future(lambda: self._execute(query, params))
+
+    def _execute(self, query: str, params: dict[str, Any] | None) -> int | None:
+        with self._lock:
+            result = self.conn.execute(self._to_duckdb_query(query, params), params or {}).fetchall()
+        # DML returns the number of affected rows as a single row
+        if len(result) == 1 and len(result[0]) == 1 and isinstance(result[0][0], int):
+            return result[0][0]
+        return None
+
+    def submit_dedup_cpu_model_results(self) -> Future:
+        table_ref = self.table_ref("cpu_model_results")
+        return self.submit_execute(f"""
+            CREATE OR REPLACE TABLE {table_ref} AS
+            SELECT * EXCLUDE (rn)
+            FROM (
+                SELECT *,
+                    ROW_NUMBER() OVER (
+                        partition by {", ".join(CPU_MODEL_RESULT_KEY_COLUMNS)}
+                    ) as rn
+                FROM {table_ref}
+            )
+            WHERE rn = 1
+        """)
+
+    def submit_refresh_cpu_model_daily_score_sketches(self, refresh_range_list: list[tuple[int, date]]) -> Future:
+        print("Daily score sketches are not supported on DuckDB, skipped.")
+        return self._run_to_future(lambda: 0)
+
+    def submit_backfill_cpu_model_daily_score_sketches(self) -> Future:
+        print("Daily score sketches are not supported on DuckDB, skipped.")
+        return self._run_to_future(lambda: 0)
+
+    def submit_refresh_cpu_model_score_stats(self) -> Future:
+        print("Score stats are not supported on DuckDB, skipped.")
+        return self._run_to_future(lambda: 0)
+
+    def get_score_report_df(self) -> pd.DataFrame:
+        from utils.core.sql.mart_average_score_and_benchmark_score import duckdb_sql
+        return self.query_df(duckdb_sql)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_warehouse_backend() -> WarehouseBackend:
+    """Return the backend selected by `GEEKBENCH_REPORT_WAREHOUSE`, shared by the process."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if GEEKBENCH_REPORT_WAREHOUSE == "bigquery":
+                _backend = BigQueryBackend()
+            elif GEEKBENCH_REPORT_WAREHOUSE == "duckdb":
+                _backend = DuckDBBackend()
+            else:
+                raise ValueError(f"Unknown GEEKBENCH_REPORT_WAREHOUSE: {GEEKBENCH_REPORT_WAREHOUSE}")
+        return _backend
@@ -3,16 +3,55 @@ Credential for Google Sheets.
 
 GoogleSheets API usage limits:
     https://developers.google.com/sheets/api/limits
+
+pygsheets and the Google API client are imported on first use, they are only
+needed when a report is published.
 """
 
-import google.auth
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
 import pandas as pd
-import pygsheets
-from pygsheets.client import Client
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from pygsheets.client import Client
+
+load_dotenv()
+
+# Snapshots of the last published values, see `publish_dataframes_to_google_sheets`
+GEEKBENCH_REPORT_SHEETS_SNAPSHOT_DIR = os.getenv(
+    "GEEKBENCH_REPORT_SHEETS_SNAPSHOT_DIR", "/tmp/geekbench_sheets_snapshot"
+)
+
+# A `spreadsheets.batchUpdate` is split in chunks of at most this payload, 2 MB is the recommended maximum
+GEEKBENCH_REPORT_SHEETS_MAX_REQUEST_BYTES = int(
+    os.getenv("GEEKBENCH_REPORT_SHEETS_MAX_REQUEST_BYTES", str(2 * 1024 * 1024))
+)
+# Chunks uploaded at the same time, each thread with its own client
+GEEKBENCH_REPORT_SHEETS_MAX_PARALLEL = int(os.getenv("GEEKBENCH_REPORT_SHEETS_MAX_PARALLEL", "4"))
+
+# Retries of a request failed with 429 or 5xx, with exponential backoff
+REQUEST_NUM_RETRIES = 5
+MAX_BACKOFF_SECONDS = 64
+RETRY_STATUS_SET = {429, 500, 502, 503, 504}
 
 
 def get_google_sheet_client() -> Client:
     """Get Google Sheets client using Application Default Credentials."""
+    import google.auth
+    import pygsheets
+
     scopes = [
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive",
@@ -45,53 +84,635 @@ def load_dataframe_to_google_sheets_worksheet(
     >>> print(df["object_col"].dtype == "object")  # True
     >>> print(df["float_col"].dtype == "object")  # False
 
+    Values and formats are sent with `spreadsheets.batchUpdate` (in chunks if
+    large), every cell is written, see `publish_dataframes_to_google_sheets`.
+
     :param start_address:   (2, 1) denote writing data from 2nd row and column A on Worksheet
     """
-    client = get_google_sheet_client()
-    spreadsheet = client.open_by_url(spreadsheet_url)
-    worksheet = spreadsheet.worksheet_by_title(worksheet_title)
-
-    # Used to generate a list of object-type-column range
-    # e.g. ["A2:A524", "B2:B524", "D2:D524"]
-    # worksheet.apply_format() effect only on row 2 to row 524 of column label A, etc.
-    # Column index start from 1, e.g. pygsheets.Address((0, 1)).label -> A
-    object_type_column_range_list = []
-    for column_number, column_type in enumerate(df.dtypes):
-        if column_type != "object":
+    publish_dataframes_to_google_sheets(
+        spreadsheet_url,
+        [WorksheetPublish(df, worksheet_title, start_address, copy_head=copy_head)],
+        use_snapshot=False,
+    )
+
+
+def e_gsheet_to_df(gsheet_url: str, worksheet_title: str | None = None) -> pd.DataFrame:
+    """Return DataFrame from a specified Google Sheets worksheet."""
+    gc = get_google_sheet_client()
+    sheet = gc.open_by_url(gsheet_url)
+    if worksheet_title:
+        return sheet.worksheet_by_title(worksheet_title).get_as_df(numerize=False)
+    return sheet.sheet1.get_as_df(numerize=False)
+
+
+@dataclass
+class SheetDiff:
+    # (row offset, column offset, values) of each changed block, offsets from the start address
+    block_list: list[tuple[int, int, list[list]]] = field(default_factory=list)
+    changed_rows: int = 0
+    changed_cells: int = 0
+    added_keys: int = 0
+    removed_keys: int = 0
+
+
+def is_object_type_column(column_type) -> bool:
+    # Strings are of the `str` dtype since pandas 3
+    return pd.api.types.is_object_dtype(column_type) or pd.api.types.is_string_dtype(column_type)
+
+
+def dataframe_to_sheet_values(df: pd.DataFrame, copy_head: bool = False) -> list[list]:
+    """
+    Return rows of JSON values, NULL as an empty string.
+
+    Values of object-type-columns and non-numbers are strings, so they are kept as text.
+    """
+    is_object_list = [is_object_type_column(column_type) for column_type in df.dtypes]
+    value_list = []
+    if copy_head:
+        value_list.append([str(column) for column in df.columns])
+    for row in df.astype(object).where(df.notna(), "").itertuples(index=False, name=None):
+        value_list.append(
+            [
+                value if isinstance(value, (str, bool, int, float)) and not (is_object and value != "")
+                else str(value)
+                for value, is_object in zip(row, is_object_list)
+            ]
+        )
+    return value_list
+
+
+def _get_changed_column_runs(previous_row: list | None, row: list, key_index: int | None) -> list[tuple[int, int]]:
+    """Return [start, end) of each run of changed columns, the whole row if the row is new or of another key."""
+    if previous_row is None or (key_index is not None and previous_row[key_index] != row[key_index]):
+        return [(0, len(row))]
+
+    run_list = []
+    for column_index, (previous_value, value) in enumerate(zip(previous_row, row)):
+        if previous_value == value:
+            continue
+        if run_list and run_list[-1][1] == column_index:
+            run_list[-1] = (run_list[-1][0], column_index + 1)
+        else:
+            run_list.append((column_index, column_index + 1))
+    return run_list
+
+
+def diff_sheet_values(
+    previous_value_list: list[list],
+    value_list: list[list],
+    key_index: int | None = None,
+) -> SheetDiff:
+    """
+    Compare values by position and return the blocks to write.
+
+    A row whose key differs from the published row at the same position is
+    rewritten entirely, otherwise only its changed cells are. Rows of the same
+    changed columns one after another are merged into one block, and rows beyond
+    the new values are cleared with empty strings.
+    """
+    sheet_diff = SheetDiff()
+    if not value_list and not previous_value_list:
+        return sheet_diff
+    width = len(value_list[0]) if value_list else len(previous_value_list[0])
+    if key_index is not None:
+        previous_key_set = {row[key_index] for row in previous_value_list}
+        key_set = {row[key_index] for row in value_list}
+        sheet_diff.added_keys = len(key_set - previous_key_set)
+        sheet_diff.removed_keys = len(previous_key_set - key_set)
+
+    # (start column, end column) -> index of the block ending at the previous row
+    open_block_map = {}
+    for row_index in range(max(len(previous_value_list), len(value_list))):
+        row = value_list[row_index] if row_index < len(value_list) else [""] * width
+        previous_row = previous_value_list[row_index] if row_index < len(previous_value_list) else None
+        run_list = _get_changed_column_runs(previous_row, row, key_index)
+        if run_list:
+            sheet_diff.changed_rows += 1
+
+        next_open_block_map = {}
+        for start_column, end_column in run_list:
+            sheet_diff.changed_cells += end_column - start_column
+            block_index = open_block_map.get((start_column, end_column))
+            if block_index is None:
+                sheet_diff.block_list.append((row_index, start_column, []))
+                block_index = len(sheet_diff.block_list) - 1
+            sheet_diff.block_list[block_index][2].append(row[start_column:end_column])
+            next_open_block_map[(start_column, end_column)] = block_index
+        open_block_map = next_open_block_map
+
+    return sheet_diff
+
+
+@dataclass
+class WorksheetPublish:
+    """DataFrame to publish to a worksheet, see `publish_dataframes_to_google_sheets`."""
+
+    df: pd.DataFrame
+    worksheet_title: str
+    # (2, 1) denote writing data from 2nd row and column A on Worksheet
+    start_address: tuple[int, int]
+    # Column identifying a row, e.g. "Processor name"
+    key_column: str | None = None
+    copy_head: bool = False
+    # Written once every other worksheet is published, e.g. the update time,
+    # and left out of the checkpoint so a rerun with a new value still resumes
+    publish_last: bool = False
+
+
+def get_spreadsheet_id(spreadsheet_url: str) -> str:
+    match = re.search(r"/spreadsheets/d/([a-zA-Z0-9-_]+)", spreadsheet_url)
+    if not match:
+        raise ValueError(f"Invalid spreadsheet URL: {spreadsheet_url}")
+    return match.group(1)
+
+
+def _get_snapshot_path(spreadsheet_id: str, worksheet_title: str) -> str:
+    return os.path.join(GEEKBENCH_REPORT_SHEETS_SNAPSHOT_DIR, spreadsheet_id, f"{worksheet_title}.json")
+
+
+def _read_snapshot(snapshot_path: str, start_address: tuple[int, int], columns: list[str]) -> dict | None:
+    """Return the last publish, or None if missing or published with another layout."""
+    if not os.path.exists(snapshot_path):
+        return None
+    with open(snapshot_path, "r") as f:
+        snapshot = json.load(f)
+    if snapshot["start_address"] != list(start_address) or snapshot["columns"] != columns:
+        return None
+    return snapshot
+
+
+def _write_snapshot(snapshot_path: str, snapshot: dict) -> None:
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    tmp_path = f"{snapshot_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, snapshot_path)
+
+
+def _get_sheet_property_map(client: Client, spreadsheet_id: str) -> dict[str, dict]:
+    """Return properties of each worksheet by title."""
+    response = execute_with_backoff(client.sheet.service.spreadsheets().get(
+        spreadsheetId=spreadsheet_id,
+        fields="sheets.properties(sheetId,title,gridProperties)",
+    ))
+    return {sheet["properties"]["title"]: sheet["properties"] for sheet in response["sheets"]}
+
+
+def _to_cell_data(value) -> dict:
+    # An empty CellData clears the cell
+    if value == "":
+        return {}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": value}}
+
+
+def _get_object_column_runs(df: pd.DataFrame) -> list[tuple[int, int]]:
+    """Return [start, end) of each run of object-type columns."""
+    run_list = []
+    for column_index, column_type in enumerate(df.dtypes):
+        if not is_object_type_column(column_type):
             continue
+        if run_list and run_list[-1][1] == column_index:
+            run_list[-1] = (run_list[-1][0], column_index + 1)
+        else:
+            run_list.append((column_index, column_index + 1))
+    return run_list
+
 
-        column_start_row_label = pygsheets.Address(
-            (start_address[0], column_number + 1),
-        ).label
-        column_end_row_label = pygsheets.Address(
-            (df.shape[0] + start_address[0] - 1, column_number + 1),
-        ).label
-        object_type_column_range_list.append(
-            f"{column_start_row_label}:{column_end_row_label}",
+def _build_worksheet_requests(
+    worksheet_publish: WorksheetPublish,
+    sheet_id: int,
+    row_count: int | None,
+    previous_value_list: list[list] | None,
+    value_list: list[list],
+) -> tuple[list[dict], SheetDiff, int]:
+    """Return requests of the worksheet, its diff and the row count of the grid after the update."""
+    import pygsheets
+
+    df = worksheet_publish.df
+    start_row_index = worksheet_publish.start_address[0] - 1
+    start_column_index = worksheet_publish.start_address[1] - 1
+    request_list = []
+
+    # The grid ends at the last row, so rows of a previous, longer report are removed
+    required_rows = max(start_row_index + len(value_list), start_row_index + 1)
+    if row_count != required_rows:
+        request_list.append(
+            {
+                "updateSheetProperties": {
+                    "properties": {"sheetId": sheet_id, "gridProperties": {"rowCount": required_rows}},
+                    "fields": "gridProperties.rowCount",
+                },
+            }
         )
 
-    # Upload Dataframe to let GoogleSheets generate new cells
-    worksheet.set_dataframe(df=df, start=start_address, copy_head=copy_head)
+    key_index = None
+    if worksheet_publish.key_column is not None and not worksheet_publish.copy_head:
+        key_index = [str(column) for column in df.columns].index(worksheet_publish.key_column)
+    sheet_diff = diff_sheet_values(
+        (previous_value_list or [])[:len(value_list)],
+        value_list,
+        key_index if previous_value_list is not None else None,
+    )
 
-    # Type of columns can be configured only if cells exist
-    if object_type_column_range_list:
-        worksheet.apply_format(
-            object_type_column_range_list,
-            format_info={
-                "numberFormat": {
-                    "type": pygsheets.FormatType.TEXT.value,
+    # Object-type-columns are configured to TEXT, only on rows written by this update
+    data_row_offset = 1 if worksheet_publish.copy_head else 0
+    object_column_run_list = _get_object_column_runs(df)
+    for row_offset, column_offset, block_value_list in sheet_diff.block_list:
+        block_start_row = max(row_offset, data_row_offset)
+        block_end_row = row_offset + len(block_value_list)
+        block_end_column = column_offset + len(block_value_list[0])
+        for start_column, end_column in object_column_run_list:
+            start_column, end_column = max(start_column, column_offset), min(end_column, block_end_column)
+            if block_start_row >= block_end_row or start_column >= end_column:
+                continue
+            request_list.append(
+                {
+                    "repeatCell": {
+                        "range": {
+                            "sheetId": sheet_id,
+                            "startRowIndex": start_row_index + block_start_row,
+                            "endRowIndex": start_row_index + block_end_row,
+                            "startColumnIndex": start_column_index + start_column,
+                            "endColumnIndex": start_column_index + end_column,
+                        },
+                        "cell": {"userEnteredFormat": {"numberFormat": {"type": pygsheets.FormatType.TEXT.value}}},
+                        "fields": "userEnteredFormat.numberFormat",
+                    },
+                }
+            )
+        request_list.append(
+            {
+                "updateCells": {
+                    "start": {
+                        "sheetId": sheet_id,
+                        "rowIndex": start_row_index + row_offset,
+                        "columnIndex": start_column_index + column_offset,
+                    },
+                    "rows": [
+                        {"values": [_to_cell_data(value) for value in row]}
+                        for row in block_value_list
+                    ],
+                    "fields": "userEnteredValue",
                 },
+            }
+        )
+
+    return request_list, sheet_diff, required_rows
+
+
+def execute_with_backoff(request):
+    """Execute a Sheets API request, retrying 429 and 5xx with exponential backoff and jitter."""
+    from googleapiclient.errors import HttpError
+
+    for attempt in range(REQUEST_NUM_RETRIES + 1):
+        try:
+            return request.execute()
+        except HttpError as e:
+            if e.resp.status not in RETRY_STATUS_SET or attempt == REQUEST_NUM_RETRIES:
+                raise
+            backoff_seconds = min(2 ** attempt, MAX_BACKOFF_SECONDS) + random.random()
+            print(f"Sheets API returned {e.resp.status}, retrying in {backoff_seconds:.1f}s...")
+            time.sleep(backoff_seconds)
+
+
+def _get_payload_bytes(obj) -> int:
+    return len(json.dumps(obj).encode())
+
+
+def _split_update_cells_request(request: dict, max_bytes: int) -> list[dict]:
+    """Split an `updateCells` request by rows, so each part is at most `max_bytes`."""
+    update_cells = request["updateCells"]
+    part_list = []
+    row_list = []
+    part_bytes = 0
+    part_start_row_index = update_cells["start"]["rowIndex"]
+    for row in update_cells["rows"]:
+        row_bytes = _get_payload_bytes(row) + 2
+        if row_list and part_bytes + row_bytes > max_bytes:
+            part_list.append((part_start_row_index, row_list))
+            part_start_row_index += len(row_list)
+            row_list = []
+            part_bytes = 0
+        row_list.append(row)
+        part_bytes += row_bytes
+    part_list.append((part_start_row_index, row_list))
+
+    return [
+        {
+            "updateCells": {
+                **update_cells,
+                "start": {**update_cells["start"], "rowIndex": start_row_index},
+                "rows": part_row_list,
             },
+        }
+        for start_row_index, part_row_list in part_list
+    ]
+
+
+def chunk_batch_update_requests(
+    request_list: list[dict],
+    max_bytes: int = GEEKBENCH_REPORT_SHEETS_MAX_REQUEST_BYTES,
+) -> tuple[list[dict], list[list[dict]]]:
+    """
+    Return grid requests, then chunks of cell requests of at most `max_bytes` each.
+
+    Grid requests (resizes) must be applied before cells are written. Cell
+    requests write disjoint ranges, so their chunks can be sent in any order.
+    """
+    grid_request_list = [request for request in request_list if "updateSheetProperties" in request]
+    chunk_list = []
+    chunk = []
+    chunk_bytes = 0
+    for request in request_list:
+        if "updateSheetProperties" in request:
+            continue
+        part_list = [request]
+        if "updateCells" in request and _get_payload_bytes(request) > max_bytes:
+            part_list = _split_update_cells_request(request, max_bytes)
+        for part in part_list:
+            part_bytes = _get_payload_bytes(part)
+            if chunk and chunk_bytes + part_bytes > max_bytes:
+                chunk_list.append(chunk)
+                chunk = []
+                chunk_bytes = 0
+            chunk.append(part)
+            chunk_bytes += part_bytes
+    if chunk:
+        chunk_list.append(chunk)
+    return grid_request_list, chunk_list
+
+
+def _get_checkpoint_path(spreadsheet_id: str) -> str:
+    return os.path.join(GEEKBENCH_REPORT_SHEETS_SNAPSHOT_DIR, spreadsheet_id, "_checkpoint.json")
+
+
+def _get_publish_hash(request_list: list[dict], max_bytes: int) -> str:
+    # Chunk indices of a checkpoint are only valid for the same requests and chunk size
+    return hashlib.sha256(
+        json.dumps({"max_bytes": max_bytes, "requests": request_list}, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _read_checkpoint(checkpoint_path: str) -> dict | None:
+    """Return the checkpoint of an interrupted upload, None if there is none."""
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, "r") as f:
+        return json.load(f)
+
+
+def _read_completed_chunk_set(checkpoint_path: str, publish_hash: str) -> set[int]:
+    """Return chunks completed by an interrupted upload of the same requests."""
+    checkpoint = _read_checkpoint(checkpoint_path)
+    if checkpoint is None or checkpoint["publish_hash"] != publish_hash:
+        return set()
+    return set(checkpoint["completed_chunks"])
+
+
+def send_batch_update_in_chunks(
+    spreadsheet_id: str,
+    request_list: list[dict],
+    max_bytes: int = GEEKBENCH_REPORT_SHEETS_MAX_REQUEST_BYTES,
+    max_parallel: int = GEEKBENCH_REPORT_SHEETS_MAX_PARALLEL,
+    final_request_list: list[dict] | None = None,
+) -> tuple[int, int]:
+    """
+    Send `request_list` as `spreadsheets.batchUpdate` calls of at most `max_bytes`.
+
+    Grid requests are sent first, then chunks of cells are uploaded by up to
+    `max_parallel` threads. Completed chunks are recorded in a checkpoint file,
+    so an interrupted upload of the same requests resumes from the remaining chunks.
+    `final_request_list` is sent once every chunk is completed, and is not part
+    of the checkpoint.
+
+    Returns the number of API calls and payload bytes.
+    """
+    final_request_list = final_request_list or []
+    grid_request_list, chunk_list = chunk_batch_update_requests(request_list, max_bytes)
+    checkpoint_path = _get_checkpoint_path(spreadsheet_id)
+    publish_hash = _get_publish_hash(request_list, max_bytes)
+    completed_chunk_set = _read_completed_chunk_set(checkpoint_path, publish_hash)
+    if completed_chunk_set:
+        print(f"Resuming upload, {len(completed_chunk_set)} of {len(chunk_list)} chunks completed before.")
+
+    if len(chunk_list) <= 1 and not completed_chunk_set:
+        # Requests of a batchUpdate are applied in order, grid requests first
+        body = {"requests": grid_request_list + (chunk_list[0] if chunk_list else []) + final_request_list}
+        execute_with_backoff(
+            get_google_sheet_client().sheet.service.spreadsheets().batchUpdate(
+                spreadsheetId=spreadsheet_id, body=body,
+            )
         )
+        # A checkpoint left by an interrupted upload of other requests is superseded
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return 1, _get_payload_bytes(body)
 
-        # Upload DataFrame again, then cells will follow the types configured in the last step
-        worksheet.set_dataframe(df=df, start=start_address, copy_head=copy_head)
+    # Record the upload before anything is sent, so a failure in the middle is
+    # detected by the next publish even if no chunk was completed
+    _write_snapshot(
+        checkpoint_path,
+        {"publish_hash": publish_hash, "completed_chunks": sorted(completed_chunk_set)},
+    )
 
+    api_calls = 0
+    payload_bytes = 0
+    if grid_request_list:
+        body = {"requests": grid_request_list}
+        execute_with_backoff(
+            get_google_sheet_client().sheet.service.spreadsheets().batchUpdate(
+                spreadsheetId=spreadsheet_id, body=body,
+            )
+        )
+        api_calls += 1
+        payload_bytes += _get_payload_bytes(body)
 
-def e_gsheet_to_df(gsheet_url: str, worksheet_title: str | None = None) -> pd.DataFrame:
-    """Return DataFrame from a specified Google Sheets worksheet."""
-    gc = get_google_sheet_client()
-    sheet = gc.open_by_url(gsheet_url)
-    if worksheet_title:
-        return sheet.worksheet_by_title(worksheet_title).get_as_df(numerize=False)
-    return sheet.sheet1.get_as_df(numerize=False)
+    lock = threading.Lock()
+    # The HTTP client of the API is not thread-safe
+    thread_local = threading.local()
+
+    def upload_chunk(chunk_index: int) -> int:
+        if not hasattr(thread_local, "client"):
+            thread_local.client = get_google_sheet_client()
+        body = {"requests": chunk_list[chunk_index]}
+        execute_with_backoff(
+            thread_local.client.sheet.service.spreadsheets().batchUpdate(
+                spreadsheetId=spreadsheet_id, body=body,
+            )
+        )
+        with lock:
+            completed_chunk_set.add(chunk_index)
+            _write_snapshot(
+                checkpoint_path,
+                {"publish_hash": publish_hash, "completed_chunks": sorted(completed_chunk_set)},
+            )
+        return _get_payload_bytes(body)
+
+    pending_chunk_index_list = [
+        chunk_index for chunk_index in range(len(chunk_list)) if chunk_index not in completed_chunk_set
+    ]
+    if len(pending_chunk_index_list) == 1:
+        payload_bytes += upload_chunk(pending_chunk_index_list[0])
+        api_calls += 1
+    elif pending_chunk_index_list:
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            for chunk_payload_bytes in executor.map(upload_chunk, pending_chunk_index_list):
+                payload_bytes += chunk_payload_bytes
+                api_calls += 1
+        print(f"Uploaded {len(pending_chunk_index_list)} chunks with up to {max_parallel} threads.")
+
+    if final_request_list:
+        body = {"requests": final_request_list}
+        execute_with_backoff(
+            get_google_sheet_client().sheet.service.spreadsheets().batchUpdate(
+                spreadsheetId=spreadsheet_id, body=body,
+            )
+        )
+        api_calls += 1
+        payload_bytes += _get_payload_bytes(body)
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return api_calls, payload_bytes
+
+
+def _build_publish_requests(
+    spreadsheet_id: str,
+    worksheet_publish_list: list[WorksheetPublish],
+    use_snapshot: bool,
+) -> tuple[list[dict], list[dict], dict[str, dict], int]:
+    """
+    Return the requests publishing `worksheet_publish_list`, the requests of
+    worksheets with `publish_last`, the new snapshot of each worksheet and the
+    number of API calls used to read worksheet properties.
+    """
+    api_calls = 0
+
+    snapshot_map = {}
+    for worksheet_publish in worksheet_publish_list:
+        snapshot_path = _get_snapshot_path(spreadsheet_id, worksheet_publish.worksheet_title)
+        columns = [str(column) for column in worksheet_publish.df.columns]
+        snapshot_map[worksheet_publish.worksheet_title] = (
+            _read_snapshot(snapshot_path, worksheet_publish.start_address, columns) if use_snapshot else None
+        )
+
+    sheet_property_map = None
+    if any(snapshot is None for snapshot in snapshot_map.values()):
+        sheet_property_map = _get_sheet_property_map(get_google_sheet_client(), spreadsheet_id)
+        api_calls += 1
+
+    request_list = []
+    final_request_list = []
+    new_snapshot_map = {}
+    for worksheet_publish in worksheet_publish_list:
+        worksheet_title = worksheet_publish.worksheet_title
+        snapshot = snapshot_map[worksheet_title]
+        if snapshot is None:
+            print(f"No snapshot of {worksheet_title} to compare, publishing every cell.")
+            sheet_properties = sheet_property_map[worksheet_title]
+            sheet_id = sheet_properties["sheetId"]
+            row_count = sheet_properties["gridProperties"]["rowCount"]
+            previous_value_list = None
+        else:
+            sheet_id = snapshot["sheet_id"]
+            row_count = snapshot["row_count"]
+            previous_value_list = snapshot["values"]
+
+        value_list = dataframe_to_sheet_values(worksheet_publish.df, copy_head=worksheet_publish.copy_head)
+        worksheet_request_list, sheet_diff, row_count = _build_worksheet_requests(
+            worksheet_publish, sheet_id, row_count, previous_value_list, value_list,
+        )
+        if worksheet_publish.publish_last:
+            final_request_list.extend(worksheet_request_list)
+        else:
+            request_list.extend(worksheet_request_list)
+        new_snapshot_map[worksheet_title] = {
+            "start_address": list(worksheet_publish.start_address),
+            "columns": [str(column) for column in worksheet_publish.df.columns],
+            "sheet_id": sheet_id,
+            "row_count": row_count,
+            "values": value_list,
+        }
+        print(
+            f"{worksheet_title}: {sheet_diff.changed_rows} changed rows, "
+            f"{sheet_diff.changed_cells} cells in {len(sheet_diff.block_list)} ranges, "
+            f"{sheet_diff.added_keys} added and {sheet_diff.removed_keys} removed keys."
+        )
+
+    return request_list, final_request_list, new_snapshot_map, api_calls
+
+
+def publish_dataframes_to_google_sheets(
+    spreadsheet_url: str,
+    worksheet_publish_list: list[WorksheetPublish],
+    use_snapshot: bool = True,
+) -> None:
+    """
+    Publish DataFrames to worksheets of a spreadsheet with one `spreadsheets.batchUpdate`.
+
+    Requests over `GEEKBENCH_REPORT_SHEETS_MAX_REQUEST_BYTES` are uploaded in
+    resumable chunks, see `send_batch_update_in_chunks`.
+
+    The request resizes the grid of each worksheet to its rows, configures
+    object-type-columns to TEXT and writes the values. Only cells changed since
+    the last publish are written: values, sheet ID and row count of the last
+    publish are kept in a snapshot file under `GEEKBENCH_REPORT_SHEETS_SNAPSHOT_DIR`,
+    and rows are compared by `key_column`, a row whose key moved to another
+    position being rewritten as a whole.
+
+    Worksheet properties are read once when a worksheet has no snapshot (first
+    publish, other layout or `use_snapshot=False`), every cell is then written.
+    Every cell is also written after an interrupted chunked upload, unless the
+    same requests are resumed. Worksheets with `publish_last` are not compared,
+    so a new update time does not prevent resuming.
+    """
+    spreadsheet_id = get_spreadsheet_id(spreadsheet_url)
+    request_list, final_request_list, new_snapshot_map, api_calls = _build_publish_requests(
+        spreadsheet_id, worksheet_publish_list, use_snapshot,
+    )
+
+    # Chunks of an interrupted upload were written while the snapshots were not,
+    # unless the same requests are resumed the worksheets no longer match the snapshots
+    checkpoint = _read_checkpoint(_get_checkpoint_path(spreadsheet_id))
+    if (
+        use_snapshot
+        and checkpoint is not None
+        and checkpoint["publish_hash"] != _get_publish_hash(request_list, GEEKBENCH_REPORT_SHEETS_MAX_REQUEST_BYTES)
+    ):
+        print("An interrupted publish of other values left worksheets out of sync with their snapshots, publishing every cell.")
+        request_list, final_request_list, new_snapshot_map, full_publish_api_calls = _build_publish_requests(
+            spreadsheet_id, worksheet_publish_list, use_snapshot=False,
+        )
+        api_calls += full_publish_api_calls
+
+    payload_bytes = 0
+    if request_list or final_request_list:
+        request_api_calls, payload_bytes = send_batch_update_in_chunks(
+            spreadsheet_id, request_list, final_request_list=final_request_list,
+        )
+        api_calls += request_api_calls
+
+    for worksheet_title, snapshot in new_snapshot_map.items():
+        _write_snapshot(_get_snapshot_path(spreadsheet_id, worksheet_title), snapshot)
+    print(f"Published {len(worksheet_publish_list)} worksheets with {api_calls} API calls, {payload_bytes} payload bytes.")
+
+
+def publish_dataframe_diff_to_google_sheets_worksheet(
+    df: pd.DataFrame,
+    spreadsheet_url: str,
+    worksheet_title: str,
+    start_address: tuple[int, int],
+    key_column: str | None = None,
+    copy_head: bool = False,
+    use_snapshot: bool = True,
+) -> None:
+    """Publish DataFrame to one worksheet, see `publish_dataframes_to_google_sheets`."""
+    publish_dataframes_to_google_sheets(
+        spreadsheet_url,
+        [WorksheetPublish(df, worksheet_title, start_address, key_column, copy_head)],
+        use_snapshot=use_snapshot,
+    )
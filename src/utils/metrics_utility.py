@@ -0,0 +1,198 @@
+"""
+Metrics of the hot paths of flows, exported in the OpenMetrics format.
+
+Metrics are recorded in a registry of this module (not the default one of
+`prometheus_client`, which Prefect also uses):
+    - HTTP request latency and bytes downloaded by route, see `geekbench_http`
+    - Parse time per page by parser, see `geekbench_parse_pool`
+    - Rows and pages per CPU model, flush size and duration of the result sync
+    - BigQuery job latency and bytes processed/billed, see `bigquery_job_manager`
+
+They are exposed by:
+    - `GEEKBENCH_REPORT_METRICS_PORT`: an HTTP endpoint started by `start_metrics_server()`
+    - `GEEKBENCH_REPORT_METRICS_TEXTFILE`: a file rewritten by `write_metrics_textfile()`,
+      e.g. for the textfile collector of node_exporter
+    - `publish_metrics()`: the textfile, and a markdown artifact of the flow run
+"""
+
+import math
+import os
+import threading
+
+from dotenv import load_dotenv
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+from prometheus_client.openmetrics.exposition import generate_latest
+
+load_dotenv()
+
+GEEKBENCH_REPORT_METRICS_PORT = os.getenv("GEEKBENCH_REPORT_METRICS_PORT", "")
+GEEKBENCH_REPORT_METRICS_TEXTFILE = os.getenv("GEEKBENCH_REPORT_METRICS_TEXTFILE", "")
+
+REGISTRY = CollectorRegistry()
+
+# Pages take from tens of milliseconds to seconds when throttled
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+COUNT_BUCKETS = (0, 1, 10, 25, 100, 250, 1_000, 2_500, 10_000, 25_000, 100_000)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "geekbench_http_request_duration_seconds",
+    "Latency of Geekbench Browser requests.",
+    ["route", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+HTTP_RESPONSE_BYTES = Counter(
+    "geekbench_http_response_bytes",
+    "Bytes downloaded from Geekbench Browser.",
+    ["route"],
+    registry=REGISTRY,
+)
+HTTP_THROTTLED = Counter(
+    "geekbench_http_throttled",
+    "Responses of Geekbench Browser with status 429.",
+    ["route"],
+    registry=REGISTRY,
+)
+PARSE_DURATION = Histogram(
+    "geekbench_parse_duration_seconds",
+    "Parse time of a page, measured in the parse worker.",
+    ["parser"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+CPU_MODEL_ROWS = Histogram(
+    "geekbench_cpu_model_rows",
+    "Rows scraped per CPU model by the result sync.",
+    buckets=COUNT_BUCKETS,
+    registry=REGISTRY,
+)
+CPU_MODEL_PAGES = Histogram(
+    "geekbench_cpu_model_pages",
+    "Pages requested per CPU model by the result sync.",
+    buckets=COUNT_BUCKETS,
+    registry=REGISTRY,
+)
+CPU_MODELS_PROCESSED = Gauge(
+    "geekbench_cpu_models_processed",
+    "CPU models processed by the current result sync.",
+    registry=REGISTRY,
+)
+FLUSH_ROWS = Histogram(
+    "geekbench_flush_rows",
+    "Rows of each flush of the result sync.",
+    ["sink"],
+    buckets=COUNT_BUCKETS,
+    registry=REGISTRY,
+)
+FLUSH_DURATION = Histogram(
+    "geekbench_flush_duration_seconds",
+    "Duration of each flush of the result sync.",
+    ["sink"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+BIGQUERY_JOB_DURATION = Histogram(
+    "bigquery_job_duration_seconds",
+    "Wall time of BigQuery jobs from submit to done.",
+    ["label", "job_type", "state"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+BIGQUERY_JOB_BYTES_PROCESSED = Counter(
+    "bigquery_job_processed_bytes",
+    "Bytes processed by BigQuery jobs.",
+    ["label"],
+    registry=REGISTRY,
+)
+BIGQUERY_JOB_BYTES_BILLED = Counter(
+    "bigquery_job_billed_bytes",
+    "Bytes billed of BigQuery jobs.",
+    ["label"],
+    registry=REGISTRY,
+)
+
+_metrics_server_lock = threading.Lock()
+_is_metrics_server_started = False
+
+
+def start_metrics_server() -> None:
+    """Serve metrics on `GEEKBENCH_REPORT_METRICS_PORT` if set, once per process."""
+    global _is_metrics_server_started
+    if not GEEKBENCH_REPORT_METRICS_PORT:
+        return
+    with _metrics_server_lock:
+        if _is_metrics_server_started:
+            return
+        start_http_server(int(GEEKBENCH_REPORT_METRICS_PORT), registry=REGISTRY)
+        _is_metrics_server_started = True
+    print(f"Serving metrics on port {GEEKBENCH_REPORT_METRICS_PORT}")
+
+
+def write_metrics_textfile(path: str = GEEKBENCH_REPORT_METRICS_TEXTFILE) -> None:
+    """Rewrite the OpenMetrics textfile at `path`, if set."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Write to a temporary file first, collectors may read at the same time
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(generate_latest(REGISTRY))
+    os.replace(f"{path}.tmp", path)
+
+
+def _get_bucket_quantile(bucket_list: list[tuple[float, float]], count: float, quantile: float) -> float:
+    """Return the upper bound of the bucket holding `quantile` of cumulative `bucket_list`."""
+    for upper_bound, cumulative_count in bucket_list:
+        if cumulative_count >= quantile * count:
+            return upper_bound
+    return math.inf
+
+
+def summarize_metrics() -> str:
+    """Return a markdown table of every recorded metric."""
+    line_list = [
+        "| metric | labels | count | sum | mean | p50 ≤ | p95 ≤ |",
+        "|---|---|---:|---:|---:|---:|---:|",
+    ]
+    for metric in REGISTRY.collect():
+        sample_map = {}
+        for sample in metric.samples:
+            labels = {key: value for key, value in sample.labels.items() if key != "le"}
+            label_text = ", ".join(f"{key}={value}" for key, value in sorted(labels.items()))
+            sample_map.setdefault(label_text, []).append(sample)
+
+        for label_text, sample_list in sample_map.items():
+            if metric.type == "histogram":
+                count = next(s.value for s in sample_list if s.name.endswith("_count"))
+                if count == 0:
+                    continue
+                total = next(s.value for s in sample_list if s.name.endswith("_sum"))
+                bucket_list = [
+                    (float(s.labels["le"]), s.value) for s in sample_list if s.name.endswith("_bucket")
+                ]
+                line_list.append(
+                    f"| {metric.name} | {label_text} | {count:.0f} | {total:,.2f} | {total / count:,.3f} "
+                    f"| {_get_bucket_quantile(bucket_list, count, 0.5):g} "
+                    f"| {_get_bucket_quantile(bucket_list, count, 0.95):g} |"
+                )
+            elif metric.type in ("counter", "gauge"):
+                value = next(
+                    s.value for s in sample_list if not s.name.endswith("_created")
+                )
+                line_list.append(f"| {metric.name} | {label_text} | | {value:,.0f} | | | |")
+    return "\n".join(line_list)
+
+
+def publish_metrics(artifact_key: str) -> None:
+    """Write the textfile and attach the metrics as a markdown artifact of the flow run."""
+    from prefect.artifacts import create_markdown_artifact
+    from prefect.context import FlowRunContext
+
+    write_metrics_textfile()
+    if FlowRunContext.get() is None:
+        print(summarize_metrics())
+        return
+    create_markdown_artifact(
+        key=artifact_key,
+        markdown=f"# Metrics\n\n{summarize_metrics()}\n",
+        description="Hot-path metrics of the flow run",
+    )
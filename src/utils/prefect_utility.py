@@ -1,11 +1,13 @@
 """Prefect related utilities."""
 
-import inspect
+import sys
 
 
 def generate_flow_name() -> str:
     """Use this function to auto generate flow name."""
-    current_file_path = inspect.stack()[1].filename
+    # Only the caller's frame is needed, `inspect.stack()` would read the source
+    # of every frame at import time of each flow module
+    current_file_path = sys._getframe(1).f_code.co_filename
     current_file_name = current_file_path.split("/")[-1].split(".")[0]
     current_folder_name = current_file_path.split("/")[-2].split(".")[0]
     return f"{current_folder_name}_{current_file_name}"
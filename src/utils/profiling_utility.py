@@ -0,0 +1,305 @@
+"""
+On-demand profiling of flow runs.
+
+Decorate a flow function with `@profile_flow` under `@flow(name=generate_flow_name(), ...)`.
+The flow gets a `profile: bool = False` parameter, so profiling can be turned
+on per deployment or run. `GEEKBENCH_REPORT_PROFILE=true` turns it on for every
+flow of the process.
+
+When on, the run is profiled with:
+    - A sampling profiler: a thread reads the stacks of the flow thread and of
+      threads started by the run each `GEEKBENCH_REPORT_PROFILE_INTERVAL_MS`
+      (default 10 ms), so waits on the network or BigQuery show up as well as
+      CPU time. Threads of Prefect running before the flow are not sampled,
+      nor are pages parsed in the parse pool, which run in other processes.
+    - tracemalloc: a snapshot is taken each time traced memory grows by 10%,
+      so the top allocations are those of the peak of the run.
+
+Collapsed stacks (for `flamegraph.pl` or speedscope) and a flamegraph SVG are
+written to `GEEKBENCH_REPORT_PROFILE_DIR`. A markdown artifact with the top
+functions and top allocations is attached to the flow run.
+"""
+
+import functools
+import html
+import inspect
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEEKBENCH_REPORT_PROFILE = os.getenv("GEEKBENCH_REPORT_PROFILE", "false").lower() == "true"
+GEEKBENCH_REPORT_PROFILE_DIR = os.getenv("GEEKBENCH_REPORT_PROFILE_DIR", "/tmp/geekbench_report_profiles")
+GEEKBENCH_REPORT_PROFILE_INTERVAL_MS = float(os.getenv("GEEKBENCH_REPORT_PROFILE_INTERVAL_MS", "10"))
+
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 20
+
+MEMORY_CHECK_SECONDS = 1.0
+MEMORY_GROWTH_RATIO = 1.1
+
+FLAMEGRAPH_WIDTH = 1200
+FLAMEGRAPH_FRAME_HEIGHT = 16
+
+
+def _format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Count stacks of the calling thread and threads started after `start()`,
+    sampled each `interval_seconds`.
+
+    If tracemalloc is tracing, a snapshot is also taken whenever traced memory
+    exceeds the one of the previous snapshot by `MEMORY_GROWTH_RATIO`.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stack_counter: Counter[str] = Counter()
+        self.sample_count = 0
+        self.peak_snapshot: tracemalloc.Snapshot | None = None
+        self.peak_snapshot_bytes = 0
+        self._ignored_thread_id_set = set()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def take_snapshot_if_grown(self) -> None:
+        if not tracemalloc.is_tracing():
+            return
+        current_bytes, _ = tracemalloc.get_traced_memory()
+        if current_bytes > self.peak_snapshot_bytes * MEMORY_GROWTH_RATIO:
+            self.peak_snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+            )
+            self.peak_snapshot_bytes = current_bytes
+
+    def _sample(self) -> None:
+        own_thread_id = threading.get_ident()
+        thread_name_map = {thread.ident: thread.name for thread in threading.enumerate()}
+        last_memory_check = time.monotonic()
+        while not self._stop_event.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread_id or thread_id in self._ignored_thread_id_set:
+                    continue
+                frame_list = []
+                while frame is not None:
+                    frame_list.append(_format_frame(frame))
+                    frame = frame.f_back
+                thread_name = thread_name_map.get(thread_id)
+                if thread_name is None:
+                    thread_name_map = {thread.ident: thread.name for thread in threading.enumerate()}
+                    thread_name = thread_name_map.get(thread_id, str(thread_id))
+                # Collapsed stack format: root first, frames separated by ";"
+                frame_list.append(f"thread {thread_name}")
+                self.stack_counter[";".join(reversed(frame_list))] += 1
+            self.sample_count += 1
+
+            if time.monotonic() - last_memory_check >= MEMORY_CHECK_SECONDS:
+                self.take_snapshot_if_grown()
+                last_memory_check = time.monotonic()
+
+    def start(self) -> None:
+        self._ignored_thread_id_set = {
+            thread.ident for thread in threading.enumerate() if thread.ident != threading.get_ident()
+        }
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def get_collapsed_stacks(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stack_counter.most_common())
+
+    def get_function_counters(self) -> tuple[Counter[str], Counter[str]]:
+        """Return (self samples, total samples) of each function."""
+        self_counter = Counter()
+        total_counter = Counter()
+        for stack, count in self.stack_counter.items():
+            frame_list = stack.split(";")[1:]
+            if not frame_list:
+                continue
+            self_counter[frame_list[-1]] += count
+            # A recursive function counts once per sample
+            for frame in set(frame_list):
+                total_counter[frame] += count
+        return self_counter, total_counter
+
+
+def render_flamegraph_svg(stack_counter: Counter[str], title: str) -> str:
+    """Render collapsed stacks as a flamegraph SVG, root at the bottom."""
+    tree = {"count": 0, "children": {}}
+    for stack, count in stack_counter.items():
+        node = tree
+        node["count"] += count
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(frame, {"count": 0, "children": {}})
+            node["count"] += count
+
+    def get_depth(node: dict) -> int:
+        return 1 + max((get_depth(child) for child in node["children"].values()), default=0)
+
+    depth = get_depth(tree)
+    height = (depth + 1) * FLAMEGRAPH_FRAME_HEIGHT
+    total = max(tree["count"], 1)
+    rect_list = []
+
+    def add_rects(node: dict, name: str, x: float, level: int) -> None:
+        width = node["count"] / total * FLAMEGRAPH_WIDTH
+        if width < 0.5:
+            return
+        y = height - (level + 1) * FLAMEGRAPH_FRAME_HEIGHT
+        # Warm colors, varied by name so neighbouring frames differ
+        hue = 10 + hash(name) % 40
+        label = html.escape(name)
+        rect_list.append(
+            f'<g><title>{label} ({node["count"]} samples, {node["count"] / total:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{FLAMEGRAPH_FRAME_HEIGHT - 1}" '
+            f'fill="hsl({hue},85%,60%)"/>'
+            f'<text x="{x + 3:.1f}" y="{y + FLAMEGRAPH_FRAME_HEIGHT - 4}">'
+            f'{label[: int(width / 7)] if width > 21 else ""}</text></g>'
+        )
+        child_x = x
+        for child_name, child in sorted(node["children"].items()):
+            add_rects(child, child_name, child_x, level + 1)
+            child_x += child["count"] / total * FLAMEGRAPH_WIDTH
+
+    add_rects(tree, "all", 0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{FLAMEGRAPH_WIDTH}" height="{height + 20}" '
+        f'font-family="monospace" font-size="11">'
+        f'<text x="4" y="14">{html.escape(title)}</text>'
+        f'<g transform="translate(0,20)">{"".join(rect_list)}</g></svg>'
+    )
+
+
+def summarize_profile(
+    profiler: SamplingProfiler,
+    peak_bytes: int,
+    elapsed_seconds: float,
+    file_path_list: list[str],
+) -> str:
+    """Return a markdown report of the top functions and top allocations."""
+    self_counter, total_counter = profiler.get_function_counters()
+    # Each sample reads every thread, shares are of all sampled stacks
+    stack_samples = max(sum(profiler.stack_counter.values()), 1)
+
+    line_list = [
+        f"Profiled {elapsed_seconds:.1f}s, {profiler.sample_count} samples every "
+        f"{profiler.interval_seconds * 1000:.0f} ms, traced memory peak {peak_bytes / 1024 / 1024:.1f} MB.",
+        "",
+        "## Top functions",
+        "",
+        "| function | self | total |",
+        "|---|---:|---:|",
+    ]
+    for function, count in total_counter.most_common(TOP_FUNCTIONS):
+        line_list.append(
+            f"| `{function}` | {self_counter[function] / stack_samples:.1%} | {count / stack_samples:.1%} |"
+        )
+
+    line_list += [
+        "",
+        f"## Top allocations at {profiler.peak_snapshot_bytes / 1024 / 1024:.1f} MB traced",
+        "",
+        "| location | size | blocks |",
+        "|---|---:|---:|",
+    ]
+    stat_list = profiler.peak_snapshot.statistics("lineno") if profiler.peak_snapshot else []
+    for stat in stat_list[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        line_list.append(
+            f"| `{frame.filename}:{frame.lineno}` | {stat.size / 1024:,.1f} KB | {stat.count:,} |"
+        )
+
+    line_list += ["", "## Files", ""] + [f"- `{file_path}`" for file_path in file_path_list]
+    return "\n".join(line_list)
+
+
+def _publish_profile(flow_name: str, markdown: str) -> None:
+    from prefect.artifacts import create_markdown_artifact
+    from prefect.context import FlowRunContext
+
+    if FlowRunContext.get() is None:
+        print(markdown)
+        return
+    create_markdown_artifact(
+        # Artifact keys only allow lowercase letters, numbers and dashes
+        key=f"{flow_name.replace('_', '-').lower()}-profile",
+        markdown=f"# Profile of {flow_name}\n\n{markdown}\n",
+        description="Sampling profile and top allocations of the flow run",
+    )
+
+
+def run_profiled(func: Callable, flow_name: str, *args, **kwargs):
+    """Run `func(*args, **kwargs)` under the sampling profiler and tracemalloc."""
+    profiler = SamplingProfiler(GEEKBENCH_REPORT_PROFILE_INTERVAL_MS / 1000)
+    is_tracing = tracemalloc.is_tracing()
+    if not is_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start_time = time.perf_counter()
+    profiler.start()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.stop()
+        elapsed_seconds = time.perf_counter() - start_time
+        profiler.take_snapshot_if_grown()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        if not is_tracing:
+            tracemalloc.stop()
+
+        os.makedirs(GEEKBENCH_REPORT_PROFILE_DIR, exist_ok=True)
+        file_prefix = os.path.join(
+            GEEKBENCH_REPORT_PROFILE_DIR, f"{flow_name}_{datetime.now():%Y%m%d_%H%M%S}",
+        )
+        with open(f"{file_prefix}.collapsed.txt", "w") as f:
+            f.write(profiler.get_collapsed_stacks())
+        with open(f"{file_prefix}.svg", "w") as f:
+            f.write(render_flamegraph_svg(profiler.stack_counter, flow_name))
+        _publish_profile(
+            flow_name,
+            summarize_profile(
+                profiler,
+                peak_bytes,
+                elapsed_seconds,
+                [f"{file_prefix}.collapsed.txt", f"{file_prefix}.svg"],
+            ),
+        )
+        print(f"Profile written to {file_prefix}.svg")
+
+
+def profile_flow(func: Callable) -> Callable:
+    """
+    Add a `profile` parameter to a flow function, profiling the run when true.
+
+    Put it under `@flow`, so Prefect sees the parameter in the flow signature.
+    """
+    signature = inspect.signature(func)
+    profile_parameter = inspect.Parameter(
+        "profile", inspect.Parameter.KEYWORD_ONLY, default=False, annotation=bool,
+    )
+
+    @functools.wraps(func)
+    def wrapper(*args, profile: bool = False, **kwargs):
+        if not (profile or GEEKBENCH_REPORT_PROFILE):
+            return func(*args, **kwargs)
+        return run_profiled(func, func.__name__, *args, **kwargs)
+
+    wrapper.__signature__ = signature.replace(
+        parameters=[*signature.parameters.values(), profile_parameter],
+    )
+    return wrapper